@@ -1,7 +1,19 @@
+import importlib.util
 import pandas as pd
+import numpy as np
+from pandas.api.types import union_categoricals
 import sqlite3
 import re
-from googletrans import Translator 
+from feedback_rules import get_rules
+from db_schema import ensure_schema, RAW_COLUMNS, DERIVED_COLUMNS
+from translation_cache import TranslationCache
+from translation_engine import TranslationEngine
+from language_filter import LanguageFilter
+from sentiment_scorer import SentimentCache, SentimentScorer
+from feedback_clusters import assign_clusters
+import resources
+from perf_metrics import span, counter_delta
+import perf_metrics
 
 # --- CONSTANTS ---
 DB_FILE_NAME = 'feedback_data.db' 
@@ -11,8 +23,32 @@ SENTIMENT_COLUMN = 'Sentiment'
 # ✅ FIX: 'Confidence_SCORE' ko 'Confidence_Score' mein badla gaya.
 CONFIDENCE_COLUMN = 'Confidence_Score' 
 
-# --- INITIALIZE TRANSLATOR ---
-translator = Translator()
+# --- SHARED RESOURCES (built on first use, once per process) ---
+
+def _create_translator():
+    # googletrans pulls in httpx & co., so it is only imported when a text needs translating
+    from googletrans import Translator
+    return Translator()
+
+
+def _create_sentiment_scorer():
+    scorer = SentimentScorer(cache=SentimentCache(DB_FILE_NAME))
+    scorer.available  # loads the model now, so warm-up pays for it instead of the first run
+    return scorer
+
+
+resources.register('translator', _create_translator)
+resources.register('sentiment_scorer', _create_sentiment_scorer)
+
+# Detected language + translation per unique text, persisted next to the feedback table
+translation_cache = TranslationCache(DB_FILE_NAME)
+# Offline script/ASCII check so plain English never reaches translator.detect()
+language_filter = LanguageFilter()
+# Column-level stage used by the agent: dedup + batched, concurrent requests
+translation_engine = TranslationEngine(
+    cache=translation_cache, language_filter=language_filter,
+    translator_factory=lambda: resources.get('translator')
+)
 
 # --- HELPER FUNCTIONS ---
 
@@ -25,93 +61,464 @@ def translate_text(text):
         return str(text) 
     
     text_str = str(text)
+
+    if language_filter.is_english(text_str):
+        return text_str
+
+    cached = translation_cache.get(text_str)
+    if cached is not None:
+        return cached.translated_text
     
     try:
+        translator = resources.get('translator')
         detection = translator.detect(text_str)
         
+        translated_text = text_str
         if detection.lang != 'en' and detection.confidence > 0.9:
             translated = translator.translate(text_str, dest='en')
-            return translated.text
+            translated_text = translated.text
         
-        return text_str 
+        translation_cache.put(text_str, detection.lang, detection.confidence, translated_text)
+        return translated_text
         
     except Exception as e:
+        # Failures are not cached so the text is retried on the next run
         return text_str
 
 
 def categorize_feedback(text):
-    """Categorizes feedback text into specific areas using English keywords."""
+    """Categorizes feedback text into specific areas using the English keywords from the rules file."""
     text_lower = str(text).lower()
-    
-    if 'customer support' in text_lower or 'service was terrible' in text_lower or 'technical support' in text_lower or 'slow response' in text_lower:
-        return 'Customer Support'
-    elif 'product' in text_lower or 'quality' in text_lower or 'damaged' in text_lower or 'ordered' in text_lower or 'broken' in text_lower:
-        return 'Product Quality'
-    elif 'website' in text_lower or 'app' in text_lower or 'confusing' in text_lower or 'login' in text_lower or 'crashed' in text_lower:
-        return 'Website/App'
-    else:
-        return 'General/Other'
+    return get_rules().categorize_linear(text_lower)
 
 
 def assign_priority(row):
     """Assigns a priority level based on sentiment and confidence score."""
-    sentiment = row[SENTIMENT_COLUMN]
-    confidence = row[CONFIDENCE_COLUMN]
-    
-    if sentiment == 'Negative' and confidence >= 0.75:
-        return 'P1: Critical Issue 🚨'
-    
-    elif sentiment == 'Negative':
-        return 'P2: High Priority'
-    
-    elif sentiment == 'Positive' and confidence >= 0.85:
-        return 'P3: Top Positive 👍'
+    return get_rules().priority_for(row[SENTIMENT_COLUMN], row[CONFIDENCE_COLUMN])
+
+
+def get_priority_order():
+    """Priority label -> rank, as configured in the rules file."""
+    return get_rules().priority_order
+
+
+# --- VECTORIZED VERSIONS (same labels as the row-wise helpers above) ---
+
+def categorize_series(texts):
+    """
+    Vectorized categorize_feedback using the compiled keyword index.
+    Feedback repeats a lot, so each unique text is scanned once and the label broadcast back.
+    """
+    rules = get_rules()
+    codes, uniques = pd.factorize(texts, use_na_sentinel=False)
+    unique_labels = np.array([rules.categorize(str(value).lower()) for value in uniques], dtype=object)
+    return pd.Series(unique_labels[codes], index=texts.index, dtype=object)
+
+
+def assign_priority_series(df):
+    """Vectorized assign_priority (np.select over the Sentiment/Confidence_Score columns)."""
+    return get_rules().priority_series(df)
+
+
+# --- STREAMING READS ---
+# The agent reads in chunks and only the columns a stage uses, so peak memory depends on
+# the chunk size rather than the table size.
+DEFAULT_CHUNK_SIZE = 20000
+PIPELINE_COLUMNS = ['id', FEEDBACK_COLUMN, SENTIMENT_COLUMN, CONFIDENCE_COLUMN]
+# Transient pipeline column: the text a row's cluster is translated/categorized through
+REPRESENTATIVE_COLUMN = 'Cluster_Representative'
+CATEGORICAL_COLUMNS = [SENTIMENT_COLUMN, 'Category', 'Priority']
+
+
+def sql_column_list(columns):
+    return ', '.join(f'"{column}"' for column in columns)
+
+
+# --- RESULTS STORE (INCREMENTAL RUNS) ---
+# Derived columns are stored inline in feedback_table (see db_schema); a row is pending
+# until its Priority_Rank is set, which the (Priority_Rank, ...) index finds directly.
+STATE_TABLE_NAME = 'agent_state'
+RULES_KEY = 'rules_fingerprint'
+ID_COLUMN = 'id'
+# Derived columns holding the values the pipeline cleaned/scored in the frame's Sentiment and
+# Confidence_Score columns; the ingested raw columns are never written back
+SCORED_COLUMNS = {'Scored_Sentiment': SENTIMENT_COLUMN, 'Scored_Confidence': CONFIDENCE_COLUMN}
+# Rows per write-back statement: the search index triggers flush once per statement
+# (see feedback_collector.ROWS_PER_STATEMENT), so rows are updated in multi-row statements
+ROWS_PER_STATEMENT = 500
+
+
+def ensure_results_store(conn):
+    """Brings feedback_table to the current schema and creates the agent state table."""
+    ensure_schema(conn)
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {STATE_TABLE_NAME} (
+            key TEXT PRIMARY KEY,
+            value
+        )
+    """)
+
+
+def get_state(conn, key, default=None):
+    row = conn.execute(f"SELECT value FROM {STATE_TABLE_NAME} WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else default
+
+
+def set_state(conn, key, value):
+    conn.execute(f"INSERT OR REPLACE INTO {STATE_TABLE_NAME} (key, value) VALUES (?, ?)", (key, value))
+
+
+def reset_agent_results(conn):
+    """Marks every row as pending so the next run re-derives categories and priorities."""
+    ensure_results_store(conn)
+    with conn:
+        conn.execute(f"UPDATE {TABLE_NAME} SET Category = NULL, Priority = NULL, Priority_Rank = NULL")
+        conn.execute(f"DELETE FROM {STATE_TABLE_NAME} WHERE key = ?", (RULES_KEY,))
+
+
+def attach_clusters(conn, df, store=True):
+    """
+    Adds each row's near-duplicate Cluster_Id and the cluster's representative text (see
+    feedback_clusters). Pass store=False when the results won't be stored either, so the
+    cluster tables are left as they are.
+    """
+    with span('agent.cluster', rows=len(df)) as stage:
+        df['Cluster_Id'], df[REPRESENTATIVE_COLUMN] = assign_clusters(conn, df[FEEDBACK_COLUMN], store=store)
+        stage.add(clusters=int(df['Cluster_Id'].nunique()))
+    return df
+
+
+def _translation_counters(before):
+    delta = counter_delta(translation_engine.stats, before, ('unique_texts', 'prefiltered', 'cache_hits', 'requests', 'translated'))
+    return {
+        'unique_texts': delta['unique_texts'],
+        'prefiltered': delta['prefiltered'],
+        'cache_lookups': delta['unique_texts'] - delta['prefiltered'],
+        'cache_hits': delta['cache_hits'],
+        'translator_calls': delta['requests'],
+        'translated': delta['translated'],
+    }
+
+
+def process_feedback_frame(df):
+    """
+    Runs translation, cleaning, categorization and prioritization on a raw feedback frame.
+    If attach_clusters() ran first, each near-duplicate cluster is translated once,
+    through its representative text; English rows keep (and are categorized and
+    scored on) their own wording. Rows that arrived without a sentiment score are left
+    out while no sentiment model is loaded, so they stay pending until one is.
+    """
+    # 2. TRANSLATION STEP
+    with span('agent.translate', rows=len(df)) as stage:
+        before = dict(translation_engine.stats)
+        source = df[REPRESENTATIVE_COLUMN] if REPRESENTATIVE_COLUMN in df.columns else df[FEEDBACK_COLUMN]
+        translated = translation_engine.translate_series(source)
+        # English near-duplicates keep their own wording; only translated clusters borrow the representative's translation
+        df['Translated_Text'] = translated.where(translated != source, df[FEEDBACK_COLUMN])
+        stage.add(**_translation_counters(before))
+
+    # 2b. SENTIMENT STEP (only rows that arrived without a sentiment score)
+    df[CONFIDENCE_COLUMN] = pd.to_numeric(df[CONFIDENCE_COLUMN], errors='coerce')
+    unscored = df[SENTIMENT_COLUMN].isna() | df[CONFIDENCE_COLUMN].isna()
+    if unscored.any():
+        # Local model for rows ingested without Sentiment/Confidence_Score
+        with span('agent.sentiment', rows=int(unscored.sum())) as stage:
+            scorer = resources.get('sentiment_scorer')
+            before = dict(scorer.stats)
+            sentiment, confidence = scorer.score_series(df.loc[unscored, 'Translated_Text'])
+            delta = counter_delta(scorer.stats, before, ('unique_texts', 'cache_hits', 'scored', 'batches'))
+            stage.add(cache_lookups=delta['unique_texts'], cache_hits=delta['cache_hits'],
+                      model_texts=delta['scored'], model_batches=delta['batches'])
+            scored = sentiment.index[sentiment.notna()]
+            df[SENTIMENT_COLUMN] = df[SENTIMENT_COLUMN].astype(object)
+            df.loc[scored, SENTIMENT_COLUMN] = sentiment[scored]
+            df.loc[scored, CONFIDENCE_COLUMN] = confidence[scored]
+            # Without a model they stay pending until one is available; with one, only texts
+            # it can't score (empty ones) are left, and those get the defaults below
+            left_unscored = unscored & sentiment.reindex(df.index).isna()
+            if left_unscored.any() and not scorer.available:
+                stage.add(left_pending=int(left_unscored.sum()))
+                df = df[~left_unscored].copy()
+
+    # 3. DATA CLEANING & TYPE CONVERSION
+    with span('agent.clean', rows=len(df)):
+        df[SENTIMENT_COLUMN] = df[SENTIMENT_COLUMN].fillna('Neutral').astype(str).str.strip() 
+        # ✅ FIX: CONFIDENCE_COLUMN ab sahi hai
+        df[CONFIDENCE_COLUMN] = pd.to_numeric(df[CONFIDENCE_COLUMN], errors='coerce').fillna(0.0)
+
+    # 4. APPLY LOGIC (Now using 'Translated_Text' for categorization)
+    # Each row's own text (English) or its cluster's translation, i.e. the text the dashboard shows
+    with span('agent.categorize', rows=len(df)):
+        df['Category'] = categorize_series(df['Translated_Text'])
+    with span('agent.prioritize', rows=len(df)):
+        df['Priority'] = assign_priority_series(df)
+        df['Priority_Rank'] = df['Priority'].map(get_priority_order()).astype(int)
+        return as_categoricals(df)
+
+
+def as_categoricals(df):
+    """Low-cardinality label columns as categoricals (one small code per row instead of a string)."""
+    for column in CATEGORICAL_COLUMNS:
+        if column in df.columns:
+            df[column] = df[column].astype('category')
+    return df
+
+
+def concat_frames(frames):
+    """pd.concat for chunk results that keeps label columns categorical even if chunks saw different labels."""
+    frames = [frame for frame in frames if not frame.empty]
+    if not frames:
+        return pd.DataFrame()
+    columns = list(frames[0].columns)
+    categorical = [column for column in CATEGORICAL_COLUMNS if column in columns]
+    merged = {column: union_categoricals([frame[column] for frame in frames]) for column in categorical}
+    df = pd.concat([frame.drop(columns=categorical) for frame in frames], ignore_index=True)
+    for column in categorical:
+        df[column] = merged[column]
+    return df[columns]
+
+
+def finalize_output(df, compact=True):
+    """Renames text columns for the dashboard and sorts by priority (in the compact format by default)."""
+    df = df.rename(columns={'Text': 'Original_Text'})
+    df = df.rename(columns={'Translated_Text': 'Text'}) 
+    df = df.drop(columns=[REPRESENTATIVE_COLUMN], errors='ignore')
+    if compact:
+        df = compact_frame(df)
     
-    else:
-        return 'P4: Review Later'
+    return df.sort_values(by=['Priority_Rank', CONFIDENCE_COLUMN], ascending=[True, False])
+
+
+# --- COMPACT RESULT FORMAT ---
+# Arrow-backed strings are one contiguous buffer per column instead of a Python object per row
+STRING_DTYPE = 'string[pyarrow]' if importlib.util.find_spec('pyarrow') is not None else object
+STRING_COLUMNS = ['Date/Time', 'Original_Text', 'Text']
+
+
+def compact_frame(df):
+    """
+    Memory-lean dtypes for a prioritized frame: categorical labels, the smallest integer
+    type for Priority_Rank (int8 for the shipped rules), float32 confidence and Arrow
+    strings. Text is left <NA> where the translation is identical to Original_Text
+    (English feedback); display_text() fills it back in.
+    """
+    df = as_categoricals(df)
+    if 'Text' in df.columns and 'Original_Text' in df.columns:
+        df['Text'] = df['Text'].where(df['Text'] != df['Original_Text'])
+    for column in STRING_COLUMNS:
+        if column in df.columns:
+            df[column] = df[column].astype(STRING_DTYPE)
+    if 'Priority_Rank' in df.columns:
+        df['Priority_Rank'] = pd.to_numeric(df['Priority_Rank'], downcast='integer')
+    if CONFIDENCE_COLUMN in df.columns:
+        df[CONFIDENCE_COLUMN] = df[CONFIDENCE_COLUMN].astype('float32')
+    return df
+
+
+def display_text(df):
+    """English text per row of a compact frame (the translation, or the original where none was needed)."""
+    return df['Text'].fillna(df['Original_Text'])
+
+
+def sync_rules_version(conn):
+    """
+    Returns the current rules fingerprint. If the rules file changed since results were
+    stored, those labels no longer match, so every row is marked pending again
+    (translations stay cached).
+    """
+    rules_fingerprint = get_rules().fingerprint
+    stored_fingerprint = get_state(conn, RULES_KEY)
+    if stored_fingerprint is not None and stored_fingerprint != rules_fingerprint:
+        reset_agent_results(conn)
+    if stored_fingerprint != rules_fingerprint:
+        with conn:
+            set_state(conn, RULES_KEY, rules_fingerprint)
+    return rules_fingerprint
+
+
+def read_pending_rows(conn, limit=None, after_id=None):
+    """Pipeline input columns of rows still waiting for the agent, oldest first."""
+    if after_id is None:
+        # Find the first pending id through the Priority_Rank index...
+        after_id = conn.execute(f"SELECT MIN({ID_COLUMN}) FROM {TABLE_NAME} WHERE Priority_Rank IS NULL").fetchone()[0]
+        if after_id is None:
+            return pd.DataFrame(columns=PIPELINE_COLUMNS)
+        after_id -= 1
+    # ...then walk the primary key from there (unary + keeps the planner off the rank index)
+    query = f"""SELECT {sql_column_list(PIPELINE_COLUMNS)} FROM {TABLE_NAME}
+                WHERE {ID_COLUMN} > ? AND +Priority_Rank IS NULL ORDER BY {ID_COLUMN}"""
+    params = [after_id]
+    if limit is not None:
+        query += " LIMIT ?"
+        params.append(int(limit))
+    with span('agent.read') as stage:
+        df = pd.read_sql(query, conn, params=params)
+        stage.rows = len(df)
+    return df
+
+
+def iter_pending_chunks(conn, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yields pending rows chunk_size at a time (keyset on id, so writes between chunks are safe)."""
+    after_id = None
+    while True:
+        chunk = read_pending_rows(conn, limit=chunk_size, after_id=after_id)
+        if chunk.empty:
+            return
+        after_id = int(chunk[ID_COLUMN].iloc[-1])
+        yield chunk
+
+
+def count_pending_rows(conn):
+    return conn.execute(f"SELECT COUNT(*) FROM {TABLE_NAME} WHERE Priority_Rank IS NULL").fetchone()[0]
+
+
+def store_results(conn, df, rules_fingerprint):
+    """
+    Writes processed rows back in one transaction. Results computed under rules that
+    have since changed are dropped (the rows stay pending), so reprocessing is safe to
+    repeat. Returns the number of rows written.
+    """
+    # Only derived columns are written; the cleaned Sentiment/Confidence_Score go to Scored_*
+    stored_columns = DERIVED_COLUMNS
+    frame_columns = [SCORED_COLUMNS.get(column, column) for column in stored_columns]
+    records = df.reindex(columns=frame_columns + [ID_COLUMN]).itertuples(index=False, name=None)
+    rows = [
+        (text, category, priority, int(rank), None if pd.isna(cluster_id) else int(cluster_id),
+         sentiment, float(confidence), int(row_id))
+        for text, category, priority, rank, cluster_id, sentiment, confidence, row_id in records
+    ]
+    # VALUES columns are named column1..columnN; the id comes last
+    assignments = ', '.join(f"{column} = v.column{position}" for position, column in enumerate(stored_columns, 1))
+    placeholders = '(' + ', '.join('?' for _ in stored_columns + [ID_COLUMN]) + ')'
+    if conn.in_transaction:
+        conn.commit()
+    # Take the write lock before checking the rules, so the check holds for the whole write
+    # (several backfill processes may be storing at once)
+    with span('agent.store', rows=len(df)) as stage:
+        conn.execute("BEGIN IMMEDIATE")
+        with conn:
+            if get_state(conn, RULES_KEY) != rules_fingerprint:
+                stage.add(stale_rules=1)
+                return 0
+            stored = 0
+            for start in range(0, len(rows), ROWS_PER_STATEMENT):
+                chunk = rows[start:start + ROWS_PER_STATEMENT]
+                cursor = conn.execute(
+                    f"""UPDATE {TABLE_NAME} SET {assignments}
+                        FROM (VALUES {', '.join([placeholders] * len(chunk))}) AS v
+                        WHERE {TABLE_NAME}.{ID_COLUMN} = v.column{len(stored_columns) + 1}""",
+                    [value for row in chunk for value in row]
+                )
+                stored += cursor.rowcount
+            return stored
+
+
+def _process_new_rows(conn, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Processes pending rows and stores their derived columns, one chunk at a time
+    (read -> pipeline -> write generator), so memory stays flat however many rows are
+    pending. Returns the row count.
+    """
+    ensure_results_store(conn)
+    rules_fingerprint = sync_rules_version(conn)
+
+    with span('agent.run') as stage:
+        processed_chunks = (
+            process_feedback_frame(attach_clusters(conn, chunk)) for chunk in iter_pending_chunks(conn, chunk_size)
+        )
+        processed = sum(store_results(conn, chunk, rules_fingerprint) for chunk in processed_chunks)
+        stage.rows = processed
+    perf_metrics.flush(conn)
+    return processed
+
+
+def _iter_stored_results(conn, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Processed feedback rows with their stored derived columns, in chunks. Sentiment and
+    Confidence_Score carry the scored values, as in a freshly processed frame.
+    """
+    columns = [ID_COLUMN] + RAW_COLUMNS + DERIVED_COLUMNS
+    for df in pd.read_sql(
+        f"SELECT {sql_column_list(columns)} FROM {TABLE_NAME} WHERE Priority_Rank IS NOT NULL",
+        conn, chunksize=chunk_size
+    ):
+        for column, frame_column in SCORED_COLUMNS.items():
+            df[frame_column] = df.pop(column)
+        yield as_categoricals(df)
+
+
+def _load_stored_results(conn):
+    """Loads processed feedback rows together with their stored derived columns."""
+    with span('agent.load_results') as stage:
+        df = concat_frames(_iter_stored_results(conn))
+        stage.rows = len(df)
+    return df
+
+
+def process_pending_feedback():
+    """
+    Runs the pipeline on rows that have not been processed yet and stores the results,
+    without loading already-processed rows. Returns the number of rows processed.
+    """
+    conn = None
+    try:
+        conn = sqlite3.connect(DB_FILE_NAME)
+        return _process_new_rows(conn)
+    except Exception as e:
+        print(f"Error running prioritization agent on SQLite data: {e}")
+        return 0
+    finally:
+        if conn:
+            conn.close()
+
 
 # --- MAIN AGENT FUNCTION ---
-def run_prioritization_agent():
-    """Loads data, translates regional language, cleans, categorizes, and prioritizes feedback."""
+def run_prioritization_agent(incremental=True, workers=None):
+    """
+    Loads data, translates regional language, cleans, categorizes, and prioritizes feedback.
+    In incremental mode only rows that have not been processed yet go through the pipeline;
+    their derived columns are stored in feedback_table next to the raw feedback.
+    A full (non-incremental) run with workers > 1 splits the table into id ranges processed
+    on that many cores, then merges them with one global sort.
+    """
     conn = None
     try:
         conn = sqlite3.connect(DB_FILE_NAME)
-        # 1. DATA LOAD
-        df = pd.read_sql(f"SELECT * FROM {TABLE_NAME}", conn)
+        ensure_results_store(conn)
+
+        if not incremental and workers and workers > 1:
+            from feedback_worker import process_table_parallel
+
+            df = concat_frames(process_table_parallel(DB_FILE_NAME, max_workers=workers))
+            if df.empty:
+                return pd.DataFrame()
+            return finalize_output(df)
+
+        if not incremental:
+            # 1. DATA LOAD (chunked; each chunk goes through the pipeline before the next is read)
+            with span('agent.recompute') as stage:
+                chunks = pd.read_sql(
+                    f"SELECT {sql_column_list([ID_COLUMN] + RAW_COLUMNS)} FROM {TABLE_NAME}",
+                    conn, chunksize=DEFAULT_CHUNK_SIZE
+                )
+                df = concat_frames(process_feedback_frame(attach_clusters(conn, chunk, store=False)) for chunk in chunks)
+                stage.rows = len(df)
+            if df.empty:
+                return pd.DataFrame()
+            return finalize_output(df)
+
+        _process_new_rows(conn)
+        df = _load_stored_results(conn)
         
         if df.empty:
             return pd.DataFrame()
+
+        return finalize_output(df)
         
     except Exception as e:
-        print(f"Error loading data from SQLite: {e}")
+        print(f"Error running prioritization agent on SQLite data: {e}")
         return pd.DataFrame()
     finally:
         if conn:
+            perf_metrics.flush(conn)
             conn.close()
-
-    # 2. TRANSLATION STEP
-    df['Translated_Text'] = df[FEEDBACK_COLUMN].apply(translate_text)
-
-
-    # 3. DATA CLEANING & TYPE CONVERSION
-    df[SENTIMENT_COLUMN] = df[SENTIMENT_COLUMN].fillna('Neutral').astype(str).str.strip() 
-    # ✅ FIX: CONFIDENCE_COLUMN ab sahi hai
-    df[CONFIDENCE_COLUMN] = pd.to_numeric(df[CONFIDENCE_COLUMN], errors='coerce').fillna(0.0)
-
-    # 4. APPLY LOGIC (Now using 'Translated_Text' for categorization)
-    df['Category'] = df['Translated_Text'].apply(categorize_feedback)
-    df['Priority'] = df.apply(assign_priority, axis=1)
-
-    # 5. SORTING & RENAMING
-    priority_order = {
-        'P1: Critical Issue 🚨': 1,
-        'P2: High Priority': 2,
-        'P3: Top Positive 👍': 3,
-        'P4: Review Later': 4
-    }
-    df['Priority_Rank'] = df['Priority'].map(priority_order)
-    
-    df = df.rename(columns={'Text': 'Original_Text'})
-    df = df.rename(columns={'Translated_Text': 'Text'}) 
-    
-    return df.sort_values(by=['Priority_Rank', CONFIDENCE_COLUMN], ascending=[True, False])
\ No newline at end of file
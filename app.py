@@ -4,34 +4,40 @@ import warnings
 warnings.filterwarnings("ignore", category=DeprecationWarning) 
 
 import streamlit as st
-import pandas as pd
-import plotly.express as px
 import sqlite3 
+from collections import namedtuple
+from datetime import date, datetime
 import streamlit as st
-from agent_logic import run_prioritization_agent 
+import resources
+import perf_metrics
+from perf_metrics import span
+# pandas, plotly and the agent (translator, sentiment model) are imported inside the
+# functions that use them, so the login page renders without paying for them.
 
-# --- 1. LOGIN CONSTANTS & PRIORITY ORDER ---
+# --- 1. LOGIN CONSTANTS (priority order lives in feedback_rules.json) ---
 USER_CREDENTIALS = {
     "admin": "admin123",
     "analyst": "data456",
     "viewer": "view789",
 }
 
-PRIORITY_ORDER = {
-    'P1: Critical Issue 🚨': 1,
-    'P2: High Priority': 2,
-    'P3: Top Positive 👍': 3,
-    'P4: Review Later': 4
-}
-
 # --- FILE PATH CONSTANTS ---
 DB_FILE_NAME = 'feedback_data.db' 
 TABLE_NAME = 'feedback_table'     
 
+# Agent output is shared by all sessions; the TTL bounds staleness if a change slips past get_data_version()
+AGENT_CACHE_TTL_SECONDS = 600
+
+# Loaded on a background thread right after login (see resources.warm_up)
+WARM_UP_MODULES = ['pandas', 'plotly.express', 'agent_logic', 'feedback_queries', 'feedback_aggregates', 'feedback_export']
+WARM_UP_RESOURCES = ['translator', 'sentiment_scorer']
+
 
 # --- DATA DELETION FUNCTION (Clears SQLite Table) ---
 def clear_database():
     """Deletes the entire feedback table from the SQLite database."""
+    from agent_logic import reset_agent_results
+
     conn = None
     try:
         conn = sqlite3.connect(DB_FILE_NAME)
@@ -39,6 +45,11 @@ def clear_database():
         
         cursor.execute(f"DROP TABLE IF EXISTS {TABLE_NAME}")
         conn.commit()
+        # Stored agent results point at the dropped rows, so forget them too
+        reset_agent_results(conn)
+        refresh_prioritized_feedback.clear()
+        load_dashboard_aggregates.clear()
+        load_cluster_page.clear()
         
         st.success(f"✅ Database reset successful! Table '{TABLE_NAME}' deleted from {DB_FILE_NAME}.")
     except Exception as e:
@@ -48,6 +59,100 @@ def clear_database():
             conn.close()
 
 
+# --- CACHED AGENT RESULTS (shared across reruns, sessions and users) ---
+DataVersion = namedtuple('DataVersion', ['min_rowid', 'max_rowid', 'pending', 'rules_fingerprint'])
+
+
+def get_data_version():
+    """
+    Cheap fingerprint of the underlying data: the feedback table's min/max rowid (the min
+    moves when retention drops old weeks), the number of rows still waiting for the agent
+    (all index lookups) plus the rules version. File mtime is not used because the agent
+    itself writes its results/cache tables into the same DB file.
+    """
+    from feedback_rules import get_rules
+
+    min_rowid = max_rowid = pending = None
+    conn = None
+    try:
+        conn = sqlite3.connect(DB_FILE_NAME)
+        min_rowid, max_rowid = conn.execute(f"SELECT MIN(rowid), MAX(rowid) FROM {TABLE_NAME}").fetchone()
+        pending = conn.execute(f"SELECT COUNT(*) FROM {TABLE_NAME} WHERE Priority_Rank IS NULL").fetchone()[0]
+    except sqlite3.Error:
+        pass
+    finally:
+        if conn:
+            conn.close()
+    return DataVersion(min_rowid, max_rowid, pending, get_rules().fingerprint)
+
+
+def worker_running():
+    """True while feedback_worker.py is prioritizing in the background (the dashboard then only reads)."""
+    from feedback_worker import worker_is_alive
+
+    conn = sqlite3.connect(DB_FILE_NAME)
+    try:
+        return worker_is_alive(conn)
+    finally:
+        conn.close()
+
+
+@st.cache_data(ttl=AGENT_CACHE_TTL_SECONDS, max_entries=4, show_spinner="🤖 Running prioritization agent...")
+def refresh_prioritized_feedback(data_version):
+    """Processes new feedback once per data version; returns the computed-at timestamp."""
+    from agent_logic import process_pending_feedback
+
+    process_pending_feedback()
+    return datetime.now()
+
+
+@st.cache_data(ttl=AGENT_CACHE_TTL_SECONDS, max_entries=256, show_spinner=False)
+def load_dashboard_aggregates(filters, data_version, today):
+    """KPI + chart aggregates, memoized per (filter set, data version, day: the 7-day KPI moves at midnight)."""
+    import feedback_aggregates
+    import feedback_queries
+    from feedback_rules import get_rules
+
+    rules = get_rules()
+    critical_label = rules.priorities[0]['label']
+    high_label = rules.priorities[1]['label'] if len(rules.priorities) > 1 else critical_label
+    conn = feedback_queries.connect(DB_FILE_NAME)
+    try:
+        return feedback_aggregates.fetch_dashboard_aggregates(conn, filters, critical_label, high_label, today=today)
+    finally:
+        conn.close()
+
+
+@st.cache_data(ttl=AGENT_CACHE_TTL_SECONDS, max_entries=256, show_spinner=False)
+def load_cluster_page(filters, data_version, offset):
+    """One page of near-duplicate clusters plus the cluster count, memoized per filter set and data version."""
+    import feedback_queries
+    from feedback_rules import get_rules
+
+    priority_order = get_rules().priority_order
+    conn = feedback_queries.connect(DB_FILE_NAME)
+    try:
+        df_page, next_offset = feedback_queries.fetch_cluster_page(conn, filters, priority_order, after=offset)
+        return df_page, next_offset, feedback_queries.count_clusters(conn, filters, priority_order)
+    finally:
+        conn.close()
+
+
+# --- TABLE PAGINATION (keyset cursors kept per session) ---
+def _reset_table_pages(filter_key):
+    """Starts the table on page 1 whenever the filters change."""
+    if st.session_state.get('table_filter_key') != filter_key:
+        st.session_state['table_filter_key'] = filter_key
+        st.session_state['table_page_cursors'] = [None]
+
+def _next_table_page(cursor):
+    st.session_state['table_page_cursors'].append(cursor)
+
+def _previous_table_page():
+    if len(st.session_state['table_page_cursors']) > 1:
+        st.session_state['table_page_cursors'].pop()
+
+
 # --- 2. STREAMLIT CONFIGURATION & INITIALIZATION ---
 st.set_page_config(
     layout="wide", 
@@ -125,6 +230,8 @@ def handle_login(username, password):
     if username in USER_CREDENTIALS and USER_CREDENTIALS[username] == password:
         st.session_state['authenticated'] = True
         st.session_state['username'] = username
+        # Start loading the dashboard's modules, translator and model while the page reruns
+        resources.warm_up(WARM_UP_MODULES, WARM_UP_RESOURCES)
         st.toast(f"✅ Login successful! Welcome, {username}.", icon='🎉')
         st.rerun() 
     else:
@@ -169,8 +276,12 @@ def show_login_page():
 
 # --- 4. MAIN APPLICATION CONTENT (Design Enhanced) ---
 
-def show_main_app(df_prioritized):
+def show_main_app(data_version, data_as_of=None, background_queue=None):
     """Main dashboard content with enhanced design."""
+    import plotly.express as px
+    import feedback_export
+    import feedback_queries
+    from feedback_rules import get_rules
     
     # --- HEADER & LOGOUT ---
     st.sidebar.header(f"Welcome, {st.session_state['username']}! 👋")
@@ -179,18 +290,31 @@ def show_main_app(df_prioritized):
     
     st.title("✨ AI Feedback Prioritization Dashboard")
     st.caption("🔍 Analyzing and ranking customer feedback in real-time.")
+    if data_as_of is not None:
+        st.caption(f"🕒 Data as of {data_as_of:%Y-%m-%d %H:%M:%S}")
+    if background_queue:
+        st.caption(f"⏳ {background_queue:,} new items are being prioritized in the background. Rerun to refresh.")
 
     # Admin Tab Logic
     is_admin = st.session_state['username'] == "admin"
     
     if is_admin:
-        tab_dashboard, tab_admin = st.tabs(["📊 Dashboard View", "⚙️ Admin Tools (Data Reset)"])
+        tab_dashboard, tab_admin, tab_performance = st.tabs(
+            ["📊 Dashboard View", "⚙️ Admin Tools (Data Reset)", "⏱️ Performance"]
+        )
     else:
         tab_dashboard = st.container() 
-        tab_admin = None
+        tab_admin = tab_performance = None
+
+    rules = get_rules()
+    critical_label = rules.priorities[0]['label']
+    high_label = rules.priorities[1]['label'] if len(rules.priorities) > 1 else critical_label
+
+    conn = feedback_queries.connect(DB_FILE_NAME)
 
     # Error handling for data load failure
-    if df_prioritized.empty:
+    if not feedback_queries.has_processed_feedback(conn):
+        conn.close()
         st.error("❌ Error loading data or the database is empty. Please run 'python feedback_collector.py'.")
         return
 
@@ -200,17 +324,19 @@ def show_main_app(df_prioritized):
         st.sidebar.header("⚙️ Filter Options")
         
         # Priority Multiselect with Emojis
+        priority_options = list(rules.priority_order)
         priority_filter = st.sidebar.multiselect(
             "🚨 Priority Level",
-            options=df_prioritized['Priority'].unique(),
-            default=['P1: Critical Issue 🚨', 'P2: High Priority'] 
+            options=priority_options,
+            default=rules.default_priorities 
         )
 
         # Category Multiselect
+        category_options = rules.category_names + [rules.default_category]
         category_filter = st.sidebar.multiselect(
             "🏷️ Feedback Category",
-            options=df_prioritized['Category'].unique(),
-            default=df_prioritized['Category'].unique()
+            options=category_options,
+            default=category_options
         )
         
         # Confidence Score Slider
@@ -222,30 +348,53 @@ def show_main_app(df_prioritized):
             step=0.05,
             format="%.2f"
         )
+        # Date range (inclusive days); the full range means no date filter at all
+        first_day, last_day = feedback_queries.date_bounds(conn)
+        start_date = end_date = None
+        if first_day is not None:
+            date_range = st.sidebar.date_input(
+                "📅 Date Range",
+                value=(first_day, last_day),
+                min_value=first_day,
+                max_value=last_day,
+                help="Feedback older than the retention window is in the archive (Admin Tools)."
+            )
+            if len(date_range) == 2 and tuple(date_range) != (first_day, last_day):
+                start_date, end_date = date_range[0].isoformat(), date_range[1].isoformat()
+            elif len(date_range) == 1:
+                start_date = date_range[0].isoformat()
+
+        group_duplicates = st.sidebar.toggle(
+            "🧩 Group near-duplicates",
+            value=True,
+            help="Show one row per cluster of (near-)identical feedback, with its size and highest priority."
+        )
         st.sidebar.markdown("---")
 
 
-        # --- APPLY FILTERS ---
-        df_filtered = df_prioritized[
-            (df_prioritized['Priority'].isin(priority_filter)) &
-            (df_prioritized['Category'].isin(category_filter)) &
-            (df_prioritized['Confidence_Score'] >= min_confidence)
-        ]
+        # --- APPLY FILTERS (pushed down to SQLite for KPIs and the table) ---
+        filters = feedback_queries.FeedbackFilters(
+            tuple(priority_filter), tuple(category_filter), min_confidence, start_date, end_date
+        )
+        with span('dashboard.aggregates') as stage:
+            aggregates = load_dashboard_aggregates(filters, data_version, date.today())
+            stage.rows = aggregates.filtered
         
        # --- ROW 1: METRICS (Using st.container for grouping) ---
         st.header("📊 Key Performance Indicators (KPIs)")
         
         metric_container = st.container(border=True)
         with metric_container:
-            total_feedback = len(df_prioritized)
+            recent_feedback = aggregates.recent
+            filtered_count = aggregates.filtered
             
-            p1_count = df_filtered[df_filtered['Priority'] == 'P1: Critical Issue 🚨'].shape[0]
-            p2_count = df_filtered[df_filtered['Priority'] == 'P2: High Priority'].shape[0]
+            p1_count = aggregates.critical
+            p2_count = aggregates.high
             
             col1, col2, col3, col4 = st.columns(4)
             
-            col1.metric(label="Total Feedback (Last 7 Days)", value=total_feedback)
-            col2.metric(label=f"Filtered Items", value=len(df_filtered), delta=f"{len(df_filtered)} items visible", delta_color="off")
+            col1.metric(label="Total Feedback (Last 7 Days)", value=recent_feedback)
+            col2.metric(label=f"Filtered Items", value=filtered_count, delta=f"{filtered_count} items visible", delta_color="off")
             col3.metric(label=f"🚨 Critical Issues (P1)", value=p1_count, delta="High Risk", delta_color="inverse")
             col4.metric(label=f"🔥 High Priority (P2)", value=p2_count, delta="Needs Review")
 
@@ -254,90 +403,239 @@ def show_main_app(df_prioritized):
         # --- ROW 2: CHARTS ---
         st.header("📈 Data Visualization")
         
-        # 1. Pie Chart
-        priority_counts = df_filtered['Priority'].value_counts().reset_index()
-        priority_counts.columns = ['Priority', 'Count']
-        
-        fig_priority = px.pie(
-            priority_counts, 
-            values='Count', 
-            names='Priority', 
-            title='**Priority Distribution (Filtered)**',
-            color='Priority',
-            color_discrete_map={
-                'P1: Critical Issue 🚨': 'red', 'P2: High Priority': 'orange', 'P3: Top Positive 👍': 'green', 'P4: Review Later': 'blue'
-            }
-        )
+        with span('dashboard.charts'):
+            # 1. Pie Chart
+            priority_counts = aggregates.by_priority
+            
+            fig_priority = px.pie(
+                priority_counts, 
+                values='Count', 
+                names='Priority', 
+                title='**Priority Distribution (Filtered)**',
+                color='Priority',
+                color_discrete_map=rules.priority_colors
+            )
 
-        # 2. Bar Chart 
-        category_priority_counts = df_filtered.groupby(['Category', 'Priority']).size().reset_index(name='Count')
-        
-        fig_category = px.bar(
-            category_priority_counts, x='Category', y='Count', color='Priority', 
-            title='**Category Breakdown by Priority (Filtered)**',
-            color_discrete_map={
-                'P1: Critical Issue 🚨': 'red', 'P2: High Priority': 'orange', 'P3: Top Positive 👍': 'green', 'P4: Review Later': 'blue'
+            # 2. Bar Chart 
+            category_priority_counts = aggregates.by_category_priority
+            
+            fig_category = px.bar(
+                category_priority_counts, x='Category', y='Count', color='Priority', 
+                title='**Category Breakdown by Priority (Filtered)**',
+                color_discrete_map=rules.priority_colors
+            )
+
+            fig_category.update_layout(barmode='stack', xaxis_title="Feedback Category")
+            
+            # Plotly deprecation warning fix
+            PLOTLY_CONFIG = {
+                'displayModeBar': False, 
+                'responsive': True       
             }
-        )
 
-        fig_category.update_layout(barmode='stack', xaxis_title="Feedback Category")
-        
-        # Plotly deprecation warning fix
-        PLOTLY_CONFIG = {
-            'displayModeBar': False, 
-            'responsive': True       
-        }
-
-        # Use width='stretch' (Streamlit fix) aur config=PLOTLY_CONFIG (Plotly fix)
-        chart_col1, chart_col2 = st.columns(2)
-        with chart_col1:
-            st.plotly_chart(fig_priority, width='stretch', config=PLOTLY_CONFIG)
-        with chart_col2:
-            st.plotly_chart(fig_category, width='stretch', config=PLOTLY_CONFIG)
+            # Use width='stretch' (Streamlit fix) aur config=PLOTLY_CONFIG (Plotly fix)
+            chart_col1, chart_col2 = st.columns(2)
+            with chart_col1:
+                st.plotly_chart(fig_priority, width='stretch', config=PLOTLY_CONFIG)
+            with chart_col2:
+                st.plotly_chart(fig_category, width='stretch', config=PLOTLY_CONFIG)
 
         st.markdown("---")
 
         # --- ROW 3: FILTERED DATA TABLE & DOWNLOAD BUTTON ---
-        st.header(f"📋 Prioritized Feedback Table ({len(df_filtered)} Items)")
+        st.header(f"📋 Prioritized Feedback Table ({filtered_count} Items)")
         st.caption("This table reflects your current filter selections in the sidebar.")
+
+        # Full-text search over original + translated text, within the sidebar filters
+        search_query = ""
+        if feedback_queries.search_available(conn):
+            search_query = st.text_input(
+                "🔎 Search feedback",
+                placeholder='e.g. payment failed, refund*, "login page"',
+                help='All words must match (any language, accents ignored). Use "quotes" for a phrase and * for a prefix.'
+            ).strip()
         
-        if not df_filtered.empty:
+        if filtered_count > 0:
             
-            # Priority Rank for correct sorting
-            if 'Priority_Rank' not in df_filtered.columns:
-                df_filtered['Priority_Rank'] = df_filtered['Priority'].map(PRIORITY_ORDER)
-                
-            df_display = df_filtered.sort_values(by='Priority_Rank', ascending=True)
+            # The export is only generated when the button is clicked (streamed from SQLite,
+            # cached on disk per filter set + data version)
+            export_labels = {'csv': 'CSV', 'csv.gz': 'CSV (gzip)', 'parquet': 'Parquet'}
+            export_format = st.selectbox(
+                "Export format",
+                options=list(feedback_export.EXPORT_FORMATS),
+                format_func=lambda fmt: export_labels.get(fmt, fmt),
+            )
+            extension, mime = feedback_export.EXPORT_FORMATS[export_format]
+
+            def build_export():
+                with span('dashboard.export', format=export_format):
+                    path = feedback_export.get_export(filters, rules.priority_order, data_version, export_format, DB_FILE_NAME)
+                # Only built on click. st.download_button keeps the whole payload in memory either way
+                # (a file object is read in full), so read it here and close the file
+                with open(path, 'rb') as f:
+                    return f.read()
 
-            csv = df_display.to_csv(index=False).encode('utf-8')
-            
             st.download_button(
-                label="📥 Download Filtered Data as CSV",
-                data=csv,
-                file_name='Prioritized_Feedback_Agent_Output.csv',
-                mime='text/csv',
+                label="📥 Download Filtered Data",
+                data=build_export,
+                file_name=f'Prioritized_Feedback_Agent_Output.{extension}',
+                mime=mime,
                 help='Click to download the currently filtered table data.'
             )
             
-            # Table display. Note: 'Original_Text' contains regional language entries.
-            st.dataframe(
-                df_display[['Date/Time', 'Priority', 'Category', 'Confidence_Score', 'Text', 'Original_Text', 'User_ID']], 
-                width='stretch'
-            )
+            # Only the current page is fetched (keyset pagination on rank, confidence, id;
+            # offsets for the grouped view)
+            _reset_table_pages((filters, group_duplicates, search_query))
+            page_cursors = st.session_state['table_page_cursors']
+            page_size = feedback_queries.DEFAULT_PAGE_SIZE
+            more_rows = False
+
+            with span('dashboard.table', grouped=int(group_duplicates), search=int(bool(search_query))) as stage:
+                if search_query:
+                    # Search results are individual rows, most relevant first (offset pagination)
+                    df_page, next_cursor = feedback_queries.search_page(
+                        conn, search_query, filters, rules.priority_order, after=page_cursors[-1], page_size=page_size
+                    )
+                    row_count = feedback_queries.count_search_matches(conn, search_query, filters, rules.priority_order)
+                    more_rows = row_count >= feedback_queries.SEARCH_COUNT_LIMIT
+                    st.caption(
+                        f"🔎 {row_count:,}{'+' if more_rows else ''} matches for \"{search_query}\", most relevant first. "
+                        f"Matched words are marked {feedback_queries.HIGHLIGHT_OPEN}like this{feedback_queries.HIGHLIGHT_CLOSE}."
+                    )
+                    if df_page.empty:
+                        st.info("No feedback matches this search with the current filters.")
+                    else:
+                        st.dataframe(
+                            df_page[['Date/Time', 'Priority', 'Category', 'Confidence_Score', 'Text', 'Original_Text', 'User_ID']],
+                            width='stretch'
+                        )
+                elif group_duplicates:
+                    df_page, next_cursor, cluster_count = load_cluster_page(filters, data_version, page_cursors[-1])
+                    st.caption(f"🧩 {filtered_count:,} items grouped into {cluster_count:,} distinct issues.")
+                    # Text is the English wording; Original_Text is the cluster's representative feedback
+                    st.dataframe(
+                        df_page[['Priority', 'Count', 'Users', 'Category', 'Max_Confidence', 'Text', 'Original_Text', 'Last_Seen']],
+                        width='stretch'
+                    )
+                    row_count = cluster_count
+                else:
+                    df_page, next_cursor = feedback_queries.fetch_page(
+                        conn, filters, rules.priority_order, after=page_cursors[-1], page_size=page_size
+                    )
+
+                    # Table display. Note: 'Original_Text' contains regional language entries.
+                    st.dataframe(
+                        df_page[['Date/Time', 'Priority', 'Category', 'Confidence_Score', 'Text', 'Original_Text', 'User_ID']], 
+                        width='stretch'
+                    )
+                    row_count = filtered_count
+                stage.rows = len(df_page)
+
+            page_number = len(page_cursors)
+            page_count = max(1, -(-row_count // page_size))
+            nav_prev, nav_info, nav_next = st.columns([1, 2, 1])
+            nav_prev.button("⬅️ Previous", on_click=_previous_table_page, disabled=page_number == 1, use_container_width=True)
+            nav_info.caption(f"Page {page_number} of {page_count}{'+' if more_rows else ''}")
+            nav_next.button("Next ➡️", on_click=_next_table_page, args=(next_cursor,), disabled=next_cursor is None, use_container_width=True)
 
         else:
             st.info("No data available based on current filters.")
 
+        conn.close()
+
     # --- ADMIN Tools Tab ---
     if tab_admin:
         with tab_admin:
+            show_retention_tools()
+            st.markdown("---")
+
             st.header("⚠️ Permanent Data Reset Tool")
-            st.warning("🚨 **WARNING:** Clicking this button will PERMANENTLY delete the entire **Feedback Table** from the SQLite database. Use this for weekly resets.")
+            st.warning("🚨 **WARNING:** Clicking this button will PERMANENTLY delete the entire **Feedback Table** from the SQLite database. To drop old feedback, use **📦 Archive & Drop Expired Weeks** above instead: it keeps an archive.")
             
             if st.button("🗑️ Reset Feedback Data (Clear Database)", type="primary"):
                 clear_database() 
                 st.info("🔄 Please **RERUN** the app (Ctrl+R/Cmd+R) to load the empty dataset.")
 
+    # --- PERFORMANCE Tab (admin only) ---
+    if tab_performance:
+        with tab_performance:
+            show_performance_tab()
+
+
+def show_retention_tools():
+    """Rolling retention: archive weeks beyond the window to Parquet and drop them from the live table."""
+    import feedback_retention
+
+    st.header("🗄️ Retention & Archive")
+    st.caption(
+        "The live table keeps the newest weekly partitions; older weeks are compacted into one "
+        "Parquet file each and removed in small batches, so the dashboard keeps reading meanwhile."
+    )
+    retention_weeks = st.number_input(
+        "Weeks to keep (current week included)", min_value=1, max_value=520,
+        value=feedback_retention.DEFAULT_RETENTION_WEEKS, step=1
+    )
+    conn = feedback_retention.connect(DB_FILE_NAME)
+    try:
+        cutoff = feedback_retention.retention_cutoff(retention_weeks)
+        expired = feedback_retention.expired_weeks(conn, cutoff)
+        st.write(f"Keeping feedback from **{cutoff:%Y-%m-%d}** on; {len(expired)} older week(s) to archive.")
+        if not feedback_retention.ARCHIVE_AVAILABLE:
+            st.warning("⚠️ pyarrow is not installed, so expired weeks can't be archived (and are kept).")
+        elif st.button("📦 Archive & Drop Expired Weeks", disabled=not expired):
+            with st.spinner("Archiving expired weeks..."):
+                results = feedback_retention.apply_retention(conn, retention_weeks)
+            refresh_prioritized_feedback.clear()
+            load_dashboard_aggregates.clear()
+            load_cluster_page.clear()
+            st.success(f"✅ Archived {sum(archived for _, archived, _ in results):,} rows from {len(results)} week(s).")
+    finally:
+        conn.close()
+
+    archive = feedback_retention.list_archive()
+    if archive.empty:
+        st.info("ℹ️ No archived weeks yet.")
+    else:
+        st.dataframe(archive[['Week', 'Rows', 'Size_MB']], width='stretch', hide_index=True)
+
+
+def show_performance_tab():
+    """Per-stage timings recorded by perf_metrics (agent runs, worker batches and dashboard renders)."""
+    import plotly.express as px
+
+    st.header("⏱️ Pipeline & Dashboard Performance")
+    if not perf_metrics.ENABLED:
+        st.info("ℹ️ Instrumentation is disabled (FEEDBACK_METRICS=0); showing previously recorded metrics.")
+
+    conn = sqlite3.connect(DB_FILE_NAME)
+    try:
+        # Renders only flush periodically; show this session's latest spans too
+        perf_metrics.flush(conn)
+        metrics = perf_metrics.read_metrics(conn)
+    finally:
+        conn.close()
+    if metrics.empty:
+        st.info("No metrics recorded yet.")
+        return
+
+    st.caption(
+        f"Last {len(metrics):,} spans (rolling window of {perf_metrics.MAX_METRIC_ROWS:,}). "
+        f"Structured log: {perf_metrics.LOG_FILE}"
+    )
+    summary = perf_metrics.summarize_stages(metrics)
+    st.subheader("Per-stage timings")
+    st.dataframe(summary, width='stretch')
+
+    fig_stages = px.bar(
+        summary.reset_index(), x='stage', y=['p50_ms', 'p95_ms'], barmode='group',
+        title='**Wall time per stage (ms)**'
+    )
+    st.plotly_chart(fig_stages, width='stretch', config={'displayModeBar': False, 'responsive': True})
+
+    st.subheader("Recent runs")
+    runs = metrics[metrics['parent'].isna()]
+    st.dataframe(runs[['recorded_at', 'stage', 'seconds', 'rows', 'run_id']].head(50), width='stretch')
+
 
 # --- 5. MAIN APP FLOW ---
 def main():
@@ -345,8 +643,18 @@ def main():
     if not st.session_state['authenticated']:
         show_login_page()
     else:
-        df_prioritized = run_prioritization_agent()
-        show_main_app(df_prioritized)
+        with span('dashboard.render'):
+            if worker_running():
+                # The background worker owns processing; only read what it has stored so far
+                data_version = get_data_version()
+                show_main_app(data_version, datetime.now(), background_queue=data_version.pending)
+            else:
+                with span('dashboard.refresh'):
+                    data_as_of = refresh_prioritized_feedback(get_data_version())
+                # Re-read after processing so aggregates are keyed to what is now in the table
+                show_main_app(get_data_version(), data_as_of)
+        # Throttled: a render shouldn't cost a write transaction on feedback_data.db
+        perf_metrics.flush_if_due(db_file=DB_FILE_NAME)
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -0,0 +1,1097 @@
+"""
+Reproducible benchmark suite for the agent pipeline (no network needed).
+
+Generates synthetic feedback DBs (configurable size, language mix and duplicate ratio),
+runs every stage on them (load, cluster, translate through a local stub translator,
+clean, categorize, prioritize, store, sort, aggregate, table page, search, export) and reports
+per-stage throughput, p50/p95 latency and peak RSS as JSON. Stage timings come from the
+perf_metrics spans the pipeline already records. Each size runs in a fresh interpreter,
+so memory figures don't carry over between sizes.
+
+Usage: python benchmark_suite.py --sizes 1K,100K --output bench.json
+       python benchmark_suite.py --sizes 1K,100K --save-baseline            # store benchmark_baseline.json
+       python benchmark_suite.py --sizes 1K,100K --baseline benchmark_baseline.json   # exit 1 on regression
+
+Timings depend on the machine, so no baseline is committed: save one with --save-baseline
+on the machine (or CI runner) that will do the comparing, e.g. from the main branch before
+a change. Comparing against a baseline from another platform or CPU count prints a warning.
+       python benchmark_suite.py --sizes 1M --language-mix en=0.5,hi=0.3,es=0.2 --duplicate-ratio 0.6
+       python benchmark_suite.py generate --rows 1M --data-dir bench_data   # only write the synthetic DB
+
+Single-stage micro-benchmarks run on the same synthetic data (--rows, default 1M):
+       python benchmark_suite.py categorize --rows 1M
+       python benchmark_suite.py memory --rows 1M
+       python benchmark_suite.py ingest --rows 1M --batch-size 5000
+       python benchmark_suite.py agent --rows 1M --chunk-size 20000
+       python benchmark_suite.py sentiment --rows 10K --backend int8
+       python benchmark_suite.py export --rows 1M
+       python benchmark_suite.py backfill --rows 10M --workers 8
+       python benchmark_suite.py startup --repeats 5 --max-ms 1500
+       python benchmark_suite.py instrumentation --rows 200K --repeats 3
+       python benchmark_suite.py ingest-service --requests 50000 --concurrency 64
+"""
+import argparse
+import hashlib
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from feedback_collector import SAMPLE_TEXTS, DEFAULT_BATCH_SIZE, FeedbackIngestor, simulate_sentiment
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# --- CONSTANTS ---
+SIZE_PRESETS = {'1K': 1_000, '100K': 100_000, '1M': 1_000_000, '10M': 10_000_000}
+DEFAULT_SIZES = '1K,100K'
+DEFAULT_LANGUAGE_MIX = 'en=0.7,hi=0.15,es=0.1,ta=0.05'
+DEFAULT_DUPLICATE_RATIO = 0.5
+MICRO_DEFAULT_ROWS = '1M'
+DEFAULT_SEED = 42
+DEFAULT_CHUNK_SIZE = 20000
+# Runs per size; each stage keeps its fastest run (single runs differ by more than the tolerance)
+DEFAULT_REPEATS = 3
+BASELINE_FILE = 'benchmark_baseline.json'
+# Allowed slowdown / memory growth against the baseline before a stage counts as a regression
+DEFAULT_TOLERANCE = 0.25
+DEFAULT_MEMORY_TOLERANCE = 0.25
+# Timings shorter than this in the baseline are mostly timer/scheduler noise and aren't compared
+MIN_COMPARED_MS = 50.0
+GENERATED_DAYS = 30
+RSS_SAMPLE_SECONDS = 0.005
+
+# Regional phrasings of SAMPLE_TEXTS entries: language -> [(text, index into SAMPLE_TEXTS)]
+REGIONAL_TEXTS = {
+    'hi': [
+        ('लॉगिन पेज हर बार क्रैश हो रहा है। यह एक गंभीर समस्या है!', 0),
+        ('ग्राहक सहायता ने जवाब देने में 5 दिन लगाए, बहुत खराब सेवा।', 2),
+        ('पेमेंट गेटवे कई बार फेल हुआ, जिससे बिक्री का नुकसान हुआ।', 4),
+        ('रिफंड की प्रक्रिया बहुत जटिल है और हफ्तों लगते हैं।', 7),
+        ('नए अपडेट बहुत पसंद आए, बहुत संतुष्ट हूँ!', 10),
+    ],
+    'es': [
+        ('La aplicación es inutilizable después de la última actualización.', 1),
+        ('Mi pedido llegó dañado. La calidad del producto es muy mala.', 3),
+        ('La navegación del sitio web es confusa y lenta.', 5),
+        ('¡La interfaz de usuario es fantástica! Muy intuitiva y rápida.', 11),
+        ('Todo estuvo bien, experiencia promedio.', 15),
+    ],
+    'ta': [
+        ('உள்நுழைவு பக்கம் ஒவ்வொரு முறையும் செயலிழக்கிறது.', 0),
+        ('தவறான பொருள் வந்தது, ஷிப்பிங்கில் மிகவும் ஏமாற்றம்.', 8),
+        ('டாஷ்போர்டின் மொபைல் காட்சி உடைந்துள்ளது.', 9),
+        ('வாடிக்கையாளர் சேவை சில நிமிடங்களில் பிரச்சினையை தீர்த்தது.', 12),
+    ],
+}
+LANGUAGES = ['en'] + sorted(REGIONAL_TEXTS)
+# Search box queries: a common word, a phrase, a prefix, an accent-folded Spanish word and a Hindi one
+SEARCH_QUERIES = ['payment', '"login page"', 'refund*', 'aplicacion', 'पेमेंट']
+# Unique feedback = a base phrase plus a detail made of random words, different enough
+# from other details that it doesn't land in the same near-duplicate cluster
+DETAIL_SEPARATOR = ' | '
+DETAIL_WORDS = """
+android iphone tablet laptop browser chrome safari firefox monday tuesday wednesday thursday friday
+weekend morning evening night invoice receipt coupon voucher wallet card upi netbanking courier
+warehouse pincode address profile password otp email sms notification banner popup cart wishlist
+size colour color fabric battery screen camera speaker charger cable warranty exchange return
+delivery tracking agent chat callback ticket escalation manager premium basic trial subscription
+""".split()
+DETAIL_WORD_COUNT = 6
+
+Detection = namedtuple('Detection', ['lang', 'confidence'])
+Translation = namedtuple('Translation', ['text'])
+
+
+# --- SYNTHETIC DATA ---
+
+def parse_size(value):
+    """'1K' / '100K' / '1M' / '10M' (or a plain number) -> row count."""
+    value = value.strip().upper()
+    if value in SIZE_PRESETS:
+        return SIZE_PRESETS[value]
+    multiplier = {'K': 1_000, 'M': 1_000_000}.get(value[-1:], 1)
+    return int(float(value.rstrip('KM')) * multiplier)
+
+
+def size_label(rows):
+    for label, count in SIZE_PRESETS.items():
+        if count == rows:
+            return label
+    return str(rows)
+
+
+def parse_language_mix(value):
+    """'en=0.7,hi=0.2,es=0.1' -> {language: share}, normalized to sum to 1."""
+    mix = {}
+    for part in value.split(','):
+        language, _, share = part.partition('=')
+        language = language.strip()
+        if language not in LANGUAGES:
+            raise ValueError(f"Unknown language '{language}' (expected one of {', '.join(LANGUAGES)})")
+        mix[language] = float(share)
+    total = sum(mix.values())
+    if total <= 0:
+        raise ValueError("Language mix shares must add up to more than 0")
+    return {language: share / total for language, share in mix.items()}
+
+
+def _vary(text, rng):
+    """Near-duplicate of a text: the detail's case/punctuation changes, the base phrase doesn't."""
+    phrase, separator, detail = text.partition(DETAIL_SEPARATOR)
+    variant = rng.choice((detail.upper(), detail.capitalize(), detail + '!!', detail + '...', detail.replace(' ', '  ')))
+    return phrase + separator + variant
+
+
+def iter_synthetic_feedback(count, language_mix, duplicate_ratio, rng, end_time=None, users=None):
+    """
+    Yields feedback records: `duplicate_ratio` of them repeat (exactly, or as a near-duplicate
+    variant) an earlier text, the rest are new texts in a language drawn from `language_mix`.
+    Timestamps spread over the GENERATED_DAYS before end_time.
+    """
+    end_time = end_time or datetime(2026, 1, 1)
+    users = users or max(100, count // 20)
+    languages = list(language_mix)
+    weights = [language_mix[language] for language in languages]
+    recent = []  # reservoir of earlier texts that duplicates are drawn from
+    for serial in range(count):
+        if recent and rng.random() < duplicate_ratio:
+            text, english = rng.choice(recent)
+            if rng.random() < 0.5:
+                text = _vary(text, rng)
+        else:
+            language = rng.choices(languages, weights)[0]
+            if language == 'en':
+                phrase = english = rng.choice(SAMPLE_TEXTS)
+            else:
+                phrase, index = rng.choice(REGIONAL_TEXTS[language])
+                english = SAMPLE_TEXTS[index]
+            detail = ' '.join(rng.sample(DETAIL_WORDS, DETAIL_WORD_COUNT)) + f' #{serial}'
+            text = phrase + DETAIL_SEPARATOR + detail
+            if len(recent) < 10000:
+                recent.append((text, english))
+            else:
+                recent[rng.randrange(len(recent))] = (text, english)
+
+        sentiment, confidence = simulate_sentiment(english, rng)
+        yield {
+            'Date/Time': end_time - timedelta(seconds=rng.uniform(0, GENERATED_DAYS * 86400)),
+            'Text': text,
+            'Sentiment': sentiment,
+            'Confidence_Score': confidence,
+            'User_ID': 1001 + rng.randint(1, users),
+        }
+
+
+def generate_db(db_file, rows, language_mix, duplicate_ratio, seed=DEFAULT_SEED, batch_size=DEFAULT_BATCH_SIZE):
+    """Writes a fresh synthetic feedback DB; returns the ingest time in seconds."""
+    if os.path.exists(db_file):
+        os.remove(db_file)
+    start = time.perf_counter()
+    with FeedbackIngestor(db_file, batch_size=batch_size) as ingestor:
+        ingestor.ingest(iter_synthetic_feedback(rows, language_mix, duplicate_ratio, random.Random(seed)))
+    return time.perf_counter() - start
+
+
+def synthetic_db(data_dir, rows, language_mix, duplicate_ratio, seed=DEFAULT_SEED):
+    """Path of the (cached) synthetic DB for these parameters, generating it on first use."""
+    key = hashlib.sha256(repr((rows, sorted(language_mix.items()), duplicate_ratio, seed)).encode('utf-8')).hexdigest()[:12]
+    path = os.path.join(data_dir, f"synthetic_{size_label(rows)}_{key}.db")
+    if not os.path.exists(path):
+        os.makedirs(data_dir, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        seconds = generate_db(tmp_path, rows, language_mix, duplicate_ratio, seed)
+        os.replace(tmp_path, path)
+        print(f"Generated {rows:,} rows in {seconds:.1f}s -> {path}")
+    return path
+
+
+class StubTranslator:
+    """
+    Offline stand-in for googletrans: detects and translates by looking the base phrase up
+    in REGIONAL_TEXTS, so the translate stage runs without network. latency_ms adds a fixed
+    delay per call to mimic a remote service.
+    """
+
+    def __init__(self, latency_ms=0.0):
+        self.latency = latency_ms / 1000
+        self._phrases = {
+            phrase: (language, SAMPLE_TEXTS[index])
+            for language, entries in REGIONAL_TEXTS.items() for phrase, index in entries
+        }
+
+    def _lookup(self, text):
+        phrase, separator, detail = str(text).partition(DETAIL_SEPARATOR)
+        return self._phrases.get(phrase), separator + detail
+
+    def detect(self, texts):
+        if self.latency:
+            time.sleep(self.latency)
+        detections = []
+        for text in texts:
+            found, _ = self._lookup(text)
+            detections.append(Detection(found[0] if found else 'en', 0.99))
+        return detections
+
+    def translate(self, texts, dest='en'):
+        if self.latency:
+            time.sleep(self.latency)
+        results = []
+        for text in texts:
+            found, rest = self._lookup(text)
+            results.append(Translation(found[1] + rest if found else text))
+        return results
+
+
+def use_stub_translation(agent_logic, db_file, latency_ms=0.0):
+    """
+    Points the agent's translation stage at the stub, with its cache in db_file (starting
+    empty) so stub translations never reach the project's cache. Returns the cache to close.
+    """
+    from translation_cache import TranslationCache
+
+    cache = TranslationCache(db_file)
+    agent_logic.translation_cache = agent_logic.translation_engine.cache = cache
+    agent_logic.translation_engine.translator = StubTranslator(latency_ms)
+    agent_logic.translation_engine.reset_stats()
+    return cache
+
+
+# --- MEASUREMENT ---
+
+def current_rss_mb():
+    """Current resident set size in MB (Linux /proc; None elsewhere)."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1024 / 1024
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far in MB (None where unsupported)."""
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class RssSampler:
+    """Samples this process's RSS on a background thread, so each stage's peak can be read off its time window."""
+
+    def __init__(self, interval=RSS_SAMPLE_SECONDS):
+        self.interval = interval
+        self.samples = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='rss-sampler', daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            rss = current_rss_mb()
+            if rss is None:
+                return
+            self.samples.append((time.time(), rss))
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        return False
+
+    def peak_between(self, start, end):
+        """Highest sampled RSS in [start, end], or the last sample before it for very short windows."""
+        inside = [rss for at, rss in self.samples if start <= at <= end]
+        if inside:
+            return max(inside)
+        before = [rss for at, rss in self.samples if at <= end]
+        return before[-1] if before else None
+
+
+def _percentile(values, share):
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    position = min(len(ordered) - 1, max(0, int(round(share * (len(ordered) - 1)))))
+    return ordered[position]
+
+
+# Report stage -> perf_metrics span recording it
+STAGE_SPANS = {
+    'load': 'agent.read',
+    'cluster': 'agent.cluster',
+    'translate': 'agent.translate',
+    'sentiment': 'agent.sentiment',
+    'clean': 'agent.clean',
+    'categorize': 'agent.categorize',
+    'prioritize': 'agent.prioritize',
+    'store': 'agent.store',
+    'load_results': 'agent.load_results',
+    'sort': 'bench.sort',
+    'aggregate': 'bench.aggregate',
+    'aggregate_direct': 'bench.aggregate_direct',
+    'table_page': 'bench.table_page',
+    'search': 'bench.search',
+    'export_csv': 'bench.export_csv',
+    'export_parquet': 'bench.export_parquet',
+}
+
+
+def summarize_spans(records, sampler):
+    """Per-stage calls, rows, total seconds, rows/sec, p50/p95 latency and peak RSS from span records."""
+    stages = {}
+    for stage, span_name in STAGE_SPANS.items():
+        spans = [record for record in records if record['stage'] == span_name]
+        if not spans:
+            continue
+        seconds = [record['seconds'] for record in spans]
+        rows = sum(record['rows'] or 0 for record in spans)
+        total = sum(seconds)
+        peaks = [
+            sampler.peak_between(record['recorded_at'] - record['seconds'], record['recorded_at'])
+            for record in spans
+        ]
+        peaks = [peak for peak in peaks if peak is not None]
+        stats = {
+            'calls': len(spans),
+            'rows': rows,
+            'seconds': round(total, 4),
+            'rows_per_sec': round(rows / total, 1) if total > 0 and rows else None,
+            'p50_ms': round(_percentile(seconds, 0.50) * 1000, 3),
+            'p95_ms': round(_percentile(seconds, 0.95) * 1000, 3),
+            'peak_rss_mb': round(max(peaks), 1) if peaks else None,
+        }
+        details = [record['details'] for record in spans]
+        for counter in ('translator_calls', 'cache_hits', 'cache_lookups', 'clusters'):
+            values = [detail[counter] for detail in details if counter in detail]
+            if values:
+                stats[counter] = sum(values)
+        stages[stage] = stats
+    return stages
+
+
+# --- ONE SIZE ---
+
+def _filter_sets(rules):
+    from feedback_queries import FeedbackFilters
+
+    categories = rules.category_names + [rules.default_category]
+    filter_sets = [
+        FeedbackFilters(None, None, None),
+        FeedbackFilters(tuple(rules.default_priorities), tuple(categories), 0.5),
+    ]
+    filter_sets += [FeedbackFilters(None, (category,), None) for category in categories]
+    filter_sets += [FeedbackFilters((label,), None, 0.8) for label in rules.priority_order]
+    return filter_sets
+
+
+def run_size(db_file, chunk_size=DEFAULT_CHUNK_SIZE, translator_latency_ms=0.0):
+    """Runs every stage on a copy of a synthetic DB in this process; returns the stage report."""
+    import agent_logic
+    import feedback_aggregates
+    import feedback_export
+    import feedback_queries
+    import perf_metrics
+    from perf_metrics import span
+
+    perf_metrics.set_enabled(True)
+    perf_metrics.MAX_METRIC_ROWS = sys.maxsize  # keep every span of the run
+    cache = use_stub_translation(agent_logic, db_file, translator_latency_ms)
+    rules = agent_logic.get_rules()
+    critical_label = rules.priorities[0]['label']
+    high_label = rules.priorities[1]['label'] if len(rules.priorities) > 1 else critical_label
+
+    perf_metrics.reset()
+    with RssSampler() as sampler:
+        conn = feedback_queries.connect(db_file)
+        try:
+            rows = conn.execute(f"SELECT COUNT(*) FROM {agent_logic.TABLE_NAME}").fetchone()[0]
+            start = time.perf_counter()
+            # load -> cluster -> translate -> ... -> store, as the agent runs it (flushes its spans)
+            processed = agent_logic._process_new_rows(conn, chunk_size)
+            pipeline_seconds = time.perf_counter() - start
+
+            df = agent_logic._load_stored_results(conn)
+            with span('bench.sort', rows=len(df)):
+                df = agent_logic.finalize_output(df)
+            del df
+
+            filter_sets = _filter_sets(rules)
+            for filters in filter_sets:
+                with span('bench.aggregate') as stage:
+                    aggregates = feedback_aggregates.fetch_dashboard_aggregates(conn, filters, critical_label, high_label)
+                    stage.rows = aggregates.filtered
+                with span('bench.aggregate_direct') as stage:
+                    aggregates = feedback_aggregates.fetch_dashboard_aggregates(
+                        conn, filters, critical_label, high_label, use_rollup=False
+                    )
+                    stage.rows = aggregates.filtered
+                with span('bench.table_page') as stage:
+                    page, _ = feedback_queries.fetch_page(conn, filters, rules.priority_order)
+                    stage.rows = len(page)
+                if feedback_queries.search_available(conn):
+                    for query in SEARCH_QUERIES:
+                        with span('bench.search') as stage:
+                            page, _ = feedback_queries.search_page(conn, query, filters, rules.priority_order)
+                            stage.rows = len(page)
+
+            export_dir = tempfile.mkdtemp(prefix='bench_export_')
+            try:
+                everything = feedback_queries.FeedbackFilters(None, None, None)
+                for fmt in ('csv', 'parquet'):
+                    if fmt not in feedback_export.EXPORT_FORMATS:
+                        continue
+                    path = os.path.join(export_dir, f'export.{fmt}')
+                    with span(f'bench.export_{fmt}', rows=rows):
+                        feedback_export.write_export(
+                            feedback_export.iter_export_frames(conn, everything, rules.priority_order), path, fmt
+                        )
+            finally:
+                shutil.rmtree(export_dir, ignore_errors=True)
+
+            perf_metrics.flush(conn)
+            records = [
+                {
+                    'stage': stage, 'seconds': seconds, 'rows': stage_rows,
+                    'recorded_at': recorded_at, 'details': json.loads(details) if details else {},
+                }
+                for stage, seconds, stage_rows, recorded_at, details in conn.execute(
+                    f"SELECT stage, seconds, rows, recorded_at, details FROM {perf_metrics.METRICS_TABLE_NAME} ORDER BY id"
+                )
+            ]
+        finally:
+            conn.close()
+            cache.close()
+
+    return {
+        'rows': rows,
+        'processed': processed,
+        'pipeline_seconds': round(pipeline_seconds, 3),
+        'pipeline_rows_per_sec': round(processed / pipeline_seconds, 1) if pipeline_seconds else None,
+        'peak_rss_mb': round(max(rss for _, rss in sampler.samples), 1) if sampler.samples else None,
+        'stages': summarize_spans(records, sampler),
+    }
+
+
+def _run_size_subprocess(db_file, chunk_size, translator_latency_ms):
+    """Runs run_size() in a fresh interpreter (clean peak-memory numbers); returns its report."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        work_db = os.path.join(tmp_dir, 'bench_feedback.db')
+        shutil.copyfile(db_file, work_db)
+        result_file = os.path.join(tmp_dir, 'result.json')
+        subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '_run-size', work_db, result_file,
+             '--chunk-size', str(chunk_size), '--translator-latency-ms', str(translator_latency_ms)],
+            check=True, cwd=tmp_dir,
+            # Spans go to the report, not the project's metrics log
+            env=dict(os.environ, FEEDBACK_METRICS_LOG=os.path.join(tmp_dir, 'metrics.jsonl'))
+        )
+        with open(result_file, encoding='utf-8') as f:
+            return json.load(f)
+
+
+def best_of(runs):
+    """Merges repeated runs of one size: each stage keeps its fastest run, peak memory the median."""
+    merged = dict(min(runs, key=lambda run: run['pipeline_seconds']))
+    merged['repeats'] = len(runs)
+    stages = {}
+    for stage in merged['stages']:
+        candidates = [run['stages'][stage] for run in runs if stage in run['stages']]
+        fastest = dict(min(candidates, key=lambda stats: stats['seconds']))
+        peaks = [stats['peak_rss_mb'] for stats in candidates if stats['peak_rss_mb'] is not None]
+        fastest['peak_rss_mb'] = statistics.median(peaks) if peaks else None
+        stages[stage] = fastest
+    merged['stages'] = stages
+    peaks = [run['peak_rss_mb'] for run in runs if run['peak_rss_mb'] is not None]
+    merged['peak_rss_mb'] = statistics.median(peaks) if peaks else None
+    return merged
+
+
+# --- BASELINE COMPARISON ---
+
+def compare_to_baseline(report, baseline, tolerance=DEFAULT_TOLERANCE, memory_tolerance=DEFAULT_MEMORY_TOLERANCE):
+    """
+    Returns a list of regression messages: a stage that is more than `tolerance` slower
+    (throughput or p95 latency) or uses more than `memory_tolerance` more peak memory
+    than the same size in the baseline.
+    """
+    regressions = []
+    for size, run in report['runs'].items():
+        base_run = baseline.get('runs', {}).get(size)
+        if base_run is None:
+            print(f"  {size}: not in the baseline, skipped")
+            continue
+        for stage, stats in run['stages'].items():
+            base = base_run['stages'].get(stage)
+            if base is None:
+                continue
+            if base.get('rows_per_sec') and stats.get('rows_per_sec') and base['seconds'] * 1000 >= MIN_COMPARED_MS:
+                change = stats['rows_per_sec'] / base['rows_per_sec'] - 1
+                print(f"  {size:>5} {stage:16} {stats['rows_per_sec']:>14,.0f} rows/sec ({change:+.0%})")
+                if change < -tolerance:
+                    regressions.append(f"{size} {stage}: throughput {change:+.0%} (limit -{tolerance:.0%})")
+            if base['p95_ms'] >= MIN_COMPARED_MS and stats['p95_ms'] > base['p95_ms'] * (1 + tolerance):
+                regressions.append(f"{size} {stage}: p95 {stats['p95_ms']:.1f} ms vs {base['p95_ms']:.1f} ms")
+            if base.get('peak_rss_mb') and stats.get('peak_rss_mb') \
+                    and stats['peak_rss_mb'] > base['peak_rss_mb'] * (1 + memory_tolerance):
+                regressions.append(f"{size} {stage}: peak RSS {stats['peak_rss_mb']:.0f} MB vs {base['peak_rss_mb']:.0f} MB")
+    return regressions
+
+
+def _git_commit():
+    try:
+        result = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)))
+    except OSError:
+        return None
+    return result.stdout.strip() or None
+
+
+def run_suite(sizes, language_mix, duplicate_ratio, seed=DEFAULT_SEED, chunk_size=DEFAULT_CHUNK_SIZE,
+              data_dir=None, translator_latency_ms=0.0, repeats=DEFAULT_REPEATS):
+    """Generates (or reuses) a DB per size and benchmarks each `repeats` times in fresh interpreters; returns the report."""
+    import pandas as pd
+
+    report = {
+        'meta': {
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'commit': _git_commit(),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'language_mix': language_mix,
+            'duplicate_ratio': duplicate_ratio,
+            'seed': seed,
+            'chunk_size': chunk_size,
+            'repeats': repeats,
+            'translator_latency_ms': translator_latency_ms,
+        },
+        'runs': {},
+    }
+    tmp_dir = None
+    if data_dir is None:
+        data_dir = tmp_dir = tempfile.mkdtemp(prefix='bench_data_')
+    try:
+        for rows in sizes:
+            label = size_label(rows)
+            db_file = synthetic_db(data_dir, rows, language_mix, duplicate_ratio, seed)
+            print(f"Benchmarking {label} rows ({repeats} runs)...")
+            run = best_of([_run_size_subprocess(db_file, chunk_size, translator_latency_ms) for _ in range(repeats)])
+            report['runs'][label] = run
+            print(f"  pipeline: {run['pipeline_rows_per_sec'] or 0:,.0f} rows/sec, peak RSS {run['peak_rss_mb']} MB")
+            for stage, stats in run['stages'].items():
+                throughput = f"{stats['rows_per_sec']:>12,.0f} rows/sec" if stats['rows_per_sec'] else ' ' * 21
+                print(f"  {stage:16} {throughput}  p50 {stats['p50_ms']:9.2f} ms  p95 {stats['p95_ms']:9.2f} ms"
+                      f"  peak {stats['peak_rss_mb']} MB")
+    finally:
+        if tmp_dir is not None:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+    return report
+
+
+# --- MICRO-BENCHMARKS ---
+# Single-stage benchmarks on the same synthetic data as the suite; they print instead of reporting JSON
+
+DataSpec = namedtuple('DataSpec', ['language_mix', 'duplicate_ratio', 'seed'])
+
+
+def synthetic_frame(data, rows):
+    import pandas as pd
+
+    return pd.DataFrame(list(iter_synthetic_feedback(rows, data.language_mix, data.duplicate_ratio, random.Random(data.seed))))
+
+
+def _timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def bench_categorize(data, rows, check_rows):
+    """Times the vectorized categorize/priority engine and checks it against the row-wise helpers."""
+    import agent_logic
+
+    df = synthetic_frame(data, rows)
+    categories, categorize_secs = _timed(agent_logic.categorize_series, df['Text'])
+    priorities, priority_secs = _timed(agent_logic.assign_priority_series, df)
+    print(f"Vectorized categorize: {rows:,} rows in {categorize_secs:.3f}s ({rows / categorize_secs:,.0f} rows/sec)")
+    print(f"Vectorized priority:   {rows:,} rows in {priority_secs:.3f}s ({rows / priority_secs:,.0f} rows/sec)")
+
+    # Equivalence check against the original row-wise implementation
+    sample = df.head(check_rows)
+    expected_categories, row_categorize_secs = _timed(lambda: sample['Text'].apply(agent_logic.categorize_feedback))
+    expected_priorities, row_priority_secs = _timed(lambda: sample.apply(agent_logic.assign_priority, axis=1))
+    print(f"Row-wise categorize:   {len(sample):,} rows in {row_categorize_secs:.3f}s")
+    print(f"Row-wise priority:     {len(sample):,} rows in {row_priority_secs:.3f}s")
+
+    assert categories.head(check_rows).tolist() == expected_categories.tolist(), "Category labels differ"
+    assert priorities.head(check_rows).tolist() == expected_priorities.tolist(), "Priority labels differ"
+    print(f"✅ Labels identical on {len(sample):,} rows.")
+
+
+def bench_memory(data, rows):
+    """df.memory_usage(deep=True) of a prioritized frame: legacy layout vs the compact format."""
+    import agent_logic
+
+    df = synthetic_frame(data, rows)
+    df.insert(0, 'id', range(1, rows + 1))
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache = use_stub_translation(agent_logic, os.path.join(tmp_dir, 'translations.db'))
+        processed = agent_logic.process_feedback_frame(df)
+        cache.close()
+
+    # Legacy layout: every label a Python string, float rank (as .map produced it), float64 confidence
+    legacy = agent_logic.finalize_output(processed.copy(), compact=False)
+    legacy = legacy.astype({column: object for column in agent_logic.CATEGORICAL_COLUMNS})
+    legacy['Priority_Rank'] = legacy['Priority_Rank'].astype(float)
+    compact = agent_logic.finalize_output(processed)
+
+    before = legacy.memory_usage(deep=True)
+    after = compact.memory_usage(deep=True)
+    print(f"{'column':18} {'legacy MB':>10} {'compact MB':>11}  compact dtype")
+    for column in legacy.columns:
+        print(f"{column:18} {before[column] / 1e6:10.1f} {after[column] / 1e6:11.1f}  {compact[column].dtype}")
+    print(f"{'TOTAL':18} {before.sum() / 1e6:10.1f} {after.sum() / 1e6:11.1f}  (x{before.sum() / after.sum():.1f} smaller)")
+
+    # Same content once the dropped translations are filled back in
+    restored = agent_logic.display_text(compact).astype(object)
+    assert restored.sort_index().tolist() == legacy['Text'].sort_index().tolist(), "Text differs after compaction"
+    print(f"✅ Text identical on {rows:,} rows ({compact['Text'].isna().sum():,} translations not stored).")
+
+
+def bench_ingest(data, rows, batch_size):
+    """Streams synthetic feedback (generated lazily) into a fresh DB and reports rows/sec."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        rss_before = peak_rss_mb()
+        seconds = generate_db(os.path.join(tmp_dir, 'bench_feedback.db'), rows, data.language_mix,
+                              data.duplicate_ratio, data.seed, batch_size)
+        print(f"Ingested {rows:,} rows in {seconds:.2f}s ({rows / seconds:,.0f} rows/sec, batch size {batch_size:,})")
+        if rss_before is not None:
+            print(f"Peak RSS: {peak_rss_mb():.1f} MB (before ingest: {rss_before:.1f} MB)")
+
+
+def bench_agent(data, rows, batch_size, chunk_size):
+    """Runs the agent's chunked read -> process -> write path over a fresh DB; reports rows/sec and peak RSS."""
+    import agent_logic
+    import feedback_queries
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_file = os.path.join(tmp_dir, 'bench_feedback.db')
+        generate_db(db_file, rows, data.language_mix, data.duplicate_ratio, data.seed, batch_size)
+
+        cache = use_stub_translation(agent_logic, db_file)
+        conn = feedback_queries.connect(db_file)
+        rss_before = peak_rss_mb()
+        processed, seconds = _timed(agent_logic._process_new_rows, conn, chunk_size)
+        conn.close()
+        cache.close()
+        print(f"Agent: {processed:,} rows in {seconds:.2f}s ({processed / seconds:,.0f} rows/sec, chunks of {chunk_size:,})")
+        if rss_before is not None:
+            print(f"Peak RSS: {peak_rss_mb():.1f} MB (before run: {rss_before:.1f} MB)")
+
+
+def bench_sentiment(data, rows, backend):
+    """Scores synthetic feedback with the local model (no cache) and reports rows/sec."""
+    from sentiment_scorer import SentimentScorer
+
+    scorer = SentimentScorer(backend=backend)
+    if not scorer.available:
+        return
+    texts = synthetic_frame(data, rows)['Text']
+    _, seconds = _timed(scorer.score_series, texts)
+    print(f"Sentiment ({backend}, {scorer.num_threads} threads): {rows:,} rows, "
+          f"{scorer.stats['unique_texts']:,} unique, {scorer.stats['batches']:,} batches in {seconds:.2f}s "
+          f"({rows / seconds:,.0f} rows/sec)")
+
+
+def bench_export(data, rows, batch_size):
+    """Streams a full export of a synthetic processed DB in every format; reports time, size and peak RSS."""
+    import agent_logic
+    import feedback_export
+    import feedback_queries
+
+    rules = agent_logic.get_rules()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_file = os.path.join(tmp_dir, 'bench_feedback.db')
+        generate_db(db_file, rows, data.language_mix, data.duplicate_ratio, data.seed, batch_size)
+
+        # Mark everything processed; the export cost doesn't depend on the labels
+        conn = feedback_queries.connect(db_file)
+        last = rules.priorities[-1]
+        with conn:
+            conn.execute(
+                f"UPDATE {feedback_queries.TABLE_NAME} SET Translated_Text = Text, Category = ?, Priority = ?, Priority_Rank = ?, "
+                f"Scored_Sentiment = Sentiment, Scored_Confidence = Confidence_Score",
+                (rules.default_category, last['label'], last['rank'])
+            )
+        conn.close()
+
+        filters = feedback_queries.FeedbackFilters(None, None, None)
+        for fmt in feedback_export.EXPORT_FORMATS:
+            rss_before = peak_rss_mb()
+            path, seconds = _timed(lambda: feedback_export.get_export(
+                filters, rules.priority_order, ('bench', rows), fmt, db_file, export_dir=tmp_dir
+            ))
+            size_mb = os.path.getsize(path) / 1024 / 1024
+            print(f"Export {fmt:8} {rows:,} rows in {seconds:.2f}s ({rows / seconds:,.0f} rows/sec, {size_mb:.1f} MB)")
+            if rss_before is not None:
+                print(f"  Peak RSS: {peak_rss_mb():.1f} MB (before export: {rss_before:.1f} MB)")
+            _, cached_seconds = _timed(lambda: feedback_export.get_export(
+                filters, rules.priority_order, ('bench', rows), fmt, db_file, export_dir=tmp_dir
+            ))
+            print(f"  Cached re-request: {cached_seconds * 1000:.1f} ms")
+
+
+def bench_backfill(data, rows, workers, batch_size):
+    """Backfills the same synthetic DB with 1 and with `workers` processes; reports the speedup."""
+    import feedback_worker
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        source = os.path.join(tmp_dir, 'source.db')
+        generate_db(source, rows, data.language_mix, data.duplicate_ratio, data.seed, batch_size)
+
+        baseline = None
+        for processes in sorted({1, workers}):
+            db_file = os.path.join(tmp_dir, f'backfill_{processes}.db')
+            shutil.copyfile(source, db_file)
+            _, seconds = _timed(lambda: feedback_worker.backfill(db_file, max_workers=processes))
+            baseline = baseline or seconds
+            print(f"{processes:3} processes: {rows / seconds:,.0f} rows/sec (speedup x{baseline / seconds:.2f})")
+
+
+def bench_instrumentation(data, rows, batch_size, chunk_size, repeats):
+    """
+    Agent throughput with perf_metrics spans enabled vs disabled (runs interleaved, best of
+    `repeats` each, since single runs differ by more than the overhead), plus the cost of one span.
+    """
+    import timeit
+
+    import agent_logic
+    import feedback_queries
+    import perf_metrics
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        source = os.path.join(tmp_dir, 'source.db')
+        generate_db(source, rows, data.language_mix, data.duplicate_ratio, data.seed, batch_size)
+
+        best = {False: None, True: None}
+        for repeat in range(repeats):
+            for enabled in (False, True):
+                perf_metrics.set_enabled(enabled)
+                db_file = os.path.join(tmp_dir, 'metrics.db')
+                shutil.copyfile(source, db_file)
+                cache = use_stub_translation(agent_logic, db_file)
+                conn = feedback_queries.connect(db_file)
+                processed, seconds = _timed(agent_logic._process_new_rows, conn, chunk_size)
+                conn.close()
+                cache.close()
+                os.remove(db_file)
+                best[enabled] = seconds if best[enabled] is None else min(best[enabled], seconds)
+        for enabled in (False, True):
+            print(f"Metrics {'on ' if enabled else 'off'}: {rows / best[enabled]:,.0f} rows/sec (best of {repeats})")
+        print(f"Overhead: {(best[True] / best[False] - 1) * 100:.1f}%")
+
+    for enabled in (False, True):
+        perf_metrics.set_enabled(enabled)
+        calls = 100000
+        seconds = timeit.timeit(lambda: perf_metrics.span('bench').__enter__().__exit__(None, None, None), number=calls)
+        perf_metrics.drain()
+        print(f"One span {'enabled' if enabled else 'disabled'}: {seconds / calls * 1e6:.2f} us")
+
+
+# --- HTTP INGESTION SERVICE ---
+
+async def _post_feedback(reader, writer, request):
+    """Sends one prepared POST on a keep-alive connection; returns (status, Retry-After seconds)."""
+    writer.write(request)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = retry_after = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.lower() == 'content-length':
+            length = int(value)
+        elif name.lower() == 'retry-after':
+            retry_after = float(value)
+    await reader.readexactly(length)
+    return status, retry_after
+
+
+async def _load_clients(port, bodies, concurrency):
+    """`concurrency` keep-alive clients share the bodies; returns (ack latencies, 503 count, seconds)."""
+    import asyncio
+
+    requests = [
+        (f"POST /feedback HTTP/1.1\r\nHost: 127.0.0.1\r\nContent-Type: application/json\r\n"
+         f"Content-Length: {len(body)}\r\n\r\n").encode('latin-1') + body
+        for body in bodies
+    ]
+    latencies = []
+    rejected = 0
+
+    async def client(share):
+        nonlocal rejected
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        for request in share:
+            while True:
+                start = time.perf_counter()
+                status, retry_after = await _post_feedback(reader, writer, request)
+                if status == 202:
+                    latencies.append(time.perf_counter() - start)
+                    break
+                if status != 503:
+                    raise RuntimeError(f"Unexpected HTTP {status}")
+                # Backpressure: back off briefly rather than the full Retry-After, to keep the queue full
+                rejected += 1
+                await asyncio.sleep(min(retry_after, 0.05))
+        writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(requests[i::concurrency]) for i in range(concurrency)))
+    return latencies, rejected, time.perf_counter() - start
+
+
+def _service_health(port):
+    import urllib.request
+
+    with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=10) as response:
+        return json.load(response)
+
+
+def bench_ingest_service(data, requests, items_per_request, concurrency, queue_rows):
+    """
+    Load-tests feedback_ingest_service in a subprocess from `concurrency` local keep-alive
+    clients: sustained requests/sec, ack latency percentiles, 503s, and the time the
+    writer needs to drain what was acknowledged. Checks every acknowledged item reached the DB.
+    """
+    import asyncio
+    import sqlite3
+
+    import numpy as np
+
+    feedback = iter_synthetic_feedback(requests * items_per_request, data.language_mix, data.duplicate_ratio,
+                                       random.Random(data.seed))
+    bodies = [
+        json.dumps([next(feedback) for _ in range(items_per_request)], default=str, ensure_ascii=False).encode('utf-8')
+        for _ in range(requests)
+    ]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_file = os.path.join(tmp_dir, 'bench_feedback.db')
+        service = subprocess.Popen(
+            [sys.executable, 'feedback_ingest_service.py', '--db', db_file, '--port', '0',
+             '--queue-rows', str(queue_rows)],
+            cwd=os.path.dirname(os.path.abspath(__file__)), stdout=subprocess.PIPE, text=True
+        )
+        try:
+            line = service.stdout.readline()
+            if 'Listening on' not in line:
+                raise RuntimeError(f"Service did not start: {line!r}")
+            port = int(line.split('http://', 1)[1].split()[0].rsplit(':', 1)[1])
+
+            latencies, rejected, seconds = asyncio.run(_load_clients(port, bodies, concurrency))
+            acked = time.perf_counter()
+            while _service_health(port)['queued']:
+                time.sleep(0.01)
+            drain_seconds = time.perf_counter() - acked
+            health = _service_health(port)
+        finally:
+            service.terminate()
+            output, _ = service.communicate(timeout=60)
+
+        latencies_ms = np.array(latencies) * 1000
+        items = requests * items_per_request
+        print(f"{requests:,} requests x {items_per_request} item(s), {concurrency} clients, queue {queue_rows:,} rows")
+        print(f"  Sustained: {requests / seconds:,.0f} requests/sec ({items / seconds:,.0f} items/sec)")
+        print(f"  Ack latency: p50 {np.percentile(latencies_ms, 50):.2f} ms, "
+              f"p99 {np.percentile(latencies_ms, 99):.2f} ms, max {latencies_ms.max():.2f} ms")
+        print(f"  503 (queue full): {rejected:,}; drain after last ack: {drain_seconds * 1000:.0f} ms")
+        print(f"  Writer: {health['transactions']:,} transactions "
+              f"(avg {health['written'] / max(health['transactions'], 1):,.0f} rows)")
+
+        conn = sqlite3.connect(db_file)
+        stored = conn.execute("SELECT COUNT(*) FROM feedback_table").fetchone()[0]
+        conn.close()
+        assert stored == items, f"{stored:,} rows stored for {items:,} acknowledged"
+        print(f"✅ All {items:,} acknowledged items stored.")
+
+
+# --- STARTUP ---
+
+# What each entry point imports; 'app' is the login page (the dashboard loads lazily after it)
+STARTUP_TARGETS = {'login page': 'app', 'agent (warm-up)': 'agent_logic'}
+# Must never be imported before login
+LOGIN_FORBIDDEN_MODULES = ('pandas', 'plotly.express', 'googletrans', 'pyarrow', 'torch', 'transformers')
+
+
+def import_profile(module):
+    """Runs `python -X importtime -c 'import module'` in a fresh interpreter; returns {module: cumulative us}."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+    profile = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        profile[name.strip()] = int(cumulative)
+    return profile
+
+
+def bench_startup(repeats, max_ms):
+    """Cold-import times per entry point (median of fresh interpreters); fails above max_ms for the login page."""
+    failed = False
+    for label, module in STARTUP_TARGETS.items():
+        profiles = [import_profile(module) for _ in range(repeats)]
+        median_ms = statistics.median(profile[module] for profile in profiles) / 1000
+        print(f"{label:16} import {module}: {median_ms:.0f} ms (median of {repeats})")
+
+        heaviest = sorted(
+            ((name, us) for name, us in profiles[-1].items() if '.' not in name and name != module),
+            key=lambda item: item[1], reverse=True
+        )[:5]
+        print("  heaviest: " + ', '.join(f"{name} {us / 1000:.0f} ms" for name, us in heaviest))
+
+        if module == STARTUP_TARGETS['login page']:
+            loaded = sorted(name for name in LOGIN_FORBIDDEN_MODULES if name in profiles[-1])
+            if loaded:
+                print(f"  ❌ loaded before login: {', '.join(loaded)}")
+                failed = True
+            if max_ms is not None and median_ms > max_ms:
+                print(f"  ❌ {median_ms:.0f} ms exceeds the {max_ms:.0f} ms budget")
+                failed = True
+    if failed:
+        sys.exit(1)
+    print("✅ Startup within budget.")
+
+
+MICRO_BENCHMARKS = {
+    'categorize': lambda data, args: bench_categorize(data, args.micro_rows, min(args.micro_rows, args.check_rows)),
+    'memory': lambda data, args: bench_memory(data, args.micro_rows),
+    'ingest': lambda data, args: bench_ingest(data, args.micro_rows, args.batch_size),
+    'agent': lambda data, args: bench_agent(data, args.micro_rows, args.batch_size, args.chunk_size),
+    'sentiment': lambda data, args: bench_sentiment(data, args.micro_rows, args.backend),
+    'backfill': lambda data, args: bench_backfill(data, args.micro_rows, args.workers, args.batch_size),
+    'startup': lambda data, args: bench_startup(args.repeats, args.max_ms),
+    'export': lambda data, args: bench_export(data, args.micro_rows, args.batch_size),
+    'instrumentation': lambda data, args: bench_instrumentation(data, args.micro_rows, args.batch_size,
+                                                                args.chunk_size, args.repeats),
+    'ingest-service': lambda data, args: bench_ingest_service(data, args.requests, args.items_per_request,
+                                                              args.concurrency, args.queue_rows),
+}
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == '_run-size':
+        # Internal: one size in a fresh interpreter (see _run_size_subprocess)
+        child = argparse.ArgumentParser()
+        child.add_argument('command')
+        child.add_argument('db_file')
+        child.add_argument('result_file')
+        child.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+        child.add_argument('--translator-latency-ms', type=float, default=0.0)
+        child_args = child.parse_args()
+        result = run_size(child_args.db_file, child_args.chunk_size, child_args.translator_latency_ms)
+        with open(child_args.result_file, 'w', encoding='utf-8') as f:
+            json.dump(result, f)
+        raise SystemExit(0)
+
+    parser = argparse.ArgumentParser(description="Reproducible, offline benchmark suite for the agent pipeline")
+    parser.add_argument('command', nargs='?', choices=['run', 'generate'] + sorted(MICRO_BENCHMARKS), default='run')
+    parser.add_argument('--sizes', default=DEFAULT_SIZES, help="Comma-separated row counts, e.g. 1K,100K,1M,10M")
+    parser.add_argument('--rows', default=None,
+                        help=f"generate / micro-benchmarks: row count (e.g. 1M; micro default {MICRO_DEFAULT_ROWS})")
+    parser.add_argument('--language-mix', default=DEFAULT_LANGUAGE_MIX,
+                        help=f"Share per language ({', '.join(LANGUAGES)}), e.g. {DEFAULT_LANGUAGE_MIX}")
+    parser.add_argument('--duplicate-ratio', type=float, default=DEFAULT_DUPLICATE_RATIO,
+                        help="Share of rows repeating (or nearly repeating) an earlier text")
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help="Agent read chunk size")
+    parser.add_argument('--translator-latency-ms', type=float, default=0.0, help="Simulated delay per translator call")
+    parser.add_argument('--repeats', type=int, default=DEFAULT_REPEATS, help="Runs per size (fastest run per stage is kept); startup/instrumentation: runs per measurement")
+    parser.add_argument('--data-dir', default=None, help="Keep generated DBs here and reuse them (default: temp dir)")
+    parser.add_argument('--output', default=None, help="Write the JSON report to this file (default: stdout)")
+    parser.add_argument('--baseline', default=None, help="Compare against this report; exit 1 on regression")
+    parser.add_argument('--save-baseline', nargs='?', const=BASELINE_FILE, default=None,
+                        help=f"Store this run as the baseline (default file: {BASELINE_FILE})")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE, help="Allowed slowdown (0.25 = 25%%)")
+    parser.add_argument('--memory-tolerance', type=float, default=DEFAULT_MEMORY_TOLERANCE,
+                        help="Allowed peak memory growth")
+    # Micro-benchmark options
+    parser.add_argument('--check-rows', type=int, default=100_000,
+                        help="categorize: rows compared against the row-wise implementation")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help="Ingest batch size")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="backfill: processes")
+    parser.add_argument('--max-ms', type=float, default=None, help="startup: login page import budget")
+    parser.add_argument('--backend', default=None, help="sentiment: model backend (default: the configured one)")
+    parser.add_argument('--requests', type=int, default=50000, help="ingest-service: POSTs sent")
+    parser.add_argument('--items-per-request', type=int, default=1, help="ingest-service: feedback items per POST")
+    parser.add_argument('--concurrency', type=int, default=64, help="ingest-service: keep-alive client connections")
+    parser.add_argument('--queue-rows', type=int, default=50000, help="ingest-service: service buffer size")
+    args = parser.parse_args()
+
+    mix = parse_language_mix(args.language_mix)
+    if args.command in MICRO_BENCHMARKS:
+        if args.command == 'sentiment':
+            from sentiment_scorer import BACKEND, BACKENDS
+
+            args.backend = args.backend or BACKEND
+            if args.backend not in BACKENDS:
+                parser.error(f"--backend must be one of {', '.join(BACKENDS)}")
+        args.micro_rows = parse_size(args.rows or MICRO_DEFAULT_ROWS)
+        MICRO_BENCHMARKS[args.command](DataSpec(mix, args.duplicate_ratio, args.seed), args)
+        raise SystemExit(0)
+    if args.command == 'generate':
+        if args.rows is None:
+            parser.error("generate needs --rows")
+        print(synthetic_db(args.data_dir or '.', parse_size(args.rows), mix, args.duplicate_ratio, args.seed))
+        raise SystemExit(0)
+
+    sizes = [parse_size(size) for size in args.sizes.split(',')]
+    report = run_suite(sizes, mix, args.duplicate_ratio, args.seed, args.chunk_size, args.data_dir,
+                       args.translator_latency_ms, args.repeats)
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+        print(f"Report written to {args.output}")
+    else:
+        print(output)
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+        print(f"Baseline saved to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        print(f"Comparing against {args.baseline} (commit {baseline.get('meta', {}).get('commit')}):")
+        base_meta = baseline.get('meta', {})
+        if (base_meta.get('platform'), base_meta.get('cpu_count')) != (report['meta']['platform'], report['meta']['cpu_count']):
+            print(f"  Warning: the baseline was recorded on {base_meta.get('platform')} with "
+                  f"{base_meta.get('cpu_count')} CPUs; timings are only comparable on the same machine.")
+        regressions = compare_to_baseline(report, baseline, args.tolerance, args.memory_tolerance)
+        if regressions:
+            print("❌ Regressions:\n  " + '\n  '.join(regressions))
+            raise SystemExit(1)
+        print("✅ No regressions against the baseline.")
@@ -0,0 +1,398 @@
+import sqlite3
+
+# --- CONSTANTS ---
+DB_FILE_NAME = 'feedback_data.db'
+TABLE_NAME = 'feedback_table'
+LEGACY_RESULTS_TABLE_NAME = 'feedback_results'
+ROLLUP_TABLE_NAME = 'feedback_rollup'
+CLUSTERS_TABLE_NAME = 'feedback_clusters'
+CLUSTER_TEXTS_TABLE_NAME = 'feedback_cluster_texts'
+CLUSTER_BANDS_TABLE_NAME = 'feedback_cluster_bands'
+SEARCH_TABLE_NAME = 'feedback_search'
+SEARCH_CONTENT_VIEW_NAME = 'feedback_search_content'
+# Rollup confidence buckets: floor(Scored_Confidence * 100), i.e. 0.01 steps. The epsilon keeps
+# values like 0.57 (56.99999... after scaling) in their own bucket.
+CONFIDENCE_BUCKETS = 100
+BUCKET_EPSILON = 1e-7
+
+# Full-text search tokenizer: case- and accent-insensitive; combining marks (M*) stay inside
+# tokens so Devanagari/Tamil words aren't split at their vowel signs
+SEARCH_TOKENIZER = "unicode61 remove_diacritics 2 categories 'L* N* Co M*'"
+
+# Raw columns written by ingestion, then the columns derived by the agent. Raw columns keep
+# what was ingested; Scored_Sentiment/Scored_Confidence hold the cleaned (or model-scored)
+# values the priority was derived from, and are what filters, sorting and the rollup use.
+RAW_COLUMNS = ['Date/Time', 'Text', 'Sentiment', 'Confidence_Score', 'User_ID']
+DERIVED_COLUMNS = ['Translated_Text', 'Category', 'Priority', 'Priority_Rank', 'Cluster_Id',
+                   'Scored_Sentiment', 'Scored_Confidence']
+# Derived columns as of schema v1 (what the legacy feedback_results table held)
+V1_DERIVED_COLUMNS = ['Translated_Text', 'Category', 'Priority', 'Priority_Rank']
+# Column the rollup bucketed before schema v6 (migrations v2 and v5 still build it that way)
+V5_CONFIDENCE_COLUMN = 'Confidence_Score'
+
+
+# --- LATEST SCHEMA (used for fresh databases) ---
+
+def _create_feedback_table(conn, table_name=TABLE_NAME):
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {table_name} (
+            id INTEGER PRIMARY KEY,
+            "Date/Time" TEXT,
+            Text TEXT,
+            Sentiment TEXT,
+            Confidence_Score REAL,
+            User_ID INTEGER,
+            Translated_Text TEXT,
+            Category TEXT,
+            Priority TEXT,
+            Priority_Rank INTEGER,
+            Cluster_Id INTEGER,
+            Scored_Sentiment TEXT,
+            Scored_Confidence REAL
+        )
+    """)
+
+
+def _create_indexes(conn):
+    # Dashboard filter/sort: rank asc, confidence desc; Category rides along so filters stay in the index
+    conn.execute(f"""
+        CREATE INDEX IF NOT EXISTS idx_{TABLE_NAME}_rank_confidence
+        ON {TABLE_NAME} (Priority_Rank, Scored_Confidence DESC, Category)
+    """)
+    conn.execute(f"""
+        CREATE INDEX IF NOT EXISTS idx_{TABLE_NAME}_datetime
+        ON {TABLE_NAME} ("Date/Time")
+    """)
+
+
+def _create_cluster_index(conn):
+    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{TABLE_NAME}_cluster ON {TABLE_NAME} (Cluster_Id)")
+
+
+def _create_cluster_tables(conn):
+    """Near-duplicate clusters (see feedback_clusters): representative + MinHash signature, exact-text map, LSH bands."""
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {CLUSTERS_TABLE_NAME} (
+            cluster_id INTEGER PRIMARY KEY,
+            representative TEXT,
+            signature BLOB
+        )
+    """)
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {CLUSTER_TEXTS_TABLE_NAME} (
+            text_hash TEXT PRIMARY KEY,
+            cluster_id INTEGER NOT NULL
+        )
+    """)
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {CLUSTER_BANDS_TABLE_NAME} (
+            band_key INTEGER NOT NULL,
+            cluster_id INTEGER NOT NULL
+        )
+    """)
+    conn.execute(f"""
+        CREATE INDEX IF NOT EXISTS idx_{CLUSTER_BANDS_TABLE_NAME}_key
+        ON {CLUSTER_BANDS_TABLE_NAME} (band_key)
+    """)
+
+
+def _rollup_day(row):
+    # Day partition of a row; '' for rows without a timestamp (keeps the primary key non-NULL)
+    return f"COALESCE(date({row}.\"Date/Time\"), '')"
+
+
+def _create_rollup(conn, confidence_column='Scored_Confidence'):
+    """
+    Per (day, Category, Priority, confidence bucket) counts of processed rows, kept current
+    by triggers on every write path (agent write-back, resets, deletes, retention), so
+    dashboard aggregates over any date range never have to touch row-level data.
+    """
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {ROLLUP_TABLE_NAME} (
+            day TEXT NOT NULL,
+            Category TEXT,
+            Priority TEXT,
+            Priority_Rank INTEGER,
+            confidence_bucket INTEGER,
+            row_count INTEGER NOT NULL,
+            PRIMARY KEY (day, Category, Priority, confidence_bucket)
+        )
+    """)
+    bucket = f"CAST(COALESCE({{row}}.{confidence_column}, 0) * {CONFIDENCE_BUCKETS} + {BUCKET_EPSILON} AS INTEGER)"
+    add_new = f"""
+        INSERT INTO {ROLLUP_TABLE_NAME} (day, Category, Priority, Priority_Rank, confidence_bucket, row_count)
+        VALUES ({_rollup_day('NEW')}, NEW.Category, NEW.Priority, NEW.Priority_Rank, {bucket.format(row='NEW')}, 1)
+        ON CONFLICT (day, Category, Priority, confidence_bucket) DO UPDATE SET row_count = row_count + 1;
+    """
+    remove_old = f"""
+        UPDATE {ROLLUP_TABLE_NAME} SET row_count = row_count - 1
+        WHERE day = {_rollup_day('OLD')} AND Category IS OLD.Category AND Priority IS OLD.Priority
+          AND confidence_bucket = {bucket.format(row='OLD')};
+    """
+    watched = f'Category, Priority, Priority_Rank, {confidence_column}, "Date/Time"'
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{ROLLUP_TABLE_NAME}_insert AFTER INSERT ON {TABLE_NAME}
+        WHEN NEW.Priority_Rank IS NOT NULL
+        BEGIN {add_new} END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{ROLLUP_TABLE_NAME}_update_old
+        AFTER UPDATE OF {watched} ON {TABLE_NAME}
+        WHEN OLD.Priority_Rank IS NOT NULL
+        BEGIN {remove_old} END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{ROLLUP_TABLE_NAME}_update_new
+        AFTER UPDATE OF {watched} ON {TABLE_NAME}
+        WHEN NEW.Priority_Rank IS NOT NULL
+        BEGIN {add_new} END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{ROLLUP_TABLE_NAME}_delete AFTER DELETE ON {TABLE_NAME}
+        WHEN OLD.Priority_Rank IS NOT NULL
+        BEGIN {remove_old} END
+    """)
+
+
+def _drop_rollup(conn):
+    for suffix in ('insert', 'update_old', 'update_new', 'delete'):
+        conn.execute(f"DROP TRIGGER IF EXISTS trg_{ROLLUP_TABLE_NAME}_{suffix}")
+    conn.execute(f"DROP TABLE IF EXISTS {ROLLUP_TABLE_NAME}")
+
+
+def _rebuild_rollup(conn, confidence_column='Scored_Confidence'):
+    conn.execute(f"DELETE FROM {ROLLUP_TABLE_NAME}")
+    conn.execute(f"""
+        INSERT INTO {ROLLUP_TABLE_NAME} (day, Category, Priority, Priority_Rank, confidence_bucket, row_count)
+        SELECT {_rollup_day(TABLE_NAME)} AS row_day, Category, Priority, MIN(Priority_Rank),
+               CAST(COALESCE({confidence_column}, 0) * {CONFIDENCE_BUCKETS} + {BUCKET_EPSILON} AS INTEGER) AS bucket, COUNT(*)
+        FROM {TABLE_NAME}
+        WHERE Priority_Rank IS NOT NULL
+        GROUP BY row_day, Category, Priority, bucket
+    """)
+
+
+def fts5_available(conn):
+    return bool(conn.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')").fetchone()[0])
+
+
+def _search_values(row):
+    # The translation is only indexed where it differs, so English rows aren't indexed twice
+    return f"{row}.id, {row}.Text, NULLIF({row}.Translated_Text, {row}.Text)"
+
+
+def _create_search_index(conn):
+    """
+    External-content FTS5 index over the original and translated text (rowid = feedback id).
+    Its content is a view applying the same NULLIF as the triggers, so highlight() sees
+    exactly what was indexed. Triggers keep it in step with every write path: ingestion
+    inserts, the agent's translation write-back and deletes. Skipped without FTS5.
+    """
+    if not fts5_available(conn):
+        print("SQLite has no FTS5 support; feedback search is disabled.")
+        return False
+    conn.execute(f"""
+        CREATE VIEW IF NOT EXISTS {SEARCH_CONTENT_VIEW_NAME} (id, Text, Translated_Text) AS
+        SELECT {_search_values(TABLE_NAME)} FROM {TABLE_NAME}
+    """)
+    conn.execute(f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE_NAME} USING fts5(
+            Text, Translated_Text,
+            content='{SEARCH_CONTENT_VIEW_NAME}', content_rowid='id',
+            tokenize="{SEARCH_TOKENIZER}"
+        )
+    """)
+    columns = "rowid, Text, Translated_Text"
+    remove_old = f"""
+        INSERT INTO {SEARCH_TABLE_NAME} ({SEARCH_TABLE_NAME}, {columns}) VALUES ('delete', {_search_values('OLD')});
+    """
+    add_new = f"INSERT INTO {SEARCH_TABLE_NAME} ({columns}) VALUES ({_search_values('NEW')});"
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{SEARCH_TABLE_NAME}_insert AFTER INSERT ON {TABLE_NAME}
+        BEGIN {add_new} END
+    """)
+    # Writing back a translation identical to the text (English rows) changes nothing indexed
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{SEARCH_TABLE_NAME}_update AFTER UPDATE OF Text, Translated_Text ON {TABLE_NAME}
+        WHEN OLD.Text IS NOT NEW.Text
+          OR NULLIF(OLD.Translated_Text, OLD.Text) IS NOT NULLIF(NEW.Translated_Text, NEW.Text)
+        BEGIN {remove_old} {add_new} END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{SEARCH_TABLE_NAME}_delete AFTER DELETE ON {TABLE_NAME}
+        BEGIN {remove_old} END
+    """)
+    return True
+
+
+def _rebuild_search_index(conn):
+    if table_exists(conn, SEARCH_TABLE_NAME):
+        conn.execute(f"INSERT INTO {SEARCH_TABLE_NAME} ({SEARCH_TABLE_NAME}) VALUES ('rebuild')")
+
+
+def _create_latest_schema(conn):
+    _create_feedback_table(conn)
+    _create_indexes(conn)
+    _create_cluster_index(conn)
+    _create_cluster_tables(conn)
+    _create_rollup(conn)
+    _create_search_index(conn)
+    # A dropped feedback table takes its triggers with it; start the rollup and search index from zero again
+    _rebuild_rollup(conn)
+    _rebuild_search_index(conn)
+
+
+# --- MIGRATIONS (PRAGMA user_version) ---
+
+def _migrate_to_v1(conn):
+    """
+    Legacy table (no primary key, derived columns kept in feedback_results) -> integer id
+    primary key with the derived columns stored inline, plus filter/sort indexes.
+    Existing rowids become ids, so nothing that refers to them changes.
+    """
+    raw = ', '.join(f'"{column}"' for column in RAW_COLUMNS)
+    derived = ', '.join(V1_DERIVED_COLUMNS)
+    _create_feedback_table(conn, f'{TABLE_NAME}_v1')
+
+    if table_exists(conn, LEGACY_RESULTS_TABLE_NAME):
+        derived_select = ', '.join(f'r.{column}' for column in V1_DERIVED_COLUMNS)
+        raw_select = ', '.join(f'f."{column}"' for column in RAW_COLUMNS)
+        conn.execute(f"""
+            INSERT INTO {TABLE_NAME}_v1 (id, {raw}, {derived})
+            SELECT f.rowid, {raw_select}, {derived_select}
+            FROM {TABLE_NAME} f
+            LEFT JOIN {LEGACY_RESULTS_TABLE_NAME} r ON r.source_rowid = f.rowid
+        """)
+        conn.execute(f"DROP TABLE {LEGACY_RESULTS_TABLE_NAME}")
+    else:
+        conn.execute(f"INSERT INTO {TABLE_NAME}_v1 (id, {raw}) SELECT rowid, {raw} FROM {TABLE_NAME}")
+
+    conn.execute(f"DROP TABLE {TABLE_NAME}")
+    conn.execute(f"ALTER TABLE {TABLE_NAME}_v1 RENAME TO {TABLE_NAME}")
+    _create_indexes(conn)
+
+
+def _migrate_to_v2(conn):
+    """Adds the trigger-maintained aggregate rollup and backfills it from processed rows."""
+    _create_rollup(conn, V5_CONFIDENCE_COLUMN)
+    _rebuild_rollup(conn, V5_CONFIDENCE_COLUMN)
+
+
+def _migrate_to_v3(conn):
+    """
+    Adds near-duplicate clustering (Cluster_Id + cluster tables). Existing rows are marked
+    pending so the next agent run assigns their clusters (translations stay cached).
+    """
+    columns = {row[1] for row in conn.execute(f"PRAGMA table_info({TABLE_NAME})")}
+    if 'Cluster_Id' not in columns:
+        conn.execute(f"ALTER TABLE {TABLE_NAME} ADD COLUMN Cluster_Id INTEGER")
+    _create_cluster_index(conn)
+    _create_cluster_tables(conn)
+    conn.execute(f"UPDATE {TABLE_NAME} SET Category = NULL, Priority = NULL, Priority_Rank = NULL")
+
+
+def _migrate_to_v4(conn):
+    """Adds the trigger-maintained full-text search index and fills it from existing rows."""
+    if _create_search_index(conn):
+        _rebuild_search_index(conn)
+
+
+def _migrate_to_v5(conn):
+    """Re-keys the aggregate rollup by day, so date-range KPIs still come from the rollup."""
+    _drop_rollup(conn)
+    _create_rollup(conn, V5_CONFIDENCE_COLUMN)
+    _rebuild_rollup(conn, V5_CONFIDENCE_COLUMN)
+
+
+def _migrate_to_v6(conn):
+    """
+    Adds Scored_Sentiment/Scored_Confidence, so the agent stops writing its cleaned values
+    over the ingested Sentiment/Confidence_Score. Processed rows get them from the raw
+    columns (which earlier versions had overwritten with exactly those values); the sort
+    index and the rollup move over to Scored_Confidence.
+    """
+    columns = {row[1] for row in conn.execute(f"PRAGMA table_info({TABLE_NAME})")}
+    for column, column_type in (('Scored_Sentiment', 'TEXT'), ('Scored_Confidence', 'REAL')):
+        if column not in columns:
+            conn.execute(f"ALTER TABLE {TABLE_NAME} ADD COLUMN {column} {column_type}")
+    _drop_rollup(conn)
+    conn.execute(f"""
+        UPDATE {TABLE_NAME} SET Scored_Sentiment = Sentiment, Scored_Confidence = Confidence_Score
+        WHERE Priority_Rank IS NOT NULL
+    """)
+    conn.execute(f"DROP INDEX IF EXISTS idx_{TABLE_NAME}_rank_confidence")
+    _create_indexes(conn)
+    _create_rollup(conn)
+    _rebuild_rollup(conn)
+
+
+MIGRATIONS = [
+    (1, _migrate_to_v1),
+    (2, _migrate_to_v2),
+    (3, _migrate_to_v3),
+    (4, _migrate_to_v4),
+    (5, _migrate_to_v5),
+    (6, _migrate_to_v6),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+# --- PUBLIC API ---
+
+def table_exists(conn, table_name):
+    row = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table_name,)).fetchone()
+    return row is not None
+
+
+def get_schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def _run_in_transaction(conn, fn):
+    """DDL isn't wrapped in an implicit transaction by sqlite3, so open one explicitly."""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        fn()
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def ensure_schema(conn):
+    """
+    Brings the feedback table to the latest schema in place.
+    A missing table (fresh file, or dropped by the admin reset) is created at the latest
+    version; an older one is migrated step by step. Everything runs in one write
+    transaction, so a failed migration leaves the file untouched.
+    """
+    if get_schema_version(conn) == SCHEMA_VERSION and table_exists(conn, TABLE_NAME):
+        return SCHEMA_VERSION
+
+    def upgrade():
+        # Re-checked under the write lock in case another process migrated meanwhile
+        if not table_exists(conn, TABLE_NAME):
+            _create_latest_schema(conn)
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            return
+
+        version = get_schema_version(conn)
+        for target_version, migration in MIGRATIONS:
+            if version < target_version:
+                migration(conn)
+                conn.execute(f"PRAGMA user_version = {target_version}")
+                print(f"Migrated {TABLE_NAME} to schema version {target_version}.")
+                version = target_version
+
+    if conn.in_transaction:
+        conn.commit()
+    _run_in_transaction(conn, upgrade)
+    return get_schema_version(conn)
+
+
+if __name__ == '__main__':
+    conn = sqlite3.connect(DB_FILE_NAME)
+    try:
+        print(f"{DB_FILE_NAME}: schema version {ensure_schema(conn)}")
+    finally:
+        conn.close()
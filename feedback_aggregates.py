@@ -0,0 +1,118 @@
+from collections import namedtuple
+from datetime import date, timedelta
+
+import pandas as pd
+
+from db_schema import TABLE_NAME, ROLLUP_TABLE_NAME, CONFIDENCE_BUCKETS
+from feedback_queries import day_after
+
+# "Total Feedback (Last 7 Days)": processed rows from today and the 6 days before
+RECENT_DAYS = 7
+
+# Everything the KPI row and the two charts need for one filter set
+DashboardAggregates = namedtuple('DashboardAggregates', [
+    'total',                 # all processed feedback in the filters' date range
+    'recent',                # all processed feedback from the last RECENT_DAYS days (ignores filters)
+    'filtered',              # rows matching the filters
+    'critical',              # filtered P1 rows
+    'high',                  # filtered P2 rows
+    'by_priority',           # DataFrame[Priority, Count] (pie chart)
+    'by_category_priority',  # DataFrame[Category, Priority, Count] (bar chart)
+])
+
+
+def _confidence_bucket(min_confidence):
+    """Rollup bucket for a threshold, or None if the threshold falls between buckets."""
+    scaled = float(min_confidence) * CONFIDENCE_BUCKETS
+    if abs(scaled - round(scaled)) > 1e-6:
+        return None
+    return int(round(scaled))
+
+
+def _grouped_counts(conn, filters, use_rollup):
+    """
+    One pass returning, per (Category, Priority): all processed rows in the date range and
+    those at or above min_confidence. Reads the trigger-maintained rollup (only the days in
+    range) when the threshold lines up with its buckets, otherwise scans the table.
+    """
+    min_confidence = 0.0 if filters.min_confidence is None else filters.min_confidence
+    bucket = _confidence_bucket(min_confidence) if use_rollup else None
+    if bucket is not None:
+        clauses, params = ["1"], [bucket]
+        if filters.start_date is not None:
+            clauses.append("day >= ?")
+            params.append(str(filters.start_date))
+        if filters.end_date is not None:
+            clauses.append("day > '' AND day <= ?")  # '' = rows without a timestamp
+            params.append(str(filters.end_date))
+        query = f"""
+            SELECT Category, Priority, MIN(Priority_Rank) AS Priority_Rank,
+                   SUM(row_count) AS total,
+                   SUM(CASE WHEN confidence_bucket >= ? THEN row_count ELSE 0 END) AS filtered
+            FROM {ROLLUP_TABLE_NAME}
+            WHERE {' AND '.join(clauses)}
+            GROUP BY Category, Priority
+            HAVING SUM(row_count) > 0
+        """
+    else:
+        clauses, params = ["Priority_Rank IS NOT NULL"], [float(min_confidence)]
+        if filters.start_date is not None:
+            clauses.append('"Date/Time" >= ?')
+            params.append(str(filters.start_date))
+        if filters.end_date is not None:
+            clauses.append('"Date/Time" < ?')
+            params.append(day_after(filters.end_date))
+        query = f"""
+            SELECT Category, Priority, MIN(Priority_Rank) AS Priority_Rank,
+                   COUNT(*) AS total,
+                   SUM(Scored_Confidence >= ?) AS filtered
+            FROM {TABLE_NAME}
+            WHERE {' AND '.join(clauses)}
+            GROUP BY Category, Priority
+        """
+    return pd.read_sql(query, conn, params=params)
+
+
+def count_recent(conn, today=None, days=RECENT_DAYS, use_rollup=True):
+    """Processed feedback from `today` and the days-1 days before it."""
+    since = ((today or date.today()) - timedelta(days=days - 1)).isoformat()
+    if use_rollup:
+        query = f"SELECT COALESCE(SUM(row_count), 0) FROM {ROLLUP_TABLE_NAME} WHERE day >= ?"
+    else:
+        query = f'SELECT COUNT(*) FROM {TABLE_NAME} WHERE "Date/Time" >= ? AND Priority_Rank IS NOT NULL'
+    return int(conn.execute(query, (since,)).fetchone()[0])
+
+
+def fetch_dashboard_aggregates(conn, filters, critical_label, high_label, use_rollup=True, today=None):
+    """Computes all dashboard aggregates for a filter set without loading row-level data."""
+    groups = _grouped_counts(conn, filters, use_rollup)
+    total = int(groups['total'].sum())
+
+    selected = groups
+    if filters.priorities is not None:
+        selected = selected[selected['Priority'].isin(filters.priorities)]
+    if filters.categories is not None:
+        selected = selected[selected['Category'].isin(filters.categories)]
+    selected = selected[selected['filtered'] > 0]
+
+    by_category_priority = (
+        selected.sort_values(['Priority_Rank', 'Category'])[['Category', 'Priority', 'filtered']]
+        .rename(columns={'filtered': 'Count'})
+        .reset_index(drop=True)
+    )
+    by_priority = (
+        by_category_priority.groupby('Priority', sort=False)['Count'].sum()
+        .sort_values(ascending=False)
+        .reset_index()
+    )
+    counts = by_priority.set_index('Priority')['Count']
+
+    return DashboardAggregates(
+        total=total,
+        recent=count_recent(conn, today, use_rollup=use_rollup),
+        filtered=int(by_priority['Count'].sum()),
+        critical=int(counts.get(critical_label, 0)),
+        high=int(counts.get(high_label, 0)),
+        by_priority=by_priority,
+        by_category_priority=by_category_priority,
+    )
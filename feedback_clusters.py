@@ -0,0 +1,227 @@
+"""
+Near-duplicate clustering for feedback texts.
+
+Texts are normalized (case, punctuation, whitespace) and hashed, so exact repeats map to
+their cluster with one lookup. New texts get a MinHash signature over character
+shingles; LSH banding finds candidate clusters, and a candidate is accepted when the
+estimated Jaccard similarity with its representative reaches SIMILARITY_THRESHOLD.
+Clusters, their LSH bands and the text -> cluster map live in the feedback DB
+(see db_schema), so assignments are stable across runs and processes.
+"""
+import hashlib
+import re
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from db_schema import CLUSTERS_TABLE_NAME, CLUSTER_TEXTS_TABLE_NAME, CLUSTER_BANDS_TABLE_NAME
+
+# --- CONSTANTS ---
+SHINGLE_SIZE = 5
+NUM_PERMUTATIONS = 64
+BANDS = 16
+ROWS_PER_BAND = NUM_PERMUTATIONS // BANDS
+# Estimated Jaccard similarity (share of equal MinHash values) needed to join a cluster
+SIMILARITY_THRESHOLD = 0.7
+LOOKUP_CHUNK = 500
+
+_MERSENNE_PRIME = (1 << 31) - 1
+_rng = np.random.RandomState(20240601)
+_PERM_A = _rng.randint(1, _MERSENNE_PRIME, size=NUM_PERMUTATIONS).astype(np.uint64)
+_PERM_B = _rng.randint(0, _MERSENNE_PRIME, size=NUM_PERMUTATIONS).astype(np.uint64)
+_NON_WORD = re.compile(r'[\W_]+')
+
+
+def normalize_text(text):
+    """Lowercase, punctuation-free, single-spaced form used for both hashing and shingling."""
+    return _NON_WORD.sub(' ', str(text).lower()).strip()
+
+
+def text_hash(normalized):
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+
+def minhash_signature(normalized):
+    """NUM_PERMUTATIONS min-hashes over the text's character shingles (uint32 array)."""
+    if len(normalized) <= SHINGLE_SIZE:
+        shingles = {normalized}
+    else:
+        shingles = {normalized[i:i + SHINGLE_SIZE] for i in range(len(normalized) - SHINGLE_SIZE + 1)}
+    values = np.fromiter(
+        (zlib.crc32(shingle.encode('utf-8')) & _MERSENNE_PRIME for shingle in shingles),
+        dtype=np.uint64, count=len(shingles)
+    )
+    hashed = (_PERM_A[:, None] * values[None, :] + _PERM_B[:, None]) % _MERSENNE_PRIME
+    return hashed.min(axis=1).astype(np.uint32)
+
+
+def band_keys(signature):
+    """One integer LSH bucket per band (band number in the high bits)."""
+    return [
+        (band << 32) | zlib.crc32(signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND].tobytes())
+        for band in range(BANDS)
+    ]
+
+
+def similarity(signature_a, signature_b):
+    return float(np.mean(signature_a == signature_b))
+
+
+def _chunks(items, size=LOOKUP_CHUNK):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _lookup_texts(conn, hashes):
+    found = {}
+    for chunk in _chunks(hashes):
+        found.update(conn.execute(
+            f"""SELECT text_hash, cluster_id FROM {CLUSTER_TEXTS_TABLE_NAME}
+                WHERE text_hash IN ({', '.join('?' for _ in chunk)})""",
+            chunk
+        ).fetchall())
+    return found
+
+
+def _candidate_clusters(conn, keys):
+    candidates = set()
+    for chunk in _chunks(keys):
+        candidates.update(cluster_id for (cluster_id,) in conn.execute(
+            f"""SELECT DISTINCT cluster_id FROM {CLUSTER_BANDS_TABLE_NAME}
+                WHERE band_key IN ({', '.join('?' for _ in chunk)})""",
+            chunk
+        ))
+    return candidates
+
+
+def _load_clusters(conn, cluster_ids, clusters):
+    """Adds (representative, signature) of the clusters not yet in `clusters`, one query per chunk."""
+    missing = sorted(set(cluster_ids).difference(clusters))
+    for chunk in _chunks(missing):
+        for cluster_id, representative, signature in conn.execute(
+            f"""SELECT cluster_id, representative, signature FROM {CLUSTERS_TABLE_NAME}
+                WHERE cluster_id IN ({', '.join('?' for _ in chunk)})""",
+            chunk
+        ):
+            clusters[cluster_id] = (representative, np.frombuffer(signature, dtype=np.uint32))
+
+
+def _best_match(signature, candidates, clusters):
+    """Candidate with the highest estimated similarity if it reaches the threshold (ties: first listed), else None."""
+    if not candidates:
+        return None
+    # All candidates verified in one vectorized comparison
+    scores = (np.stack([clusters[cluster_id][1] for cluster_id in candidates]) == signature).mean(axis=1)
+    best = int(scores.argmax())
+    return candidates[best] if scores[best] >= SIMILARITY_THRESHOLD else None
+
+
+def _store_new_clusters(conn, new_hashes, new_clusters, cluster_of_hash, clusters, snapshot_id):
+    """
+    Under the write lock: re-checks what other processes stored since the snapshot, inserts
+    the clusters still needed and the text -> cluster rows. Resolves cluster_of_hash in place.
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    with conn:
+        # Texts another process stored meanwhile keep that assignment
+        stored_meanwhile = _lookup_texts(conn, new_hashes)
+        concurrent = conn.execute(f"SELECT COALESCE(MAX(cluster_id), 0) FROM {CLUSTERS_TABLE_NAME}").fetchone()[0] > snapshot_id
+        resolved = {}  # provisional id -> stored cluster id
+        created = set()
+        for provisional_id, (keys, anchor_hash) in new_clusters.items():
+            representative, signature = clusters[provisional_id]
+            cluster_id = stored_meanwhile.get(anchor_hash)
+            if cluster_id is None and concurrent:
+                # Another process may have created a similar cluster since the snapshot
+                since = sorted(
+                    cluster_id for cluster_id in _candidate_clusters(conn, keys)
+                    if cluster_id > snapshot_id and cluster_id not in created
+                )
+                _load_clusters(conn, since, clusters)
+                cluster_id = _best_match(signature, since, clusters)
+            if cluster_id is None:
+                cluster_id = conn.execute(
+                    f"INSERT INTO {CLUSTERS_TABLE_NAME} (representative, signature) VALUES (?, ?)",
+                    (representative, signature.tobytes())
+                ).lastrowid
+                clusters[cluster_id] = (representative, signature)
+                conn.executemany(
+                    f"INSERT INTO {CLUSTER_BANDS_TABLE_NAME} (band_key, cluster_id) VALUES (?, ?)",
+                    ((key, cluster_id) for key in keys)
+                )
+                created.add(cluster_id)
+            resolved[provisional_id] = cluster_id
+
+        for value in new_hashes:
+            cluster_id = stored_meanwhile.get(value, cluster_of_hash[value])
+            cluster_of_hash[value] = resolved.get(cluster_id, cluster_id)
+        conn.executemany(
+            f"INSERT OR IGNORE INTO {CLUSTER_TEXTS_TABLE_NAME} (text_hash, cluster_id) VALUES (?, ?)",
+            ((value, cluster_of_hash[value]) for value in new_hashes)
+        )
+
+
+def assign_clusters(conn, texts, store=True):
+    """
+    Returns (cluster ids, representative texts) as Series aligned to `texts`, creating
+    clusters for texts that match none. Signatures and candidate matching run on plain
+    reads; the write lock (BEGIN IMMEDIATE) is only held to re-check what other
+    processes added meanwhile and insert the new clusters, so parallel backfill
+    processes and other writers don't queue behind the MinHash loop, and no two
+    processes ever create a cluster for the same text.
+    With store=False nothing is written: texts are matched against the stored clusters
+    and each other, and rows of clusters that would be new get a missing cluster id.
+    """
+    codes, uniques = pd.factorize(texts.fillna('').astype(str))
+    normalized = [normalize_text(text) for text in uniques]
+    hashes = [text_hash(value) for value in normalized]
+
+    if conn.in_transaction:
+        conn.commit()
+    # Clusters created after this id appeared while we were matching; they are re-checked under the lock
+    snapshot_id = conn.execute(f"SELECT COALESCE(MAX(cluster_id), 0) FROM {CLUSTERS_TABLE_NAME}").fetchone()[0]
+    cluster_of_hash = _lookup_texts(conn, sorted(set(hashes)))
+    clusters = {}  # cluster_id -> (representative, signature), loaded on demand
+    new_hashes = []
+    new_clusters = {}  # provisional id (negative, in creation order) -> (band keys, anchor text hash)
+    new_bands = {}  # band key -> provisional ids, so later texts in this call can join new clusters
+    for position, value in enumerate(normalized):
+        if hashes[position] in cluster_of_hash:
+            continue
+        signature = minhash_signature(value)
+        keys = band_keys(signature)
+
+        stored = sorted(_candidate_clusters(conn, keys))
+        _load_clusters(conn, stored, clusters)
+        provisional = sorted({cluster_id for key in keys for cluster_id in new_bands.get(key, ())}, reverse=True)
+        # Ties go to the oldest cluster: stored ones first, then this call's in creation order
+        best_id = _best_match(signature, stored + provisional, clusters)
+
+        if best_id is None:
+            # New cluster, anchored on this text: only representatives go into the bands, so
+            # clusters can't drift through chains of slightly-different members
+            best_id = -(len(new_clusters) + 1)
+            clusters[best_id] = (uniques[position], signature)
+            new_clusters[best_id] = (keys, hashes[position])
+            for key in keys:
+                new_bands.setdefault(key, []).append(best_id)
+        cluster_of_hash[hashes[position]] = best_id
+        new_hashes.append(hashes[position])
+
+    if new_hashes and store:
+        _store_new_clusters(conn, new_hashes, new_clusters, cluster_of_hash, clusters, snapshot_id)
+
+    unique_ids = [cluster_of_hash[value] for value in hashes]
+    _load_clusters(conn, unique_ids, clusters)
+
+    if store:
+        cluster_ids = pd.Series(np.asarray(unique_ids, dtype=np.int64)[codes], index=texts.index)
+    else:
+        # Provisional ids only mean something within this call
+        stored_ids = pd.array([cluster_id if cluster_id > 0 else None for cluster_id in unique_ids], dtype='Int64')
+        cluster_ids = pd.Series(stored_ids.take(codes), index=texts.index)
+    representatives = pd.Series(
+        np.array([clusters[cluster_id][0] for cluster_id in unique_ids], dtype=object)[codes], index=texts.index
+    )
+    return cluster_ids, representatives
@@ -1,135 +1,235 @@
-import pandas as pd
 import sqlite3
+import csv
+import json
 from datetime import datetime
 import random
+from db_schema import ensure_schema, RAW_COLUMNS
 
 DB_FILE = 'feedback_data.db' 
 TABLE_NAME = 'feedback_table'
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+DEFAULT_BATCH_SIZE = 5000
+# Rows per INSERT statement. Each statement that fires the search index triggers makes FTS5
+# flush a new segment, so one statement per row would cost a segment (and merges) per row.
+ROWS_PER_STATEMENT = 500
+FEEDBACK_COLUMNS = RAW_COLUMNS
+
+
+def connect_for_ingest(db_file=DB_FILE):
+    """Opens a connection tuned for sustained writes (WAL lets the dashboard keep reading meanwhile)."""
+    conn = sqlite3.connect(db_file)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    # Agar table exist nahi karti to banao (or migrate an older one in place)
+    ensure_schema(conn)
+    return conn
+
+
+def _to_row(record):
+    """Maps one feedback dict to a table row, keeping its own timestamp when it has one."""
+    timestamp = record.get('Date/Time')
+    if timestamp is None:
+        timestamp = datetime.now()
+    if isinstance(timestamp, datetime):
+        # Date/Time ko ISO format mein store karo (sqlite standard)
+        timestamp = timestamp.strftime(TIMESTAMP_FORMAT)
+    return (
+        timestamp,
+        record.get('Text'),
+        record.get('Sentiment'),
+        record.get('Confidence_Score'),
+        record.get('User_ID'),
+    )
+
+
+class FeedbackIngestor:
+    """
+    Bulk ingestion path: one reused connection, WAL mode, and executemany inside an explicit
+    transaction per batch. Accepts any iterable of feedback dicts, so memory stays flat.
+    """
+
+    def __init__(self, db_file=DB_FILE, batch_size=DEFAULT_BATCH_SIZE):
+        self.db_file = db_file
+        self.batch_size = batch_size
+        self.conn = connect_for_ingest(db_file)
+        self.rows_written = 0
+
+    def _write_batch(self, rows):
+        placeholders = '(' + ', '.join('?' for _ in FEEDBACK_COLUMNS) + ')'
+        columns = ', '.join(f'"{column}"' for column in FEEDBACK_COLUMNS)
+        with self.conn:
+            for start in range(0, len(rows), ROWS_PER_STATEMENT):
+                chunk = rows[start:start + ROWS_PER_STATEMENT]
+                self.conn.execute(
+                    f"INSERT INTO {TABLE_NAME} ({columns}) VALUES {', '.join([placeholders] * len(chunk))}",
+                    [value for row in chunk for value in row]
+                )
+        self.rows_written += len(rows)
+
+    def ingest(self, records):
+        """Writes all records in batches; returns the number of rows inserted."""
+        written_before = self.rows_written
+        batch = []
+        for record in records:
+            batch.append(_to_row(record))
+            if len(batch) >= self.batch_size:
+                self._write_batch(batch)
+                batch = []
+        if batch:
+            self._write_batch(batch)
+        return self.rows_written - written_before
+
+    def close(self):
+        if self.conn:
+            self.conn.close()
+            self.conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def ingest_feedback(records, db_file=DB_FILE, batch_size=DEFAULT_BATCH_SIZE):
+    """Streams an iterable of feedback dicts into the database; returns the row count."""
+    with FeedbackIngestor(db_file, batch_size) as ingestor:
+        return ingestor.ingest(records)
+
+
+def iter_jsonl(path):
+    """Yields feedback dicts from a JSON-lines file, one line at a time."""
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def iter_csv(path):
+    """Yields feedback dicts from a CSV file with a header row."""
+    with open(path, encoding='utf-8', newline='') as f:
+        for row in csv.DictReader(f):
+            row['Confidence_Score'] = float(row['Confidence_Score']) if row.get('Confidence_Score') else None
+            row['User_ID'] = int(row['User_ID']) if row.get('User_ID') else None
+            yield row
+
 
 def add_new_feedback(feedback_list):
     """Inserts a list of new feedback items into the SQLite database."""
-    conn = None
     try:
-        conn = sqlite3.connect(DB_FILE)
-        
-        # Agar table exist nahi karti to banao
-        conn.execute(f"""
-            CREATE TABLE IF NOT EXISTS {TABLE_NAME} (
-                "Date/Time" TEXT,
-                Text TEXT,
-                Sentiment TEXT,
-                Confidence_Score REAL,
-                User_ID INTEGER
-            )
-        """)
-        
-        # Convert the list of feedback into a DataFrame
-        df_new = pd.DataFrame(feedback_list)
-        
-        # Date/Time ko ISO format mein store karo (sqlite standard)
-        df_new['Date/Time'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-
-        # Append data to the existing table
-        df_new.to_sql(TABLE_NAME, conn, if_exists='append', index=False)
-        print(f"✅ Successfully inserted {len(feedback_list)} new feedback item(s) into {DB_FILE}.")
+        inserted = ingest_feedback(feedback_list)
+        print(f"✅ Successfully inserted {inserted} new feedback item(s) into {DB_FILE}.")
 
     except Exception as e:
         print(f"❌ Error inserting data: {e}")
-    finally:
-        if conn:
-            conn.close()
 
-if __name__ == '__main__':
-    
-    # --- Sample Feedback Texts for Variety (English) ---
-    sample_texts = [
-        'Login page is crashing every time I try to access. This is a critical issue!',
-        'The app is unusable after the last update. I lost all my settings.',
-        'Customer support took 5 days to reply, terrible and unacceptable service.',
-        'My order arrived damaged. Product quality is very poor.',
-        'Payment gateway failed multiple times, leading to a lost sale.',
-        'Website navigation is confusing and slow. Fix it ASAP.',
-        'The new search feature gives irrelevant results.',
-        'Refund process is too complicated and takes weeks.',
-        'I received the wrong item, quite disappointed with the shipping.',
-        'The mobile view of the dashboard looks broken.',
-        'I love the new product updates, very satisfied! Best purchase ever.',
-        'The user interface is fantastic! So intuitive and fast.',
-        'Customer support resolved my issue in minutes. Excellent service!',
-        'This is exactly what I was looking for. Top quality!',
-        'The checkout process was super smooth and fast. Great job!',
-        'Everything was fine, average experience.',
-        'The colors are nice, but the size is slightly off.',
-        'Just needed a quick check, data loaded correctly.',
-        'I wish there were more filtering options in the sidebar.',
-        'No major issues, but the font size could be larger.'
-    ]
-    
-    new_data = []
-    
-    # --- GENERATE 50 ENGLISH DATA ENTRIES ---
-    for i in range(50):
-        text = random.choice(sample_texts)
-        
-        # Smart Sentiment Assignment (Simulating AI for Priority)
-        if 'crash' in text or 'terrible' in text or 'broken' in text or 'poor quality' in text:
-            sentiment = 'Negative'
-            confidence = random.uniform(0.70, 0.99)
-        elif 'love' in text or 'satisfied' in text or 'excellent' in text or 'fantastic' in text:
-            sentiment = 'Positive'
-            confidence = random.uniform(0.85, 0.99)
-        else:
-            sentiment = random.choice(['Neutral', 'Negative', 'Positive'])
-            confidence = random.uniform(0.40, 0.85)
-            
+
+# --- Sample Feedback Texts for Variety (English) ---
+SAMPLE_TEXTS = [
+    'Login page is crashing every time I try to access. This is a critical issue!',
+    'The app is unusable after the last update. I lost all my settings.',
+    'Customer support took 5 days to reply, terrible and unacceptable service.',
+    'My order arrived damaged. Product quality is very poor.',
+    'Payment gateway failed multiple times, leading to a lost sale.',
+    'Website navigation is confusing and slow. Fix it ASAP.',
+    'The new search feature gives irrelevant results.',
+    'Refund process is too complicated and takes weeks.',
+    'I received the wrong item, quite disappointed with the shipping.',
+    'The mobile view of the dashboard looks broken.',
+    'I love the new product updates, very satisfied! Best purchase ever.',
+    'The user interface is fantastic! So intuitive and fast.',
+    'Customer support resolved my issue in minutes. Excellent service!',
+    'This is exactly what I was looking for. Top quality!',
+    'The checkout process was super smooth and fast. Great job!',
+    'Everything was fine, average experience.',
+    'The colors are nice, but the size is slightly off.',
+    'Just needed a quick check, data loaded correctly.',
+    'I wish there were more filtering options in the sidebar.',
+    'No major issues, but the font size could be larger.'
+]
+
+
+def simulate_sentiment(text, rng=random):
+    """Smart Sentiment Assignment (Simulating AI for Priority): returns (sentiment, confidence)."""
+    if 'crash' in text or 'terrible' in text or 'broken' in text or 'poor quality' in text:
+        return 'Negative', rng.uniform(0.70, 0.99)
+    if 'love' in text or 'satisfied' in text or 'excellent' in text or 'fantastic' in text:
+        return 'Positive', rng.uniform(0.85, 0.99)
+    sentiment = rng.choice(['Neutral', 'Negative', 'Positive'])
+    return sentiment, rng.uniform(0.40, 0.85)
+
+
+def iter_sample_feedback(count, rng=random):
+    """Yields synthetic English feedback entries with simulated sentiment/confidence."""
+    for i in range(count):
+        text = rng.choice(SAMPLE_TEXTS)
+        sentiment, confidence = simulate_sentiment(text, rng)
         
-        entry = {
+        yield {
             'Text': text,
             'Sentiment': sentiment,
             'Confidence_Score': confidence,
-            'User_ID': 1001 + random.randint(1, 100)
+            'User_ID': 1001 + rng.randint(1, 100)
         }
-        new_data.append(entry)
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Add feedback to the SQLite database (sample data by default)")
+    parser.add_argument('--jsonl', help="Stream feedback records from a JSON-lines file")
+    parser.add_argument('--csv', help="Stream feedback records from a CSV file")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    if args.jsonl or args.csv:
+        source = iter_jsonl(args.jsonl) if args.jsonl else iter_csv(args.csv)
+        inserted = ingest_feedback(source, batch_size=args.batch_size)
+        print(f"✅ Successfully inserted {inserted} feedback item(s) into {DB_FILE}.")
+
+    else:
+        # --- GENERATE 50 ENGLISH DATA ENTRIES ---
+        new_data = list(iter_sample_feedback(50))
     
-    # --- ADD 5 REGIONAL LANGUAGE (HINDI) TEST ENTRIES ---
-    new_data.extend([
-        {
-            # Entry 1: Critical Issue in Hindi (P1 expected) - Website/App issue
-            'Text': 'वेबसाइट क्रैश हो रही है और भुगतान नहीं हो पा रहा है। यह एक गंभीर समस्या है!', 
-            'Sentiment': 'Negative', 
-            'Confidence_Score': random.uniform(0.90, 0.99), 
-            'User_ID': 8001
-        },
-        {
-            # Entry 2: High Priority Negative (P2 expected) - Customer Support/Delivery issue
-            'Text': 'मैंने जो उत्पाद ऑर्डर किया था वह बहुत देर से आया और ग्राहक सहायता ने जवाब नहीं दिया।', 
-            'Sentiment': 'Negative',
-            'Confidence_Score': random.uniform(0.70, 0.80),
-            'User_ID': 8002
-        },
-        {
-            # Entry 3: Top Positive (P3 expected) - Product Quality
-            'Text': 'उत्पाद बहुत अच्छा है, मुझे यह वास्तव में पसंद आया। मैं बहुत संतुष्ट हूँ!', 
-            'Sentiment': 'Positive',
-            'Confidence_Score': random.uniform(0.95, 0.99),
-            'User_ID': 8003
-        },
-        {
-            # Entry 4: Neutral/Review Later (P4 expected) - General/Other
-            'Text': 'डिलीवरी का समय ठीक था, लेकिन पैकेजिंग थोड़ी खराब थी।', 
-            'Sentiment': 'Neutral',
-            'Confidence_Score': random.uniform(0.50, 0.65),
-            'User_ID': 8004
-        },
-        {
-            # Entry 5: Negative about Product Quality (P2 expected)
-            'Text': 'उत्पाद की गुणवत्ता बहुत खराब है और यह कुछ ही दिनों में टूट गया।', 
-            'Sentiment': 'Negative',
-            'Confidence_Score': random.uniform(0.75, 0.85),
-            'User_ID': 8005
-        }
-    ])
+        # --- ADD 5 REGIONAL LANGUAGE (HINDI) TEST ENTRIES ---
+        new_data.extend([
+            {
+                # Entry 1: Critical Issue in Hindi (P1 expected) - Website/App issue
+                'Text': 'वेबसाइट क्रैश हो रही है और भुगतान नहीं हो पा रहा है। यह एक गंभीर समस्या है!', 
+                'Sentiment': 'Negative', 
+                'Confidence_Score': random.uniform(0.90, 0.99), 
+                'User_ID': 8001
+            },
+            {
+                # Entry 2: High Priority Negative (P2 expected) - Customer Support/Delivery issue
+                'Text': 'मैंने जो उत्पाद ऑर्डर किया था वह बहुत देर से आया और ग्राहक सहायता ने जवाब नहीं दिया।', 
+                'Sentiment': 'Negative',
+                'Confidence_Score': random.uniform(0.70, 0.80),
+                'User_ID': 8002
+            },
+            {
+                # Entry 3: Top Positive (P3 expected) - Product Quality
+                'Text': 'उत्पाद बहुत अच्छा है, मुझे यह वास्तव में पसंद आया। मैं बहुत संतुष्ट हूँ!', 
+                'Sentiment': 'Positive',
+                'Confidence_Score': random.uniform(0.95, 0.99),
+                'User_ID': 8003
+            },
+            {
+                # Entry 4: Neutral/Review Later (P4 expected) - General/Other
+                'Text': 'डिलीवरी का समय ठीक था, लेकिन पैकेजिंग थोड़ी खराब थी।', 
+                'Sentiment': 'Neutral',
+                'Confidence_Score': random.uniform(0.50, 0.65),
+                'User_ID': 8004
+            },
+            {
+                # Entry 5: Negative about Product Quality (P2 expected)
+                'Text': 'उत्पाद की गुणवत्ता बहुत खराब है और यह कुछ ही दिनों में टूट गया।', 
+                'Sentiment': 'Negative',
+                'Confidence_Score': random.uniform(0.75, 0.85),
+                'User_ID': 8005
+            }
+        ])
 
-    # Insert all data into the database
-    add_new_feedback(new_data)
-    print("\n--- To check the dashboard, run: streamlit run app.py ---")
\ No newline at end of file
+        # Insert all data into the database
+        add_new_feedback(new_data)
+        print("\n--- To check the dashboard, run: streamlit run app.py ---")
\ No newline at end of file
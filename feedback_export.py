@@ -0,0 +1,141 @@
+"""
+Filtered feedback exports (CSV, gzipped CSV, Parquet).
+
+Rows are streamed from SQLite in chunks and written straight to an artifact file, so
+peak memory stays at roughly one chunk regardless of export size. Artifacts are cached
+on disk by (format, filter set, data version), so repeated downloads and dashboard
+reruns don't pay the serialization cost again.
+"""
+import hashlib
+import importlib.util
+import os
+import zlib
+
+import pandas as pd
+
+from db_schema import TABLE_NAME
+from feedback_queries import DB_FILE_NAME, DISPLAY_COLUMNS, build_where, connect
+
+# --- CONSTANTS ---
+EXPORT_DIR = os.environ.get('FEEDBACK_EXPORT_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'exports'))
+EXPORT_CHUNK_SIZE = 50000
+MAX_CACHED_EXPORTS = 8
+
+# Format key -> (file extension, MIME type)
+EXPORT_FORMATS = {
+    'csv': ('csv', 'text/csv'),
+    'csv.gz': ('csv.gz', 'application/gzip'),
+}
+# Parquet export is optional; pyarrow is only imported when a Parquet file is written
+if importlib.util.find_spec('pyarrow') is not None:
+    EXPORT_FORMATS['parquet'] = ('parquet', 'application/vnd.apache.parquet')
+
+
+# --- STREAMING ---
+
+def iter_export_frames(conn, filters, priority_order, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yields the filtered rows, in dashboard order, as DataFrames of at most chunk_size rows."""
+    where, params = build_where(filters, priority_order)
+    return pd.read_sql(
+        f"""SELECT {', '.join(DISPLAY_COLUMNS)}
+            FROM {TABLE_NAME}
+            WHERE {where}
+            ORDER BY Priority_Rank ASC, Scored_Confidence DESC, id ASC""",
+        conn, params=params, chunksize=chunk_size
+    )
+
+
+def iter_csv_bytes(frames, compress=False):
+    """Encodes a stream of frames as one CSV (header once), optionally gzip-compressed."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None  # wbits=31 -> gzip container
+    header = True
+    for frame in frames:
+        data = frame.to_csv(index=False, header=header).encode('utf-8')
+        header = False
+        yield compressor.compress(data) if compressor else data
+    if header:
+        # No rows: still emit the header so the file is a valid, empty CSV
+        data = ','.join(column.split(' AS ')[-1].strip('"') for column in DISPLAY_COLUMNS).encode('utf-8') + b'\n'
+        yield compressor.compress(data) if compressor else data
+    if compressor:
+        yield compressor.flush()
+
+
+def write_parquet(frames, path):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    # Fixed schema so every chunk (including all-NULL ones) writes the same columns
+    schema = pa.schema([
+        ('id', pa.int64()),
+        ('Date/Time', pa.string()),
+        ('Priority', pa.string()),
+        ('Category', pa.string()),
+        ('Confidence_Score', pa.float64()),
+        ('Text', pa.string()),
+        ('Original_Text', pa.string()),
+        ('User_ID', pa.int64()),
+        ('Priority_Rank', pa.int64()),
+    ])
+    with pq.ParquetWriter(path, schema) as writer:
+        for frame in frames:
+            writer.write_table(pa.Table.from_pandas(frame, schema=schema, preserve_index=False))
+
+
+def write_export(frames, path, fmt):
+    """Streams frames into an export file of the given format."""
+    if fmt == 'parquet':
+        write_parquet(frames, path)
+        return
+    with open(path, 'wb') as f:
+        for data in iter_csv_bytes(frames, compress=fmt == 'csv.gz'):
+            f.write(data)
+
+
+# --- CACHED ARTIFACTS ---
+
+def export_path(filters, data_version, fmt, export_dir=EXPORT_DIR):
+    """Artifact path for one (format, filter set, data version)."""
+    key = hashlib.sha256(repr((fmt, tuple(filters), data_version)).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(export_dir, f"feedback_export_{key}.{EXPORT_FORMATS[fmt][0]}")
+
+
+def _prune_exports(export_dir, keep):
+    paths = [
+        os.path.join(export_dir, name) for name in os.listdir(export_dir)
+        if name.startswith('feedback_export_') and not name.endswith('.tmp')
+    ]
+    paths.sort(key=os.path.getmtime, reverse=True)
+    for path in paths[keep:]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def get_export(filters, priority_order, data_version, fmt='csv', db_file=DB_FILE_NAME, export_dir=EXPORT_DIR):
+    """
+    Returns the path of the export artifact, generating it only if this (format, filters,
+    data version) hasn't been exported yet. Written to a temp file and renamed, so a
+    half-written artifact is never served.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    os.makedirs(export_dir, exist_ok=True)
+    path = export_path(filters, data_version, fmt, export_dir)
+    if os.path.exists(path):
+        os.utime(path)  # keep recently used artifacts out of the pruning
+        return path
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    conn = connect(db_file)
+    try:
+        write_export(iter_export_frames(conn, filters, priority_order), tmp_path, fmt)
+        os.replace(tmp_path, path)
+    finally:
+        conn.close()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    _prune_exports(export_dir, MAX_CACHED_EXPORTS)
+    return path
@@ -0,0 +1,462 @@
+"""
+Local HTTP ingestion service: a write-behind queue in front of feedback_data.db.
+
+POST /feedback takes one feedback object or a JSON array of them and answers 202 as
+soon as the items are validated and buffered (and appended to the log, with --log).
+A single writer task drains the buffer into SQLite, grouping whatever has queued up
+meanwhile into one transaction of at most WRITE_BATCH_ROWS rows. Producers never open
+the DB, so there is one writer and nothing to fight over the write lock. Once
+QUEUE_MAX_ROWS rows are waiting, POSTs get 503 with Retry-After until the writer
+catches up. GET /health reports the queue depth and counters.
+
+Plain asyncio streams, no web framework: HTTP/1.1 with keep-alive and Content-Length bodies.
+
+Usage: python feedback_ingest_service.py                      # http://127.0.0.1:8765
+       python feedback_ingest_service.py --log ingest.log     # acknowledged items survive a crash
+       curl -d '{"Text": "Checkout keeps failing", "User_ID": 1042}' localhost:8765/feedback
+"""
+import argparse
+import asyncio
+import json
+import os
+import signal
+import sqlite3
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import perf_metrics
+from feedback_collector import FeedbackIngestor, TIMESTAMP_FORMAT
+from perf_metrics import span
+
+# --- CONSTANTS ---
+DB_FILE_NAME = 'feedback_data.db'
+HOST = '127.0.0.1'
+PORT = int(os.environ.get('FEEDBACK_INGEST_PORT', 8765))
+# Rows buffered (accepted but not yet committed) before POSTs are turned away
+QUEUE_MAX_ROWS = 50000
+# Rows per writer transaction; a group is whatever queued up while the previous one was written
+WRITE_BATCH_ROWS = 5000
+MAX_BATCH_ITEMS = 1000
+MAX_BODY_BYTES = 1 << 20
+RETRY_AFTER_SECONDS = 1
+WRITE_RETRY_SECONDS = 1.0
+KEEP_ALIVE_SECONDS = 30
+METRICS_FLUSH_SECONDS = 10
+# Block size used when looking for the end of the last complete line in the append log
+LOG_TAIL_BLOCK_BYTES = 1 << 16
+
+_REASONS = {
+    200: 'OK', 202: 'Accepted', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+    411: 'Length Required', 413: 'Payload Too Large', 503: 'Service Unavailable',
+}
+
+
+# --- VALIDATION ---
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def parse_feedback(item, received_at):
+    """Checks one posted item and returns it as a record for FeedbackIngestor; raises ValueError."""
+    if not isinstance(item, dict):
+        raise ValueError("each item must be a JSON object")
+    text = item.get('Text')
+    if not isinstance(text, str) or not text.strip():
+        raise ValueError("'Text' must be a non-empty string")
+
+    timestamp = item.get('Date/Time')
+    if timestamp is None:
+        timestamp = received_at
+    else:
+        try:
+            timestamp = datetime.fromisoformat(str(timestamp)).strftime(TIMESTAMP_FORMAT)
+        except ValueError:
+            raise ValueError("'Date/Time' must be an ISO timestamp") from None
+
+    sentiment = item.get('Sentiment')
+    if sentiment is not None and not isinstance(sentiment, str):
+        raise ValueError("'Sentiment' must be a string")
+    confidence = item.get('Confidence_Score')
+    if confidence is not None and not _is_number(confidence):
+        raise ValueError("'Confidence_Score' must be a number")
+    user_id = item.get('User_ID')
+    if user_id is not None and not (_is_number(user_id) and float(user_id).is_integer()):
+        raise ValueError("'User_ID' must be an integer")
+
+    return {
+        'Date/Time': timestamp,
+        'Text': text,
+        'Sentiment': sentiment,
+        'Confidence_Score': confidence,
+        'User_ID': None if user_id is None else int(user_id),
+    }
+
+
+def parse_body(body, received_at):
+    """Records from a POST body (one object or an array); raises ValueError with a client-facing message."""
+    try:
+        payload = json.loads(body)
+    except (UnicodeDecodeError, json.JSONDecodeError):
+        raise ValueError("body must be JSON") from None
+    items = payload if isinstance(payload, list) else [payload]
+    if not items:
+        raise ValueError("empty batch")
+    records = []
+    for position, item in enumerate(items):
+        try:
+            records.append(parse_feedback(item, received_at))
+        except ValueError as e:
+            raise ValueError(f"item {position}: {e}" if len(items) > 1 else str(e)) from None
+    return records
+
+
+# --- APPEND LOG ---
+
+class AppendLog:
+    """
+    Accepted batches as JSON lines, appended before the 202 is sent. The offset up to
+    which lines are stored in SQLite is kept in `<path>.committed`; on start, lines past
+    it are queued again. A crash between a commit and the offset update repeats that
+    one group (at-least-once). Lines are flushed to the OS, not fsynced: they survive
+    the process dying, not the machine. A line torn by a crash was never acknowledged
+    and is cut off on open, so the next append starts on a line of its own.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.offset_path = f"{path}.committed"
+        if os.path.exists(path):
+            self._drop_torn_tail()
+        self.file = open(path, 'ab')
+
+    def _drop_torn_tail(self):
+        """Truncates the log after its last newline (a no-op when it ends with one)."""
+        with open(self.path, 'rb+') as f:
+            end = position = f.seek(0, os.SEEK_END)
+            while position > 0:
+                block_start = max(0, position - LOG_TAIL_BLOCK_BYTES)
+                f.seek(block_start)
+                newline = f.read(position - block_start).rfind(b'\n')
+                if newline >= 0:
+                    position = block_start + newline + 1
+                    break
+                position = block_start
+            if position < end:
+                f.truncate(position)
+
+    def _committed(self):
+        try:
+            with open(self.offset_path, encoding='utf-8') as f:
+                return int(f.read().strip() or 0)
+        except (OSError, ValueError):
+            return 0
+
+    def _write_offset(self, offset):
+        tmp_path = f"{self.offset_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(str(offset))
+        os.replace(tmp_path, self.offset_path)
+
+    def pending(self):
+        """(records, end offset) for every complete line not yet stored, in order."""
+        batches = []
+        with open(self.path, 'rb') as f:
+            f.seek(self._committed())
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break  # torn last line: it was never acknowledged
+                batches.append((json.loads(line), f.tell()))
+        return batches
+
+    def append(self, records):
+        self.file.write(json.dumps(records, ensure_ascii=False).encode('utf-8') + b'\n')
+        self.file.flush()
+        return self.file.tell()
+
+    def commit(self, offset):
+        """Marks everything up to `offset` as stored; the log starts over once it is fully stored."""
+        if offset != self.file.tell():
+            self._write_offset(offset)
+            return
+        # Offset first: a crash before the truncate only replays (never skips) lines
+        self._write_offset(0)
+        self.file.truncate(0)
+        self.file.seek(0)
+
+    def close(self):
+        self.file.close()
+
+
+# --- SERVICE ---
+
+class IngestService:
+    """
+    The buffer, its single SQLite writer and the HTTP front end. Buffered rows count
+    against max_queue_rows until they are committed, so the bound covers the group
+    being written too.
+    """
+
+    def __init__(self, db_file=DB_FILE_NAME, max_queue_rows=QUEUE_MAX_ROWS,
+                 write_batch_rows=WRITE_BATCH_ROWS, log_path=None):
+        self.db_file = db_file
+        self.max_queue_rows = max_queue_rows
+        self.write_batch_rows = max(write_batch_rows, MAX_BATCH_ITEMS)
+        self.log = AppendLog(log_path) if log_path else None
+        self.pending = deque()  # (records, log offset), in arrival order
+        self.queued_rows = 0
+        self.stats = {'accepted': 0, 'written': 0, 'rejected': 0, 'transactions': 0, 'write_errors': 0}
+        self.closing = False
+        # Set when the writer stops on an error retrying can't fix; nothing is accepted after that
+        self.writer_error = None
+        # One thread owns the connection (sqlite3 objects stay on the thread that made them)
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='feedback-writer')
+        self.ingestor = None
+        self.last_metrics_flush = time.time()
+        self.server = None
+        self.ready = None
+        self.writer_task = None
+        self.connections = set()
+
+    # Buffer
+    def offer(self, records):
+        """Buffers records; False when the queue is full (the caller answers 503)."""
+        if self.closing or self.writer_error is not None or self.queued_rows + len(records) > self.max_queue_rows:
+            self.stats['rejected'] += 1
+            return False
+        offset = self.log.append(records) if self.log else None
+        self._enqueue(records, offset)
+        self.stats['accepted'] += len(records)
+        return True
+
+    def _enqueue(self, records, offset):
+        self.pending.append((records, offset))
+        self.queued_rows += len(records)
+        self.ready.set()
+
+    def _take_group(self):
+        """Pops queued batches up to write_batch_rows (at least one); returns (records, last log offset)."""
+        records, offset = self.pending.popleft()
+        group = list(records)
+        while self.pending and len(group) + len(self.pending[0][0]) <= self.write_batch_rows:
+            records, offset = self.pending.popleft()
+            group.extend(records)
+        return group, offset
+
+    # Writer
+    def _write(self, records):
+        """Runs on the writer thread: one transaction per group."""
+        if self.ingestor is None:
+            self.ingestor = FeedbackIngestor(self.db_file, batch_size=self.write_batch_rows)
+        with span('ingest.write', rows=len(records)):
+            written = self.ingestor.ingest(records)
+        if time.time() - self.last_metrics_flush >= METRICS_FLUSH_SECONDS:
+            self.last_metrics_flush = time.time()
+            perf_metrics.flush(self.ingestor.conn)
+        return written
+
+    def _close_ingestor(self):
+        if self.ingestor is not None:
+            perf_metrics.flush(self.ingestor.conn)
+            self.ingestor.close()
+            self.ingestor = None
+
+    async def _writer(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            if not self.pending:
+                if self.closing:
+                    return
+                self.ready.clear()
+                await self.ready.wait()
+                continue
+            records, offset = self._take_group()
+            while True:
+                try:
+                    await loop.run_in_executor(self.executor, self._write, records)
+                    break
+                except sqlite3.Error as e:
+                    # Acknowledged rows are never dropped: keep retrying (the queue fills meanwhile)
+                    self.stats['write_errors'] += 1
+                    print(f"Write of {len(records):,} rows failed, retrying in {WRITE_RETRY_SECONDS}s: {e}")
+                    await asyncio.sleep(WRITE_RETRY_SECONDS)
+                except Exception as e:
+                    # Not a database hiccup, so retrying won't help: stop accepting and let serve() shut down
+                    self.stats['write_errors'] += 1
+                    self.writer_error = f"{type(e).__name__}: {e}"
+                    print(f"Writer failed on {len(records):,} rows, no longer accepting feedback: {self.writer_error}")
+                    return
+            self.queued_rows -= len(records)
+            self.stats['written'] += len(records)
+            self.stats['transactions'] += 1
+            if self.log and offset is not None:
+                self.log.commit(offset)
+
+    # HTTP
+    def health(self):
+        return dict(self.stats, queued=self.queued_rows, max_queue_rows=self.max_queue_rows,
+                    writer_error=self.writer_error)
+
+    def _route(self, method, path, body):
+        """Returns (status, payload, extra headers)."""
+        path = path.split('?', 1)[0]
+        if path == '/health':
+            if method != 'GET':
+                return 405, {'error': 'use GET'}, {}
+            return 200, self.health(), {}
+        if path != '/feedback':
+            return 404, {'error': 'not found'}, {}
+        if method != 'POST':
+            return 405, {'error': 'use POST'}, {}
+        if self.writer_error is not None:
+            return 503, {'error': 'feedback is not being stored (writer failed)'}, {}
+
+        try:
+            records = parse_body(body, datetime.now().strftime(TIMESTAMP_FORMAT))
+        except ValueError as e:
+            return 400, {'error': str(e)}, {}
+        if len(records) > MAX_BATCH_ITEMS:
+            return 413, {'error': f"at most {MAX_BATCH_ITEMS} items per request"}, {}
+        if not self.offer(records):
+            return 503, {'error': 'queue full, retry later'}, {'Retry-After': str(RETRY_AFTER_SECONDS)}
+        return 202, {'accepted': len(records)}, {}
+
+    async def _handle(self, reader, writer):
+        self.connections.add(writer)
+        try:
+            while True:
+                try:
+                    request_line = await asyncio.wait_for(reader.readline(), KEEP_ALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    break
+                if not request_line:
+                    break
+                method, path, version = request_line.decode('latin-1').split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+                length = _content_length(headers)
+                # Without a usable length the body can't be skipped, so those responses close the connection
+                if 'chunked' in headers.get('transfer-encoding', '').lower():
+                    status, payload, extra, keep_alive = 411, {'error': 'send a Content-Length'}, {}, False
+                elif length is None:
+                    status, payload, extra, keep_alive = 400, {'error': 'invalid Content-Length'}, {}, False
+                elif length > MAX_BODY_BYTES:
+                    status, payload, extra, keep_alive = 413, {'error': f"body over {MAX_BODY_BYTES} bytes"}, {}, False
+                else:
+                    body = await reader.readexactly(length) if length else b''
+                    status, payload, extra = self._route(method, path, body)
+                writer.write(_response(status, payload, keep_alive, extra))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass  # client went away or sent something that isn't HTTP
+        finally:
+            self.connections.discard(writer)
+            writer.close()
+
+    # Lifecycle
+    async def start(self, host=HOST, port=PORT):
+        self.ready = asyncio.Event()
+        if self.log:
+            replayed = self.log.pending()
+            for records, offset in replayed:
+                self._enqueue(records, offset)
+            if replayed:
+                print(f"Replaying {self.queued_rows:,} logged rows not yet stored.")
+        self.writer_task = asyncio.create_task(self._writer())
+        self.server = await asyncio.start_server(self._handle, host, port)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        """Stops accepting, drains the buffer into SQLite, then closes the connection."""
+        self.closing = True
+        self.server.close()
+        for writer in list(self.connections):
+            writer.close()
+        await self.server.wait_closed()
+        self.ready.set()
+        await self.writer_task
+        await asyncio.get_running_loop().run_in_executor(self.executor, self._close_ingestor)
+        self.executor.shutdown()
+        if self.log:
+            self.log.close()
+
+
+def _content_length(headers):
+    """The request's Content-Length (0 when absent), or None if it isn't a non-negative integer."""
+    try:
+        length = int(headers.get('content-length') or 0)
+    except ValueError:
+        return None
+    return length if length >= 0 else None
+
+
+def _response(status, payload, keep_alive, extra_headers):
+    body = json.dumps(payload).encode('utf-8')
+    headers = [
+        f"HTTP/1.1 {status} {_REASONS[status]}",
+        'Content-Type: application/json',
+        f"Content-Length: {len(body)}",
+        f"Connection: {'keep-alive' if keep_alive else 'close'}",
+    ] + [f"{name}: {value}" for name, value in extra_headers.items()]
+    return ('\r\n'.join(headers) + '\r\n\r\n').encode('latin-1') + body
+
+
+async def serve(db_file=DB_FILE_NAME, host=HOST, port=PORT, log_path=None,
+                max_queue_rows=QUEUE_MAX_ROWS, write_batch_rows=WRITE_BATCH_ROWS):
+    """
+    Runs the service until SIGINT/SIGTERM (or until the writer fails), then drains the
+    buffer before returning. Returns False if the writer failed.
+    """
+    loop = asyncio.get_running_loop()
+    stop_requested = asyncio.Event()
+
+    def request_stop(*_):
+        loop.call_soon_threadsafe(stop_requested.set)
+
+    signal.signal(signal.SIGINT, request_stop)
+    signal.signal(signal.SIGTERM, request_stop)
+
+    service = IngestService(db_file, max_queue_rows, write_batch_rows, log_path)
+    bound_port = await service.start(host, port)
+    print(f"Listening on http://{host}:{bound_port} (queue {max_queue_rows:,} rows, "
+          f"groups of up to {service.write_batch_rows:,})", flush=True)
+    stop_wait = asyncio.create_task(stop_requested.wait())
+    await asyncio.wait({stop_wait, service.writer_task}, return_when=asyncio.FIRST_COMPLETED)
+    stop_wait.cancel()
+    if service.writer_error is None:
+        print(f"Shutting down, writing {service.queued_rows:,} buffered rows...", flush=True)
+    await service.stop()
+    stats = service.stats
+    print(f"Stopped: {stats['written']:,} rows in {stats['transactions']:,} transactions, "
+          f"{stats['rejected']:,} requests turned away.", flush=True)
+    if service.writer_error is not None:
+        kept = f"; they are replayed from {log_path} on the next start" if log_path else ""
+        print(f"❌ Writer failed ({service.writer_error}): {service.queued_rows:,} acknowledged rows not stored{kept}.",
+              flush=True)
+        return False
+    return True
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Accept feedback over HTTP and write it to SQLite in groups")
+    parser.add_argument('--db', default=DB_FILE_NAME, help="SQLite database file")
+    parser.add_argument('--host', default=HOST)
+    parser.add_argument('--port', type=int, default=PORT, help="0 picks a free port")
+    parser.add_argument('--log', default=None, help="Append log for accepted items (replayed on start)")
+    parser.add_argument('--queue-rows', type=int, default=QUEUE_MAX_ROWS, help="Buffered rows before 503s")
+    parser.add_argument('--batch-rows', type=int, default=WRITE_BATCH_ROWS, help="Rows per writer transaction")
+    args = parser.parse_args()
+
+    if not asyncio.run(serve(args.db, args.host, args.port, args.log, args.queue_rows, args.batch_rows)):
+        raise SystemExit(1)
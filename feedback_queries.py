@@ -0,0 +1,270 @@
+import re
+import sqlite3
+from collections import namedtuple
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+
+from db_schema import TABLE_NAME, CLUSTERS_TABLE_NAME, SEARCH_TABLE_NAME, ensure_schema, table_exists
+
+# --- CONSTANTS ---
+DB_FILE_NAME = 'feedback_data.db'
+DEFAULT_PAGE_SIZE = 50
+# Relevance (bm25) is ranked among the newest SEARCH_RANK_WINDOW matches that pass the filters:
+# exact for selective queries, and a bounded cost for words found in a large share of all feedback
+SEARCH_RANK_WINDOW = 5000
+# Search match counts stop here, for the same reason
+SEARCH_COUNT_LIMIT = 1000
+# highlight() markers around matched terms in search results
+HIGHLIGHT_OPEN = '«'
+HIGHLIGHT_CLOSE = '»'
+
+# Columns shown in the dashboard table ('Text' is the English translation)
+DISPLAY_COLUMNS = [
+    'id',
+    '"Date/Time"',
+    'Priority',
+    'Category',
+    'Scored_Confidence AS Confidence_Score',
+    'Translated_Text AS Text',
+    'Text AS Original_Text',
+    'User_ID',
+    'Priority_Rank',
+]
+
+# Sidebar filter state. priorities/categories are lists of labels; None means "no filter".
+# start_date/end_date are inclusive 'YYYY-MM-DD' days; None leaves that end of the range open.
+FeedbackFilters = namedtuple(
+    'FeedbackFilters', ['priorities', 'categories', 'min_confidence', 'start_date', 'end_date'],
+    defaults=(None, None)
+)
+
+# Keyset cursor: the sort key of the last row on a page
+PageCursor = namedtuple('PageCursor', ['priority_rank', 'confidence', 'id'])
+
+
+def connect(db_file=DB_FILE_NAME):
+    conn = sqlite3.connect(db_file)
+    ensure_schema(conn)
+    return conn
+
+
+def build_where(filters, priority_order):
+    """Turns the filter state into a parameterized WHERE clause (only processed rows)."""
+    clauses = ["Priority_Rank IS NOT NULL"]
+    params = []
+
+    if filters.priorities is not None:
+        # Filter on the rank so the (Priority_Rank, Scored_Confidence, Category) index is used
+        ranks = sorted({priority_order[label] for label in filters.priorities if label in priority_order})
+        if not ranks:
+            return "0", []
+        clauses.append(f"Priority_Rank IN ({', '.join('?' for _ in ranks)})")
+        params.extend(ranks)
+
+    if filters.categories is not None:
+        if not filters.categories:
+            return "0", []
+        clauses.append(f"Category IN ({', '.join('?' for _ in filters.categories)})")
+        params.extend(filters.categories)
+
+    if filters.min_confidence is not None:
+        clauses.append("Scored_Confidence >= ?")
+        params.append(float(filters.min_confidence))
+
+    # Timestamps are stored as 'YYYY-MM-DD HH:MM:SS' text, so day bounds compare as strings
+    if filters.start_date is not None:
+        clauses.append('"Date/Time" >= ?')
+        params.append(str(filters.start_date))
+    if filters.end_date is not None:
+        clauses.append('"Date/Time" < ?')
+        params.append(day_after(filters.end_date))
+
+    return " AND ".join(clauses), params
+
+
+def day_after(day):
+    return (date.fromisoformat(str(day)) + timedelta(days=1)).isoformat()
+
+
+def date_bounds(conn):
+    """First and last day with feedback as dates (None, None if there is none); two index lookups."""
+    first, last = conn.execute(
+        f'SELECT MIN("Date/Time"), MAX("Date/Time") FROM {TABLE_NAME} WHERE "Date/Time" IS NOT NULL'
+    ).fetchone()
+    if first is None:
+        return None, None
+    return datetime.fromisoformat(first[:10]).date(), datetime.fromisoformat(last[:10]).date()
+
+
+def fetch_page(conn, filters, priority_order, after=None, page_size=DEFAULT_PAGE_SIZE):
+    """
+    Returns (page frame, cursor for the next page or None) using keyset pagination on
+    (Priority_Rank ASC, Scored_Confidence DESC, id ASC), so deep pages cost the same as the first.
+    """
+    where, params = build_where(filters, priority_order)
+    if after is not None:
+        where += """ AND (
+            Priority_Rank > ?
+            OR (Priority_Rank = ? AND (Scored_Confidence < ? OR (Scored_Confidence = ? AND id > ?)))
+        )"""
+        params = params + [after.priority_rank, after.priority_rank, after.confidence, after.confidence, after.id]
+
+    df = pd.read_sql(
+        f"""SELECT {', '.join(DISPLAY_COLUMNS)}
+            FROM {TABLE_NAME}
+            WHERE {where}
+            ORDER BY Priority_Rank ASC, Scored_Confidence DESC, id ASC
+            LIMIT ?""",
+        conn, params=params + [page_size + 1]
+    )
+
+    next_cursor = None
+    if len(df) > page_size:
+        df = df.iloc[:page_size]
+        last = df.iloc[-1]
+        next_cursor = PageCursor(int(last['Priority_Rank']), float(last['Confidence_Score']), int(last['id']))
+    return df, next_cursor
+
+
+# Rows processed before clustering existed count as their own cluster
+CLUSTER_KEY = "COALESCE(Cluster_Id, -id)"
+
+
+def fetch_cluster_page(conn, filters, priority_order, after=None, page_size=DEFAULT_PAGE_SIZE):
+    """
+    Near-duplicate clusters among the filtered rows: member count, distinct users and the
+    highest priority of any member, ordered by that priority and then cluster size.
+    Returns (page frame, offset of the next page or None); `after` is an offset.
+    """
+    where, params = build_where(filters, priority_order)
+    offset = after or 0
+    df = pd.read_sql(
+        f"""SELECT g.*, c.representative AS Original_Text
+            FROM (
+                SELECT {CLUSTER_KEY} AS Cluster_Id,
+                       MIN(Priority_Rank) AS Priority_Rank,
+                       COUNT(*) AS Count,
+                       COUNT(DISTINCT User_ID) AS Users,
+                       MAX(Scored_Confidence) AS Max_Confidence,
+                       MAX("Date/Time") AS Last_Seen,
+                       MIN(Category) AS Category,
+                       MIN(Translated_Text) AS Text,
+                       MIN(Text) AS Member_Text
+                FROM {TABLE_NAME}
+                WHERE {where}
+                GROUP BY {CLUSTER_KEY}
+                ORDER BY Priority_Rank ASC, Count DESC, Cluster_Id ASC
+                LIMIT ? OFFSET ?
+            ) g
+            LEFT JOIN {CLUSTERS_TABLE_NAME} c ON c.cluster_id = g.Cluster_Id
+            ORDER BY g.Priority_Rank ASC, g.Count DESC, g.Cluster_Id ASC""",
+        conn, params=params + [page_size + 1, offset]
+    )
+    df['Original_Text'] = df['Original_Text'].fillna(df.pop('Member_Text'))
+    labels = {rank: label for label, rank in priority_order.items()}
+    df.insert(1, 'Priority', df['Priority_Rank'].map(labels))
+
+    next_offset = None
+    if len(df) > page_size:
+        df = df.iloc[:page_size]
+        next_offset = offset + page_size
+    return df, next_offset
+
+
+def count_clusters(conn, filters, priority_order):
+    where, params = build_where(filters, priority_order)
+    return conn.execute(
+        f"SELECT COUNT(DISTINCT {CLUSTER_KEY}) FROM {TABLE_NAME} WHERE {where}", params
+    ).fetchone()[0]
+
+
+def has_processed_feedback(conn):
+    """True if at least one row has been prioritized (an index lookup, not a count)."""
+    return bool(conn.execute(
+        f"SELECT EXISTS (SELECT 1 FROM {TABLE_NAME} WHERE Priority_Rank IS NOT NULL)"
+    ).fetchone()[0])
+
+
+# --- FULL-TEXT SEARCH (see db_schema._create_search_index) ---
+
+_SEARCH_TERM = re.compile(r'"([^"]*)"|(\S+)')
+
+
+def search_available(conn):
+    return table_exists(conn, SEARCH_TABLE_NAME)
+
+
+def to_match_query(text):
+    """
+    Search box input -> FTS5 MATCH expression. Every word has to match, in any order;
+    "quoted words" match as a phrase and a trailing * matches a prefix (refund*).
+    Terms are always quoted, so FTS5 operators or stray punctuation can't break the query.
+    Returns None when nothing searchable is left.
+    """
+    terms = []
+    for phrase, word in _SEARCH_TERM.findall(text or ''):
+        prefix = not phrase and word.endswith('*')
+        term = (phrase or word).rstrip('*').strip()
+        if not re.search(r'\w', term):
+            continue
+        terms.append('"' + term.replace('"', '""') + '"' + ('*' if prefix else ''))
+    return ' '.join(terms) or None
+
+
+def _search_from(where):
+    # CROSS JOIN keeps the FTS index as the outer loop instead of scanning filtered rows
+    return f"""FROM {SEARCH_TABLE_NAME}
+            CROSS JOIN {TABLE_NAME} f ON f.id = {SEARCH_TABLE_NAME}.rowid
+            WHERE {SEARCH_TABLE_NAME} MATCH ? AND {where}"""
+
+
+def search_page(conn, query, filters, priority_order, after=None, page_size=DEFAULT_PAGE_SIZE,
+                window=SEARCH_RANK_WINDOW):
+    """
+    Rows matching the search box, restricted by the sidebar filters and ordered by
+    relevance (bm25) among the newest `window` of them. Matched terms in Text and
+    Original_Text are wrapped in HIGHLIGHT_OPEN/CLOSE.
+    Returns (page frame, offset of the next page or None); `after` is an offset.
+    """
+    match = to_match_query(query)
+    if match is None:
+        return pd.DataFrame(), None
+    where, params = build_where(filters, priority_order)
+    offset = after or 0
+    marks = [HIGHLIGHT_OPEN, HIGHLIGHT_CLOSE]
+    # The FTS index yields matches in rowid (= id) order, so the window's oldest id bounds the ranked range
+    df = pd.read_sql(
+        f"""SELECT f.id, f."Date/Time", f.Priority, f.Category, f.Scored_Confidence AS Confidence_Score,
+                   COALESCE(highlight({SEARCH_TABLE_NAME}, 1, ?, ?), highlight({SEARCH_TABLE_NAME}, 0, ?, ?)) AS Text,
+                   highlight({SEARCH_TABLE_NAME}, 0, ?, ?) AS Original_Text,
+                   f.User_ID, f.Priority_Rank, -bm25({SEARCH_TABLE_NAME}) AS Relevance
+            {_search_from(where)}
+              AND {SEARCH_TABLE_NAME}.rowid >= (
+                  SELECT COALESCE(MIN(id), 0) FROM (
+                      SELECT f.id {_search_from(where)}
+                      ORDER BY {SEARCH_TABLE_NAME}.rowid DESC
+                      LIMIT ?
+                  )
+              )
+            ORDER BY Relevance DESC, f.id DESC
+            LIMIT ? OFFSET ?""",
+        conn, params=marks * 3 + [match] + params + [match] + params + [window, page_size + 1, offset]
+    )
+
+    next_offset = None
+    if len(df) > page_size:
+        df = df.iloc[:page_size]
+        next_offset = offset + page_size
+    return df, next_offset
+
+
+def count_search_matches(conn, query, filters, priority_order, limit=SEARCH_COUNT_LIMIT):
+    """Matching rows under the filters, counted up to `limit`."""
+    match = to_match_query(query)
+    if match is None:
+        return 0
+    where, params = build_where(filters, priority_order)
+    return conn.execute(
+        f"SELECT COUNT(*) FROM (SELECT 1 {_search_from(where)} LIMIT ?)", [match] + params + [limit]
+    ).fetchone()[0]
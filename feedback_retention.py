@@ -0,0 +1,267 @@
+"""
+Rolling retention for feedback_data.db: weekly partitions, a Parquet archive and batched deletes.
+
+feedback_table keeps the newest `retention_weeks` weekly partitions (Monday to Sunday by
+"Date/Time", the current week included); that hot window is all the dashboard queries.
+Each older week is compacted into one Parquet file under ARCHIVE_DIR and only then
+deleted, in small transactions, so dashboard readers (WAL) are never blocked and writers
+wait for one batch at most. The rollup and the search index follow through their
+triggers. read_archive() opens only the week files that overlap a date range.
+
+Usage: python feedback_retention.py                       # archive + drop weeks beyond the window
+       python feedback_retention.py --weeks 26 --dry-run  # show what would be archived
+       python feedback_retention.py --list                # archived weeks
+"""
+import argparse
+import importlib.util
+import os
+import sqlite3
+import time
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+import perf_metrics
+from db_schema import TABLE_NAME, ROLLUP_TABLE_NAME, RAW_COLUMNS, DERIVED_COLUMNS, ensure_schema
+from perf_metrics import span
+
+# --- CONSTANTS ---
+DB_FILE_NAME = 'feedback_data.db'
+ARCHIVE_DIR = os.environ.get(
+    'FEEDBACK_ARCHIVE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'archive')
+)
+DEFAULT_RETENTION_WEEKS = int(os.environ.get('FEEDBACK_RETENTION_WEEKS', 12))
+ARCHIVE_PREFIX = 'feedback_week_'
+ARCHIVE_CHUNK_SIZE = 50000
+# Rows deleted per transaction: short enough that an ingest or agent write never waits long
+DELETE_BATCH_SIZE = 5000
+ARCHIVE_COLUMNS = ['id'] + RAW_COLUMNS + DERIVED_COLUMNS
+# The archive is Parquet; without pyarrow nothing is archived, and so nothing is deleted
+ARCHIVE_AVAILABLE = importlib.util.find_spec('pyarrow') is not None
+
+
+def connect(db_file=DB_FILE_NAME):
+    conn = sqlite3.connect(db_file, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    ensure_schema(conn)
+    return conn
+
+
+# --- WEEKLY PARTITIONS ---
+
+def week_start(day):
+    """Monday of the week containing `day`."""
+    return day - timedelta(days=day.weekday())
+
+
+def retention_cutoff(retention_weeks=DEFAULT_RETENTION_WEEKS, today=None):
+    """First day kept: the start of the oldest of the `retention_weeks` newest weeks."""
+    return week_start(today or date.today()) - timedelta(weeks=max(1, retention_weeks) - 1)
+
+
+def _week_bounds(week):
+    return week.isoformat(), (week + timedelta(days=7)).isoformat()
+
+
+def expired_weeks(conn, cutoff):
+    """Week starts (oldest first) that still have rows dated before `cutoff`; index lookups only."""
+    first = conn.execute(
+        f'SELECT MIN("Date/Time") FROM {TABLE_NAME} WHERE "Date/Time" IS NOT NULL'
+    ).fetchone()[0]
+    if first is None:
+        return []
+    weeks = []
+    week = week_start(date.fromisoformat(first[:10]))
+    while week < cutoff:
+        if conn.execute(
+            f'SELECT 1 FROM {TABLE_NAME} WHERE "Date/Time" >= ? AND "Date/Time" < ? LIMIT 1', _week_bounds(week)
+        ).fetchone():
+            weeks.append(week)
+        week += timedelta(weeks=1)
+    return weeks
+
+
+# --- PARQUET ARCHIVE ---
+
+def archive_path(week, archive_dir=ARCHIVE_DIR):
+    return os.path.join(archive_dir, f"{ARCHIVE_PREFIX}{week.isoformat()}.parquet")
+
+
+def _archive_schema():
+    import pyarrow as pa
+
+    return pa.schema([
+        ('id', pa.int64()),
+        ('Date/Time', pa.string()),
+        ('Text', pa.string()),
+        ('Sentiment', pa.string()),
+        ('Confidence_Score', pa.float64()),
+        ('User_ID', pa.int64()),
+        ('Translated_Text', pa.string()),
+        ('Category', pa.string()),
+        ('Priority', pa.string()),
+        ('Priority_Rank', pa.int64()),
+        ('Cluster_Id', pa.int64()),
+        ('Scored_Sentiment', pa.string()),
+        ('Scored_Confidence', pa.float64()),
+    ])
+
+
+def archive_week(conn, week, archive_dir=ARCHIVE_DIR):
+    """
+    Writes the week's rows to its Parquet file; returns (rows in the file, highest id
+    archived from the DB). A file left by an interrupted run is merged rather than
+    overwritten, so rows it holds that were already deleted aren't lost. Written to a
+    temp file and renamed, so a half-written archive never replaces a good one.
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+
+    os.makedirs(archive_dir, exist_ok=True)
+    path = archive_path(week, archive_dir)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    schema = _archive_schema()
+    columns = ', '.join(f'"{column}"' for column in ARCHIVE_COLUMNS)
+    frames = pd.read_sql(
+        f'SELECT {columns} FROM {TABLE_NAME} WHERE "Date/Time" >= ? AND "Date/Time" < ? ORDER BY id',
+        conn, params=_week_bounds(week), chunksize=ARCHIVE_CHUNK_SIZE
+    )
+
+    archived = max_id = 0
+    try:
+        with pq.ParquetWriter(tmp_path, schema) as writer:
+            ids = []
+            for frame in frames:
+                writer.write_table(pa.Table.from_pandas(frame, schema=schema, preserve_index=False))
+                ids.append(frame['id'].to_numpy())
+                archived += len(frame)
+                max_id = int(frame['id'].iloc[-1])
+            if os.path.exists(path):
+                previous = pq.read_table(path, schema=schema)
+                if ids:
+                    still_stored = pc.is_in(previous['id'], value_set=pa.array(np.concatenate(ids)))
+                    previous = previous.filter(pc.invert(still_stored))
+                writer.write_table(previous)
+                archived += previous.num_rows
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return archived, max_id
+
+
+def _delete_archived(conn, week, max_id, batch_size=DELETE_BATCH_SIZE):
+    """Deletes the week's rows up to max_id (rows ingested meanwhile wait for the next run)."""
+    start, end = _week_bounds(week)
+    deleted = 0
+    while True:
+        with conn:
+            batch = conn.execute(
+                f"""DELETE FROM {TABLE_NAME} WHERE id IN (
+                        SELECT id FROM {TABLE_NAME}
+                        WHERE "Date/Time" >= ? AND "Date/Time" < ? AND id <= ?
+                        LIMIT ?
+                    )""",
+                (start, end, max_id, batch_size)
+            ).rowcount
+        deleted += batch
+        if batch < batch_size:
+            return deleted
+
+
+def apply_retention(conn, retention_weeks=DEFAULT_RETENTION_WEEKS, archive_dir=ARCHIVE_DIR,
+                    today=None, dry_run=False):
+    """
+    Archives and deletes every week older than the retention window, oldest first.
+    Returns a list of (week start, rows archived, rows deleted); with dry_run, only
+    the weeks that would be processed (counts are 0).
+    """
+    cutoff = retention_cutoff(retention_weeks, today)
+    weeks = expired_weeks(conn, cutoff)
+    if dry_run or not weeks:
+        return [(week, 0, 0) for week in weeks]
+    if not ARCHIVE_AVAILABLE:
+        print("Retention skipped: pyarrow is required to archive expired weeks before they are deleted.")
+        return []
+
+    results = []
+    for week in weeks:
+        start_time = time.perf_counter()
+        with span('retention.week', week=week.isoformat()) as stage:
+            archived, max_id = archive_week(conn, week, archive_dir)
+            deleted = _delete_archived(conn, week, max_id) if max_id else 0
+            stage.rows = deleted
+        results.append((week, archived, deleted))
+        print(f"Week {week}: {archived:,} rows archived, {deleted:,} deleted ({time.perf_counter() - start_time:.2f}s)")
+    # Expired days leave zero-count rollup rows behind
+    with conn:
+        conn.execute(f"DELETE FROM {ROLLUP_TABLE_NAME} WHERE row_count = 0")
+    perf_metrics.flush(conn)
+    return results
+
+
+def list_archive(archive_dir=ARCHIVE_DIR):
+    """Archived weeks with their row counts and file sizes (reads Parquet footers only)."""
+    columns = ['Week', 'Rows', 'Size_MB', 'Path']
+    if not ARCHIVE_AVAILABLE or not os.path.isdir(archive_dir):
+        return pd.DataFrame(columns=columns)
+    import pyarrow.parquet as pq
+
+    rows = []
+    for name in sorted(os.listdir(archive_dir)):
+        if name.startswith(ARCHIVE_PREFIX) and name.endswith('.parquet'):
+            path = os.path.join(archive_dir, name)
+            rows.append((
+                name[len(ARCHIVE_PREFIX):-len('.parquet')],
+                pq.read_metadata(path).num_rows,
+                round(os.path.getsize(path) / 1e6, 2),
+                path,
+            ))
+    return pd.DataFrame(rows, columns=columns)
+
+
+def read_archive(start_date=None, end_date=None, archive_dir=ARCHIVE_DIR):
+    """Archived rows dated within [start_date, end_date] (inclusive days); only overlapping week files are read."""
+    import pyarrow.parquet as pq
+
+    archive = list_archive(archive_dir)
+    if start_date is not None:
+        archive = archive[archive['Week'] >= week_start(date.fromisoformat(str(start_date))).isoformat()]
+    if end_date is not None:
+        archive = archive[archive['Week'] <= str(end_date)]
+    frames = [pq.read_table(path, schema=_archive_schema()).to_pandas() for path in archive['Path']]
+    if not frames:
+        return pd.DataFrame(columns=ARCHIVE_COLUMNS)
+    df = pd.concat(frames, ignore_index=True)
+    if start_date is not None:
+        df = df[df['Date/Time'] >= str(start_date)]
+    if end_date is not None:
+        df = df[df['Date/Time'] < (date.fromisoformat(str(end_date)) + timedelta(days=1)).isoformat()]
+    return df.sort_values('id').reset_index(drop=True)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Archive and drop feedback older than the retention window")
+    parser.add_argument('--weeks', type=int, default=DEFAULT_RETENTION_WEEKS, help="Weekly partitions to keep (current week included)")
+    parser.add_argument('--archive-dir', default=ARCHIVE_DIR, help="Where the weekly Parquet files go")
+    parser.add_argument('--dry-run', action='store_true', help="Only list the weeks that would be archived")
+    parser.add_argument('--list', action='store_true', help="List archived weeks and exit")
+    args = parser.parse_args()
+
+    if args.list:
+        print(list_archive(args.archive_dir).drop(columns='Path').to_string(index=False))
+        raise SystemExit(0)
+
+    conn = connect()
+    try:
+        print(f"Keeping weeks from {retention_cutoff(args.weeks)} on ({args.weeks} weeks).")
+        results = apply_retention(conn, args.weeks, args.archive_dir, dry_run=args.dry_run)
+        if args.dry_run:
+            for week, _, _ in results:
+                print(f"Would archive week {week}")
+        elif not results:
+            print("Nothing to archive.")
+    finally:
+        conn.close()
@@ -0,0 +1,145 @@
+import hashlib
+import json
+import os
+import re
+import threading
+
+import numpy as np
+import pandas as pd
+
+# --- CONSTANTS ---
+RULES_FILE = os.environ.get('FEEDBACK_RULES_FILE', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'feedback_rules.json'))
+SENTIMENT_COLUMN = 'Sentiment'
+CONFIDENCE_COLUMN = 'Confidence_Score'
+
+
+class RuleSet:
+    """
+    Category keywords and priority thresholds compiled from the rules file.
+
+    Categories keep file order as precedence (first matching category wins). All keywords
+    go into one inverted index (keyword -> best category) scanned by a single regex, so
+    matching a text is one pass no matter how many rules there are. Keywords are
+    substring matches (as in the original if/elif chain), e.g. 'app' also hits 'happy'.
+    """
+
+    def __init__(self, config):
+        # Identifies this rule version so stored results can be invalidated when it changes
+        self.fingerprint = 'rules:' + hashlib.sha256(json.dumps(config, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+        self.category_names = [category['name'] for category in config['categories']]
+        self.default_category = config.get('default_category', 'General/Other')
+        self.keywords = [
+            (category['name'], [keyword.lower() for keyword in category['keywords']])
+            for category in config['categories']
+        ]
+
+        # Inverted index: keyword -> lowest (= highest precedence) category index
+        index = {}
+        for position, (_, keywords) in enumerate(self.keywords):
+            for keyword in keywords:
+                index.setdefault(keyword, position)
+        self.keyword_index = index
+
+        # The scan reports the longest keyword starting at each position; every shorter
+        # keyword matching there is a prefix of it, so fold those in ahead of time.
+        self._best_at_match = {
+            keyword: min(position for other, position in index.items() if keyword.startswith(other))
+            for keyword in index
+        }
+        alternation = '|'.join(re.escape(keyword) for keyword in sorted(index, key=len, reverse=True))
+        self._scanner = re.compile(f'(?=({alternation}))') if index else None
+
+        self.priorities = config['priorities']
+        if not self.priorities:
+            raise ValueError("Rules file must define at least one priority")
+        last = self.priorities[-1]
+        if last.get('sentiment') is not None or last.get('min_confidence') is not None:
+            raise ValueError("The last priority rule must be a catch-all (no sentiment/min_confidence)")
+        self.priority_order = {rule['label']: rule['rank'] for rule in self.priorities}
+        self.priority_colors = {rule['label']: rule['color'] for rule in self.priorities if 'color' in rule}
+        self.default_priorities = [rule['label'] for rule in self.priorities if rule.get('show_by_default')]
+
+    # --- CATEGORIES ---
+
+    def categorize(self, text_lower):
+        """Returns the category for an already-lowercased text in one scan."""
+        best = len(self.keywords)
+        if self._scanner is not None:
+            for match in self._scanner.finditer(text_lower):
+                best = min(best, self._best_at_match[match.group(1)])
+                if best == 0:
+                    break
+        return self.category_names[best] if best < len(self.keywords) else self.default_category
+
+    def categorize_linear(self, text_lower):
+        """Straight linear scan over the rules; reference for categorize()."""
+        for category, keywords in self.keywords:
+            if any(keyword in text_lower for keyword in keywords):
+                return category
+        return self.default_category
+
+    # --- PRIORITIES ---
+
+    def priority_for(self, sentiment, confidence):
+        for rule in self.priorities:
+            if rule.get('sentiment') is not None and sentiment != rule['sentiment']:
+                continue
+            if rule.get('min_confidence') is not None and not confidence >= rule['min_confidence']:
+                continue
+            return rule['label']
+        return self.priorities[-1]['label']
+
+    def priority_series(self, df):
+        """Vectorized priority_for over the Sentiment/Confidence_Score columns."""
+        sentiment = df[SENTIMENT_COLUMN].to_numpy()
+        confidence = df[CONFIDENCE_COLUMN].to_numpy(dtype=float)
+        conditions = []
+        for rule in self.priorities[:-1]:
+            condition = np.ones(len(df), dtype=bool)
+            if rule.get('sentiment') is not None:
+                condition &= sentiment == rule['sentiment']
+            if rule.get('min_confidence') is not None:
+                condition &= confidence >= rule['min_confidence']
+            conditions.append(condition)
+        choices = [rule['label'] for rule in self.priorities[:-1]]
+        labels = np.select(conditions, choices, default=self.priorities[-1]['label'])
+        return pd.Series(labels, index=df.index, dtype=object)
+
+
+# --- LOADING & HOT RELOAD ---
+
+_cache = {'path': None, 'mtime': None, 'rules': None}
+_lock = threading.Lock()
+
+
+def load_rules(path=RULES_FILE):
+    """Reads and compiles a rules file."""
+    with open(path, encoding='utf-8') as f:
+        return RuleSet(json.load(f))
+
+
+def get_rules(path=RULES_FILE):
+    """
+    Returns the compiled rules, recompiling only when the file's mtime changes.
+    A broken edit keeps the last good rules in place.
+    """
+    with _lock:
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError as e:
+            if _cache['rules'] is None:
+                raise
+            print(f"Rules file unavailable, keeping previous rules: {e}")
+            return _cache['rules']
+
+        if _cache['rules'] is None or _cache['path'] != path or _cache['mtime'] != mtime:
+            try:
+                rules = load_rules(path)
+            except (ValueError, KeyError, TypeError) as e:
+                if _cache['rules'] is None:
+                    raise
+                print(f"Invalid rules file {path}, keeping previous rules: {e}")
+                _cache.update(path=path, mtime=mtime)
+                return _cache['rules']
+            _cache.update(path=path, mtime=mtime, rules=rules)
+        return _cache['rules']
@@ -0,0 +1,316 @@
+"""
+Background worker: prioritizes new feedback off the dashboard's request path.
+
+Polls feedback_data.db for pending rows (Priority_Rank IS NULL), runs the
+translate/categorize/prioritize pipeline on them in a process pool and writes each
+batch back in one transaction. While a worker is running the dashboard only reads.
+
+Usage: python feedback_worker.py                 # poll until Ctrl+C / SIGTERM
+       python feedback_worker.py --once          # drain the queue, then exit
+       python feedback_worker.py --backfill      # one-off parallel run over a large dump
+       python feedback_worker.py --retention-weeks 12   # also archive weeks beyond the window, hourly
+"""
+import argparse
+import os
+import signal
+import sqlite3
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+import agent_logic
+import feedback_retention
+import perf_metrics
+from db_schema import TABLE_NAME
+from perf_metrics import span
+
+try:
+    from tqdm import tqdm
+except ImportError:  # progress bar is optional
+    tqdm = None
+
+# --- CONSTANTS ---
+DB_FILE_NAME = agent_logic.DB_FILE_NAME
+DEFAULT_POLL_SECONDS = 5.0
+DEFAULT_BATCH_SIZE = 20000
+DEFAULT_CHUNK_SIZE = 2000
+DEFAULT_RANGE_SIZE = 50000
+# agent_state keys
+HEARTBEAT_KEY = 'worker_heartbeat'
+QUEUE_DEPTH_KEY = 'queue_depth'
+# A worker that hasn't reported within this window is considered gone
+WORKER_STALE_SECONDS = 60
+# With --retention-weeks, expired weeks are archived at most this often
+RETENTION_INTERVAL_SECONDS = 3600
+
+
+def _init_process():
+    # Ctrl+C goes to the parent, which finishes the current batch before exiting
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    perf_metrics.reset()
+
+
+def _process_chunk(df):
+    # Spans recorded in the pool process travel back with the result (see perf_metrics.extend)
+    return agent_logic.process_feedback_frame(df), perf_metrics.drain()
+
+
+def connect(db_file=DB_FILE_NAME):
+    conn = sqlite3.connect(db_file, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    agent_logic.ensure_results_store(conn)
+    return conn
+
+
+def worker_is_alive(conn, max_age=WORKER_STALE_SECONDS):
+    """True if a worker has reported a heartbeat recently (the dashboard then stays read-only)."""
+    try:
+        heartbeat = agent_logic.get_state(conn, HEARTBEAT_KEY)
+    except sqlite3.Error:
+        return False
+    return heartbeat is not None and time.time() - float(heartbeat) < max_age
+
+
+def get_queue_depth(conn):
+    """Rows waiting for the agent."""
+    return agent_logic.count_pending_rows(conn)
+
+
+class FeedbackWorker:
+    """
+    Poll loop around the agent pipeline. Each poll reads at most `batch_size` pending rows,
+    fans them out to the pool in `chunk_size` pieces and stores the batch in one
+    transaction, so a crash or shutdown never leaves a half-written batch; whatever
+    wasn't stored is simply still pending next time. Batches walk the pending rows by id,
+    so rows the pipeline leaves pending (no sentiment model yet) don't hold up newer ones.
+    """
+
+    def __init__(self, db_file=DB_FILE_NAME, max_workers=None, batch_size=DEFAULT_BATCH_SIZE,
+                 chunk_size=DEFAULT_CHUNK_SIZE, poll_seconds=DEFAULT_POLL_SECONDS, retention_weeks=None):
+        self.db_file = db_file
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.chunk_size = chunk_size
+        self.poll_seconds = poll_seconds
+        self.retention_weeks = retention_weeks
+        self.stop_event = threading.Event()
+        self.rows_processed = 0
+        self.last_retention = 0.0
+        # Last id read in the current pass over the pending rows (None: start from the oldest)
+        self.after_id = None
+
+    def stop(self, *_):
+        if not self.stop_event.is_set():
+            print("Shutdown requested, finishing the current batch...")
+        self.stop_event.set()
+
+    def _report(self, conn, queue_depth):
+        with conn:
+            agent_logic.set_state(conn, HEARTBEAT_KEY, time.time())
+            agent_logic.set_state(conn, QUEUE_DEPTH_KEY, queue_depth)
+
+    def _apply_retention(self, conn):
+        """Archives weeks beyond the retention window (when configured), between batches."""
+        if not self.retention_weeks or time.time() - self.last_retention < RETENTION_INTERVAL_SECONDS:
+            return
+        self.last_retention = time.time()
+        try:
+            feedback_retention.apply_retention(conn, self.retention_weeks)
+        except (sqlite3.Error, OSError) as e:
+            print(f"Retention run failed, retrying in {RETENTION_INTERVAL_SECONDS}s: {e}")
+
+    def run_batch(self, conn, pool):
+        """Processes the next batch of pending rows after self.after_id; returns the number of rows stored."""
+        rules_fingerprint = agent_logic.sync_rules_version(conn)
+        df = agent_logic.read_pending_rows(conn, limit=self.batch_size, after_id=self.after_id)
+        if df.empty:
+            self.after_id = None
+            return 0
+        self.after_id = int(df['id'].iloc[-1])
+
+        start = time.perf_counter()
+        with span('worker.batch', rows=len(df), processes=self.max_workers):
+            # Clusters are assigned here, on the writer's connection, before fanning out
+            df = agent_logic.attach_clusters(conn, df)
+            chunks = [df.iloc[i:i + self.chunk_size] for i in range(0, len(df), self.chunk_size)]
+            frames = []
+            for frame, records in pool.map(_process_chunk, chunks):
+                frames.append(frame)
+                perf_metrics.extend(records)
+            processed = agent_logic.concat_frames(frames)
+            stored = agent_logic.store_results(conn, processed, rules_fingerprint)
+        perf_metrics.flush(conn)
+        seconds = time.perf_counter() - start
+        self.rows_processed += stored
+        print(f"Processed {stored:,} rows in {seconds:.2f}s ({stored / seconds:,.0f} rows/sec)")
+        return stored
+
+    def run(self, once=False):
+        conn = connect(self.db_file)
+        print(f"Worker started: {self.max_workers} processes, batches of {self.batch_size:,} rows")
+        try:
+            with ProcessPoolExecutor(max_workers=self.max_workers, initializer=_init_process) as pool:
+                while not self.stop_event.is_set():
+                    self._apply_retention(conn)
+                    queue_depth = get_queue_depth(conn)
+                    self._report(conn, queue_depth)
+                    if queue_depth:
+                        print(f"Queue depth: {queue_depth:,}")
+                        self.run_batch(conn, pool)
+                        if self.after_id is not None:
+                            continue
+                    if once:
+                        break
+                    self.stop_event.wait(self.poll_seconds)
+        finally:
+            # Clear the heartbeat so the dashboard goes back to processing inline
+            with conn:
+                conn.execute(f"DELETE FROM {agent_logic.STATE_TABLE_NAME} WHERE key = ?", (HEARTBEAT_KEY,))
+            conn.close()
+            print(f"Worker stopped after {self.rows_processed:,} rows.")
+
+
+# --- BACKFILL (id ranges, shared-nothing processes) ---
+
+def id_ranges(conn, range_size=DEFAULT_RANGE_SIZE, pending_only=True):
+    """Splits the table's id space into inclusive (start, end) ranges of range_size ids."""
+    where = "WHERE Priority_Rank IS NULL" if pending_only else ""
+    low, high = conn.execute(f"SELECT MIN(id), MAX(id) FROM {TABLE_NAME} {where}").fetchone()
+    if low is None:
+        return []
+    return [(start, min(start + range_size - 1, high)) for start in range(low, high + 1, range_size)]
+
+
+def _read_range(conn, start, end, pending_only):
+    # Rows that are only stored need just the pipeline's input columns
+    if pending_only:
+        columns, pending = agent_logic.PIPELINE_COLUMNS, "AND +Priority_Rank IS NULL"
+    else:
+        columns, pending = ['id'] + agent_logic.RAW_COLUMNS, ""
+    return pd.read_sql(
+        f"SELECT {agent_logic.sql_column_list(columns)} FROM {TABLE_NAME} WHERE id BETWEEN ? AND ? {pending}",
+        conn, params=(start, end)
+    )
+
+
+def _store_range(db_file, start, end, rules_fingerprint):
+    """Pool task: reads, processes and stores one id range on its own connection."""
+    conn = sqlite3.connect(db_file, timeout=60)
+    try:
+        df = _read_range(conn, start, end, pending_only=True)
+        if df.empty:
+            return 0
+        with span('backfill.range', rows=len(df)):
+            df = agent_logic.process_feedback_frame(agent_logic.attach_clusters(conn, df))
+            return agent_logic.store_results(conn, df, rules_fingerprint)
+    finally:
+        perf_metrics.flush(conn)
+        conn.close()
+
+
+def _compute_range(db_file, start, end):
+    """Pool task: reads and processes one id range without storing it."""
+    conn = sqlite3.connect(db_file, timeout=60)
+    try:
+        df = _read_range(conn, start, end, pending_only=False)
+        if df.empty:
+            return df
+        with span('backfill.range', rows=len(df)):
+            return agent_logic.process_feedback_frame(agent_logic.attach_clusters(conn, df, store=False))
+    finally:
+        perf_metrics.flush(conn)
+        conn.close()
+
+
+def _progress(total, description):
+    if tqdm is None:
+        return None
+    return tqdm(total=total, desc=description, unit='rows', unit_scale=True)
+
+
+def process_table_parallel(db_file=DB_FILE_NAME, max_workers=None, range_size=DEFAULT_RANGE_SIZE):
+    """Processes the whole table across processes and returns the per-range frames (not stored)."""
+    conn = connect(db_file)
+    try:
+        ranges = id_ranges(conn, range_size, pending_only=False)
+    finally:
+        conn.close()
+
+    frames = []
+    with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count(), initializer=_init_process) as pool:
+        starts = [start for start, _ in ranges]
+        ends = [end for _, end in ranges]
+        for frame in pool.map(_compute_range, [db_file] * len(ranges), starts, ends):
+            if not frame.empty:
+                frames.append(frame)
+    return frames
+
+
+def backfill(db_file=DB_FILE_NAME, max_workers=None, range_size=DEFAULT_RANGE_SIZE, reprocess=False):
+    """
+    Prioritizes every pending row by fanning id ranges out to a process pool. Each task opens
+    its own SQLite connection and stores its range in one transaction, so an interrupted
+    backfill resumes where it stopped. reprocess=True first marks all rows pending again.
+    Returns the number of rows stored.
+    """
+    conn = connect(db_file)
+    try:
+        if reprocess:
+            agent_logic.reset_agent_results(conn)
+        rules_fingerprint = agent_logic.sync_rules_version(conn)
+        total = get_queue_depth(conn)
+        ranges = id_ranges(conn, range_size)
+    finally:
+        conn.close()
+
+    max_workers = max_workers or os.cpu_count() or 1
+    print(f"Backfill: {total:,} pending rows in {len(ranges):,} id ranges on {max_workers} processes")
+    start_time = time.perf_counter()
+    stored = 0
+    progress = _progress(total, "Backfill")
+    pool = ProcessPoolExecutor(max_workers=max_workers, initializer=_init_process)
+    try:
+        futures = [pool.submit(_store_range, db_file, start, end, rules_fingerprint) for start, end in ranges]
+        for future in as_completed(futures):
+            rows = future.result()
+            stored += rows
+            if progress is not None:
+                progress.update(rows)
+    except KeyboardInterrupt:
+        print("\nBackfill interrupted; stored ranges are kept and the rest stays pending.")
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+        if progress is not None:
+            progress.close()
+
+    seconds = time.perf_counter() - start_time
+    print(f"Backfill stored {stored:,} rows in {seconds:.2f}s ({stored / seconds if seconds else 0:,.0f} rows/sec)")
+    return stored
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Prioritize new feedback in the background")
+    parser.add_argument('--workers', type=int, default=None, help="Pipeline processes (default: CPU count)")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help="Rows stored per transaction")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help="Rows per pool task")
+    parser.add_argument('--interval', type=float, default=DEFAULT_POLL_SECONDS, help="Seconds between polls")
+    parser.add_argument('--once', action='store_true', help="Drain the queue and exit")
+    parser.add_argument('--backfill', action='store_true', help="Process all pending rows in parallel id ranges and exit")
+    parser.add_argument('--range-size', type=int, default=DEFAULT_RANGE_SIZE, help="Ids per backfill task")
+    parser.add_argument('--reprocess', action='store_true', help="With --backfill: recompute every row")
+    parser.add_argument('--retention-weeks', type=int, default=None,
+                        help="Archive and drop weeks beyond this many (hourly; see feedback_retention.py)")
+    args = parser.parse_args()
+
+    if args.backfill:
+        backfill(max_workers=args.workers, range_size=args.range_size, reprocess=args.reprocess)
+        raise SystemExit(0)
+
+    worker = FeedbackWorker(max_workers=args.workers, batch_size=args.batch_size,
+                            chunk_size=args.chunk_size, poll_seconds=args.interval,
+                            retention_weeks=args.retention_weeks)
+    signal.signal(signal.SIGINT, worker.stop)
+    signal.signal(signal.SIGTERM, worker.stop)
+    worker.run(once=args.once)
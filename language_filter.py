@@ -0,0 +1,88 @@
+import re
+import threading
+
+# --- ROUTES ---
+ROUTE_ENGLISH = 'english'
+ROUTE_NON_LATIN = 'non_latin'
+ROUTE_AMBIGUOUS = 'ambiguous'
+
+# --- UNICODE SCRIPT RANGES (anything here is definitely not English) ---
+NON_LATIN_SCRIPT_RANGES = [
+    (0x0370, 0x03FF),  # Greek
+    (0x0400, 0x052F),  # Cyrillic
+    (0x0590, 0x05FF),  # Hebrew
+    (0x0600, 0x06FF),  # Arabic
+    (0x0900, 0x097F),  # Devanagari
+    (0x0980, 0x09FF),  # Bengali
+    (0x0A00, 0x0A7F),  # Gurmukhi
+    (0x0A80, 0x0AFF),  # Gujarati
+    (0x0B00, 0x0B7F),  # Oriya
+    (0x0B80, 0x0BFF),  # Tamil
+    (0x0C00, 0x0C7F),  # Telugu
+    (0x0C80, 0x0CFF),  # Kannada
+    (0x0D00, 0x0D7F),  # Malayalam
+    (0x0E00, 0x0E7F),  # Thai
+    (0x3040, 0x30FF),  # Hiragana / Katakana
+    (0x4E00, 0x9FFF),  # CJK
+    (0xAC00, 0xD7AF),  # Hangul
+]
+NON_LATIN_PATTERN = re.compile(
+    '[' + ''.join(f'\\u{start:04x}-\\u{end:04x}' for start, end in NON_LATIN_SCRIPT_RANGES) + ']'
+)
+
+MIN_ASCII_RATIO = 0.95
+
+# Small function-word model: romanized non-English text (e.g. Hinglish) is pure ASCII
+# but almost never contains these.
+ENGLISH_FUNCTION_WORDS = frozenset("""
+a about after all am an and any are as at be been but by can could did do does for from
+had has have i if in is it its just me more my no not of on or our so some than that the
+their them then there this to too up very was we were what when which will with would you your
+""".split())
+WORD_PATTERN = re.compile(r"[a-z']+")
+MIN_WORDS_FOR_MODEL = 4
+MIN_FUNCTION_WORD_RATIO = 0.1
+
+
+class LanguageFilter:
+    """
+    Offline pre-classifier run before any remote language detection.
+    Plain ASCII English is routed straight through; non-Latin scripts and anything
+    ambiguous (accented Latin, ASCII that does not look like English) go to the translator.
+    """
+
+    def __init__(self, use_word_model=True):
+        self.use_word_model = use_word_model
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.stats = {ROUTE_ENGLISH: 0, ROUTE_NON_LATIN: 0, ROUTE_AMBIGUOUS: 0}
+
+    def classify(self, text):
+        """Returns the route for a text without touching the stats."""
+        if NON_LATIN_PATTERN.search(text):
+            return ROUTE_NON_LATIN
+
+        ascii_count = sum(1 for ch in text if ord(ch) < 128)
+        if ascii_count < MIN_ASCII_RATIO * len(text):
+            return ROUTE_AMBIGUOUS
+
+        if self.use_word_model:
+            words = WORD_PATTERN.findall(text.lower())
+            if len(words) >= MIN_WORDS_FOR_MODEL:
+                function_words = sum(1 for word in words if word in ENGLISH_FUNCTION_WORDS)
+                if function_words < MIN_FUNCTION_WORD_RATIO * len(words):
+                    return ROUTE_AMBIGUOUS
+
+        return ROUTE_ENGLISH
+
+    def route(self, text, rows=1):
+        """Classifies a text and records how many rows took that path."""
+        route = self.classify(text)
+        with self._lock:
+            self.stats[route] += rows
+        return route
+
+    def is_english(self, text, rows=1):
+        return self.route(text, rows) == ROUTE_ENGLISH
@@ -0,0 +1,298 @@
+"""
+Lightweight instrumentation for the agent pipeline and the dashboard.
+
+Wrap a stage in `with span('agent.translate', rows=len(df)) as s:`; on exit the span
+records its wall time, row count and any counters added to it (s.add(cache_hits=3)).
+Spans opened inside another span share its run id and name it as their parent.
+Finished spans go to a structured JSON-lines log and into an in-memory buffer that
+flush() writes to a rolling metrics table in the feedback DB (only the newest
+MAX_METRIC_ROWS are kept); the dashboard's admin Performance tab reads that table.
+flush_if_due() throttles that write for hot paths such as dashboard reruns.
+
+FEEDBACK_METRICS=0 disables it: span() then returns one shared no-op object, so an
+instrumented stage costs a function call and nothing else.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+# --- CONSTANTS ---
+DB_FILE_NAME = 'feedback_data.db'
+METRICS_TABLE_NAME = 'pipeline_metrics'
+MAX_METRIC_ROWS = 5000
+# flush_if_due(): hot paths (dashboard reruns) write buffered spans at most this often,
+# or sooner once this many are waiting
+FLUSH_INTERVAL_SECONDS = 30
+FLUSH_MAX_BUFFERED = 500
+LOG_FILE = os.environ.get(
+    'FEEDBACK_METRICS_LOG', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'logs', 'metrics.jsonl')
+)
+ENABLED = os.environ.get('FEEDBACK_METRICS', '1') != '0'
+
+logger = logging.getLogger('feedback.metrics')
+
+_buffer = []
+_buffer_lock = threading.Lock()
+_local = threading.local()
+_log_lock = threading.Lock()
+_log_ready = False
+_last_flush = 0.0
+
+
+def set_enabled(enabled):
+    global ENABLED
+    ENABLED = bool(enabled)
+
+
+def _stack():
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+# --- SPANS ---
+
+class Span:
+    """One timed stage. `rows` may be set (or changed) before the span closes."""
+
+    __slots__ = ('stage', 'rows', 'counters', 'run_id', 'parent', 'start', 'seconds')
+
+    def __init__(self, stage, rows=None, **counters):
+        self.stage = stage
+        self.rows = rows
+        self.counters = counters
+        self.run_id = self.parent = None
+        self.start = self.seconds = None
+
+    def add(self, **counters):
+        """Adds to (or starts) named counters, e.g. cache_hits or translator_calls."""
+        for name, value in counters.items():
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def __enter__(self):
+        stack = _stack()
+        if stack:
+            self.run_id, self.parent = stack[-1].run_id, stack[-1].stage
+        else:
+            self.run_id = uuid.uuid4().hex[:12]
+        stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.seconds = time.perf_counter() - self.start
+        _stack().pop()
+        if exc_type is not None:
+            self.counters['error'] = exc_type.__name__
+        _record({
+            'recorded_at': round(time.time(), 3),
+            'run_id': self.run_id,
+            'stage': self.stage,
+            'parent': self.parent,
+            'seconds': round(self.seconds, 6),
+            'rows': None if self.rows is None else int(self.rows),
+            'pid': os.getpid(),
+            'details': self.counters,
+        })
+        return False
+
+
+class _NoOpSpan:
+    rows = None
+
+    def add(self, **counters):
+        pass
+
+    def __setattr__(self, name, value):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NO_OP_SPAN = _NoOpSpan()
+
+
+def span(stage, rows=None, **counters):
+    """Context manager timing one stage (a shared no-op when metrics are disabled)."""
+    if not ENABLED:
+        return _NO_OP_SPAN
+    return Span(stage, rows, **counters)
+
+
+def counter_delta(after, before, names):
+    """Per-stage increments of cumulative stats dicts (e.g. TranslationEngine.stats)."""
+    return {name: after[name] - before[name] for name in names}
+
+
+# --- STRUCTURED LOG + BUFFER ---
+
+def _ensure_log_handler():
+    global _log_ready
+    with _log_lock:
+        if _log_ready:
+            return
+        _log_ready = True
+        if logger.handlers:
+            return
+        try:
+            os.makedirs(os.path.dirname(LOG_FILE), exist_ok=True)
+            handler = logging.FileHandler(LOG_FILE, encoding='utf-8')
+        except OSError as e:
+            print(f"Metrics log unavailable ({LOG_FILE}): {e}")
+            return
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+
+
+def _record(record):
+    with _buffer_lock:
+        _buffer.append(record)
+    _ensure_log_handler()
+    logger.info(json.dumps(record, ensure_ascii=False, default=str))
+
+
+def drain():
+    """Returns and clears the buffered records (pool tasks hand theirs back to the parent)."""
+    with _buffer_lock:
+        records = _buffer[:]
+        _buffer.clear()
+    return records
+
+
+def reset():
+    """Drops buffered records and open spans (pool processes forked mid-run start clean)."""
+    drain()
+    _stack().clear()
+
+
+def extend(records):
+    """
+    Adds records drained in another process. Their top-level spans are attached to the
+    caller's open span, so a worker batch shows up as one run. Not logged again: the
+    other process already wrote them to the log.
+    """
+    stack = _stack()
+    with _buffer_lock:
+        for record in records:
+            if stack and record['parent'] is None:
+                record = dict(record, parent=stack[-1].stage)
+            if stack:
+                record = dict(record, run_id=stack[-1].run_id)
+            _buffer.append(record)
+
+
+# --- ROLLING METRICS TABLE ---
+
+def _ensure_table(conn):
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {METRICS_TABLE_NAME} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            recorded_at REAL,
+            run_id TEXT,
+            stage TEXT,
+            parent TEXT,
+            seconds REAL,
+            rows INTEGER,
+            details TEXT
+        )
+    """)
+
+
+def flush(conn=None, db_file=DB_FILE_NAME):
+    """Writes buffered spans to the metrics table and trims it to the newest MAX_METRIC_ROWS."""
+    records = drain()
+    if not records:
+        return 0
+    own_conn = conn is None
+    try:
+        if own_conn:
+            conn = sqlite3.connect(db_file, timeout=30)
+        if conn.in_transaction:
+            conn.commit()
+        with conn:
+            _ensure_table(conn)
+            conn.executemany(
+                f"""INSERT INTO {METRICS_TABLE_NAME} (recorded_at, run_id, stage, parent, seconds, rows, details)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                (
+                    (record['recorded_at'], record['run_id'], record['stage'], record['parent'],
+                     record['seconds'], record['rows'], json.dumps(record['details'], default=str))
+                    for record in records
+                )
+            )
+            conn.execute(
+                f"DELETE FROM {METRICS_TABLE_NAME} WHERE id <= (SELECT MAX(id) FROM {METRICS_TABLE_NAME}) - ?",
+                (MAX_METRIC_ROWS,)
+            )
+        return len(records)
+    except sqlite3.Error as e:
+        print(f"Metrics flush failed: {e}")
+        return 0
+    finally:
+        if own_conn and conn is not None:
+            conn.close()
+
+
+def flush_if_due(conn=None, db_file=DB_FILE_NAME, interval=FLUSH_INTERVAL_SECONDS):
+    """flush(), throttled to once per `interval` (process-wide) unless FLUSH_MAX_BUFFERED spans are waiting."""
+    global _last_flush
+    with _buffer_lock:
+        if not _buffer or (len(_buffer) < FLUSH_MAX_BUFFERED and time.time() - _last_flush < interval):
+            return 0
+        _last_flush = time.time()
+    return flush(conn, db_file)
+
+
+# --- READING (dashboard) ---
+
+def read_metrics(conn, limit=MAX_METRIC_ROWS):
+    """Newest spans first, with their counters expanded into columns."""
+    import pandas as pd
+
+    try:
+        df = pd.read_sql(
+            f"""SELECT recorded_at, run_id, stage, parent, seconds, rows, details
+                FROM {METRICS_TABLE_NAME} ORDER BY id DESC LIMIT ?""",
+            conn, params=(limit,)
+        )
+    except (sqlite3.Error, pd.errors.DatabaseError):
+        return pd.DataFrame(columns=['recorded_at', 'run_id', 'stage', 'parent', 'seconds', 'rows'])
+    details = pd.json_normalize([json.loads(value) if value else {} for value in df.pop('details')])
+    df = pd.concat([df, details.set_index(df.index)], axis=1)
+    df['recorded_at'] = pd.to_datetime(df['recorded_at'], unit='s')
+    return df
+
+
+def summarize_stages(df):
+    """Per-stage call count, total rows, p50/p95/mean wall time, rows/sec and cache hit rate."""
+    import pandas as pd
+
+    if df.empty:
+        return pd.DataFrame()
+    grouped = df.groupby('stage', sort=False)
+    summary = pd.DataFrame({
+        'Calls': grouped.size(),
+        'Rows': grouped['rows'].sum(min_count=1),
+        'p50_ms': grouped['seconds'].median() * 1000,
+        'p95_ms': grouped['seconds'].quantile(0.95) * 1000,
+        'Mean_ms': grouped['seconds'].mean() * 1000,
+        'Total_s': grouped['seconds'].sum(),
+    })
+    summary['Rows_per_sec'] = summary['Rows'] / summary['Total_s'].where(summary['Total_s'] > 0)
+    if 'cache_hits' in df.columns and 'cache_lookups' in df.columns:
+        lookups = grouped['cache_lookups'].sum()
+        summary['Cache_hit_rate'] = grouped['cache_hits'].sum() / lookups.where(lookups > 0)
+    if 'translator_calls' in df.columns:
+        summary['Translator_calls'] = grouped['translator_calls'].sum(min_count=1)
+    return summary.sort_values('Total_s', ascending=False).round(3)
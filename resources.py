@@ -0,0 +1,81 @@
+"""
+Process-wide registry for expensive shared objects (translator client, ML models).
+
+Works like st.cache_resource but without a Streamlit dependency, so the agent, the
+dashboard and scripts share it: each resource is built once per process on first
+get() and then reused by every session. warm_up() builds them on a background thread
+so the first dashboard render doesn't pay for it.
+"""
+import importlib
+import threading
+import time
+
+_factories = {}
+_instances = {}
+_locks = {}
+_registry_lock = threading.Lock()
+_warm_up_thread = None
+
+
+def register(name, factory):
+    """Registers a zero-argument factory; the resource is built on first get()."""
+    with _registry_lock:
+        _factories[name] = factory
+        _locks.setdefault(name, threading.Lock())
+
+
+def get(name):
+    """Returns the shared instance, building it once (concurrent callers wait for the same build)."""
+    if name in _instances:
+        return _instances[name]
+    with _registry_lock:
+        if name not in _factories:
+            raise KeyError(f"No resource registered as '{name}'")
+        lock = _locks[name]
+    with lock:
+        if name not in _instances:
+            _instances[name] = _factories[name]()
+        return _instances[name]
+
+
+def is_loaded(name):
+    return name in _instances
+
+
+def clear(name=None):
+    """Drops one (or every) built instance; the next get() rebuilds it."""
+    with _registry_lock:
+        if name is None:
+            _instances.clear()
+        else:
+            _instances.pop(name, None)
+
+
+def _warm_up(modules, resources):
+    start = time.perf_counter()
+    for module in modules:
+        try:
+            importlib.import_module(module)
+        except Exception as e:
+            print(f"Warm-up: importing {module} failed: {e}")
+    for name in resources:
+        try:
+            get(name)
+        except Exception as e:
+            print(f"Warm-up: loading {name} failed: {e}")
+    print(f"Warm-up finished in {time.perf_counter() - start:.2f}s")
+
+
+def warm_up(modules=(), resources=()):
+    """
+    Imports modules and then builds resources on a daemon thread. Only one warm-up runs
+    per process; later calls return the running (or finished) thread.
+    """
+    global _warm_up_thread
+    with _registry_lock:
+        if _warm_up_thread is None:
+            _warm_up_thread = threading.Thread(
+                target=_warm_up, args=(list(modules), list(resources)), name='resource-warm-up', daemon=True
+            )
+            _warm_up_thread.start()
+        return _warm_up_thread
@@ -0,0 +1,355 @@
+"""
+Local sentiment scoring for feedback that arrives without Sentiment/Confidence_Score.
+
+A Hugging Face sequence-classification model is loaded from MODEL_DIR only (never the
+network), on first use, with the torch, int8 (dynamically quantized) or onnx backend.
+Texts are deduplicated, looked up in a cache keyed by (text hash, model fingerprint)
+and the rest are scored in length-bucketed batches under a token budget. Without the
+model or torch/transformers the stage is skipped and those rows stay unscored.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from translation_cache import text_key
+
+# --- DEFAULTS ---
+DB_FILE_NAME = 'feedback_data.db'
+CACHE_TABLE_NAME = 'sentiment_cache'
+MODEL_DIR = os.environ.get('FEEDBACK_SENTIMENT_MODEL_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models', 'sentiment'))
+# 'torch' (fp32), 'int8' (dynamically quantized Linear layers) or 'onnx' (model.onnx in MODEL_DIR)
+BACKEND = os.environ.get('FEEDBACK_SENTIMENT_BACKEND', 'torch')
+DEFAULT_NUM_THREADS = min(4, os.cpu_count() or 1)
+DEFAULT_MAX_LENGTH = 256
+DEFAULT_MAX_BATCH_TOKENS = 8192
+DEFAULT_MAX_BATCH_SIZE = 64
+DEFAULT_MEMORY_ITEMS = 4096
+CACHE_LOOKUP_CHUNK = 500
+BACKENDS = ('torch', 'int8', 'onnx')
+# Model files up to this size (config, vocab) are fingerprinted by content, larger ones (weights) by size/mtime
+FINGERPRINT_HASH_BYTES = 1 << 20
+
+
+def normalize_label(label):
+    """Maps model labels (POSITIVE, negative, LABEL_2, ...) onto the dashboard's Sentiment values."""
+    lowered = str(label).lower()
+    for prefix, sentiment in (('neg', 'Negative'), ('pos', 'Positive'), ('neu', 'Neutral')):
+        if lowered.startswith(prefix):
+            return sentiment
+    return str(label)
+
+
+def model_fingerprint(model_dir):
+    """
+    Short digest of the files in model_dir, so cached scores are tied to the model itself:
+    replacing the model (or its config) in the same directory changes it.
+    """
+    try:
+        names = sorted(os.listdir(model_dir))
+    except OSError:
+        return 'missing'
+    digest = hashlib.sha256()
+    for name in names:
+        path = os.path.join(model_dir, name)
+        if not os.path.isfile(path):
+            continue
+        stat = os.stat(path)
+        digest.update(name.encode('utf-8') + b'\0')
+        if stat.st_size <= FINGERPRINT_HASH_BYTES:
+            with open(path, 'rb') as f:
+                digest.update(f.read())
+        else:
+            digest.update(f"{stat.st_size}:{stat.st_mtime_ns}".encode('ascii'))
+    return digest.hexdigest()[:16]
+
+
+def plan_batches(lengths, max_batch_tokens=DEFAULT_MAX_BATCH_TOKENS, max_batch_size=DEFAULT_MAX_BATCH_SIZE):
+    """
+    Groups text positions into batches of similar token length.
+    Texts are sorted by length and a batch grows until its padded size
+    (rows x longest row) would exceed max_batch_tokens, so short feedback is scored
+    in wide batches and long feedback in narrow ones with little padding.
+    """
+    batches = []
+    batch = []
+    longest = 0
+    for position in sorted(range(len(lengths)), key=lambda i: lengths[i]):
+        length = max(1, lengths[position])
+        if batch and (len(batch) >= max_batch_size or (len(batch) + 1) * max(longest, length) > max_batch_tokens):
+            batches.append(batch)
+            batch = []
+            longest = 0
+        batch.append(position)
+        longest = max(longest, length)
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+class SentimentCache:
+    """Sentiment scores keyed by (text SHA-256, model): in-memory LRU in front of a SQLite side table."""
+
+    def __init__(self, db_path=DB_FILE_NAME, max_memory_items=DEFAULT_MEMORY_ITEMS):
+        self.db_path = db_path
+        self.max_memory_items = max_memory_items
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connection(self):
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS {CACHE_TABLE_NAME} (
+                    text_hash TEXT,
+                    model TEXT,
+                    sentiment TEXT,
+                    confidence REAL,
+                    PRIMARY KEY (text_hash, model)
+                )
+            """)
+            self._conn.commit()
+        return self._conn
+
+    def _remember(self, key, entry):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+    def get_many(self, hashes, model):
+        """Returns {text_hash: (sentiment, confidence)} for the cached hashes."""
+        found = {}
+        with self._lock:
+            missing = []
+            for text_hash in hashes:
+                entry = self._memory.get((text_hash, model))
+                if entry is not None:
+                    found[text_hash] = entry
+                else:
+                    missing.append(text_hash)
+
+            try:
+                conn = self._connection()
+                for start in range(0, len(missing), CACHE_LOOKUP_CHUNK):
+                    chunk = missing[start:start + CACHE_LOOKUP_CHUNK]
+                    rows = conn.execute(
+                        f"""SELECT text_hash, sentiment, confidence FROM {CACHE_TABLE_NAME}
+                            WHERE model = ? AND text_hash IN ({', '.join('?' for _ in chunk)})""",
+                        [model] + chunk
+                    ).fetchall()
+                    for text_hash, sentiment, confidence in rows:
+                        found[text_hash] = (sentiment, confidence)
+                        self._remember((text_hash, model), (sentiment, confidence))
+            except sqlite3.Error as e:
+                print(f"Sentiment cache read failed: {e}")
+        return found
+
+    def put_many(self, entries, model):
+        """Stores {text_hash: (sentiment, confidence)}."""
+        with self._lock:
+            for text_hash, entry in entries.items():
+                self._remember((text_hash, model), entry)
+            try:
+                conn = self._connection()
+                with conn:
+                    conn.executemany(
+                        f"INSERT OR REPLACE INTO {CACHE_TABLE_NAME} VALUES (?, ?, ?, ?)",
+                        ((text_hash, model, sentiment, confidence) for text_hash, (sentiment, confidence) in entries.items())
+                    )
+            except sqlite3.Error as e:
+                print(f"Sentiment cache write failed: {e}")
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class SentimentScorer:
+    """
+    Local, CPU-only sentiment stage for rows that arrive without Sentiment/Confidence_Score.
+
+    Loads a Hugging Face sequence-classification model from `model_dir` only (no network),
+    lazily on first use. Texts are deduplicated, served from the cache where possible and
+    the rest are scored in length-bucketed batches (see plan_batches) with a capped
+    thread count. torch/transformers are imported on load, so the dashboard and the rest
+    of the agent work without them; the stage is then simply skipped.
+    """
+
+    def __init__(self, model_dir=MODEL_DIR, backend=BACKEND, cache=None, num_threads=DEFAULT_NUM_THREADS,
+                 max_length=DEFAULT_MAX_LENGTH, max_batch_tokens=DEFAULT_MAX_BATCH_TOKENS,
+                 max_batch_size=DEFAULT_MAX_BATCH_SIZE):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown sentiment backend: {backend} (expected one of {', '.join(BACKENDS)})")
+        self.model_dir = model_dir
+        self.backend = backend
+        self.cache = cache
+        self.num_threads = num_threads
+        self.max_length = max_length
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_size = max_batch_size
+        self._model_key = None
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._load_error = None
+        self._tokenizer = None
+        self._predict = None
+        self._labels = None
+        self.reset_stats()
+
+    @property
+    def model_key(self):
+        """Cache entries are only valid for the model files (and numeric backend) that produced them."""
+        if self._model_key is None:
+            name = os.path.basename(os.path.normpath(self.model_dir))
+            self._model_key = f"{name}:{self.backend}:{model_fingerprint(self.model_dir)}"
+        return self._model_key
+
+    def reset_stats(self):
+        self.stats = {
+            'rows': 0,
+            'unique_texts': 0,
+            'cache_hits': 0,
+            'scored': 0,
+            'batches': 0,
+            'seconds': 0.0,
+        }
+
+    # --- MODEL LOADING ---
+
+    def _load_torch(self):
+        import torch
+        from transformers import AutoModelForSequenceClassification
+
+        torch.set_num_threads(self.num_threads)
+        model = AutoModelForSequenceClassification.from_pretrained(self.model_dir, local_files_only=True)
+        model.eval()
+        if self.backend == 'int8':
+            model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        self._labels = model.config.id2label
+
+        def predict(encoded):
+            with torch.inference_mode():
+                inputs = {name: torch.from_numpy(values) for name, values in encoded.items()}
+                return model(**inputs).logits.float().numpy()
+        return predict
+
+    def _load_onnx(self):
+        import onnxruntime
+        from transformers import AutoConfig
+
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = self.num_threads
+        options.inter_op_num_threads = 1
+        session = onnxruntime.InferenceSession(
+            os.path.join(self.model_dir, 'model.onnx'), options, providers=['CPUExecutionProvider']
+        )
+        input_names = {model_input.name for model_input in session.get_inputs()}
+        self._labels = AutoConfig.from_pretrained(self.model_dir, local_files_only=True).id2label
+
+        def predict(encoded):
+            feed = {name: values.astype(np.int64) for name, values in encoded.items() if name in input_names}
+            return session.run(None, feed)[0]
+        return predict
+
+    def _ensure_loaded(self):
+        with self._lock:
+            if self._loaded:
+                return self._load_error is None
+            self._loaded = True
+            try:
+                if not os.path.isdir(self.model_dir):
+                    raise FileNotFoundError(f"no model directory at {self.model_dir}")
+                # Key the cache on the files actually being loaded
+                self._model_key = None
+                from transformers import AutoTokenizer
+
+                self._tokenizer = AutoTokenizer.from_pretrained(self.model_dir, local_files_only=True)
+                self._predict = self._load_onnx() if self.backend == 'onnx' else self._load_torch()
+            except Exception as e:
+                self._load_error = e
+                print(f"Sentiment model unavailable, rows without Sentiment are left unscored (and pending): {e}")
+                return False
+            return True
+
+    @property
+    def available(self):
+        return self._ensure_loaded()
+
+    # --- SCORING ---
+
+    def _score_batch(self, encodings, batch):
+        encoded = self._tokenizer.pad(
+            {name: [values[position] for position in batch] for name, values in encodings.items()},
+            return_tensors='np'
+        )
+        logits = self._predict(dict(encoded))
+        # Softmax in float64 for stable confidences
+        logits = logits.astype(np.float64)
+        probabilities = np.exp(logits - logits.max(axis=1, keepdims=True))
+        probabilities /= probabilities.sum(axis=1, keepdims=True)
+        best = probabilities.argmax(axis=1)
+        return [
+            (normalize_label(self._labels[int(label)]), round(float(probabilities[row, label]), 4))
+            for row, label in enumerate(best)
+        ]
+
+    def score_texts(self, texts):
+        """Scores unique texts; returns {text: (sentiment, confidence)} (empty if no model)."""
+        if not texts or not self._ensure_loaded():
+            return {}
+        encodings = self._tokenizer(list(texts), truncation=True, max_length=self.max_length)
+        encodings = {name: encodings[name] for name in encodings.keys()}
+        lengths = [len(ids) for ids in encodings['input_ids']]
+
+        results = {}
+        for batch in plan_batches(lengths, self.max_batch_tokens, self.max_batch_size):
+            self.stats['batches'] += 1
+            for position, score in zip(batch, self._score_batch(encodings, batch)):
+                results[texts[position]] = score
+        return results
+
+    def score_series(self, texts):
+        """
+        Returns (sentiment, confidence) Series aligned to `texts`. Texts the model could
+        not score (no model available, empty values) come back as None/NaN.
+        """
+        start = time.perf_counter()
+        codes, uniques = pd.factorize(texts.fillna('').astype(str))
+        uniques = list(uniques)
+        self.stats['rows'] += len(texts)
+        self.stats['unique_texts'] += len(uniques)
+
+        scores = {}
+        hashes = {text: text_key(text) for text in uniques if text}
+        if self.cache is not None and hashes:
+            cached = self.cache.get_many(list(hashes.values()), self.model_key)
+            scores = {text: cached[text_hash] for text, text_hash in hashes.items() if text_hash in cached}
+            self.stats['cache_hits'] += len(scores)
+
+        pending = [text for text in hashes if text not in scores]
+        fresh = self.score_texts(pending)
+        if fresh:
+            self.stats['scored'] += len(fresh)
+            if self.cache is not None:
+                self.cache.put_many({hashes[text]: score for text, score in fresh.items()}, self.model_key)
+            scores.update(fresh)
+
+        unique_scores = [scores.get(text, (None, np.nan)) for text in uniques]
+        sentiment = pd.Series([unique_scores[code][0] for code in codes], index=texts.index, dtype=object)
+        confidence = pd.Series([unique_scores[code][1] for code in codes], index=texts.index, dtype=float)
+
+        seconds = time.perf_counter() - start
+        self.stats['seconds'] += seconds
+        if fresh:
+            print(f"Sentiment: scored {len(texts):,} rows ({len(fresh):,} texts through the model) "
+                  f"in {seconds:.2f}s ({len(texts) / seconds:,.0f} rows/sec)")
+        return sentiment, confidence
@@ -0,0 +1,128 @@
+"""The agent's write-back against a temporary database: what it stores and what it leaves alone."""
+import sqlite3
+
+import pytest
+
+import agent_logic
+import perf_metrics
+import resources
+from feedback_collector import FeedbackIngestor
+from sentiment_scorer import SentimentCache, SentimentScorer
+from translation_cache import TranslationCache, text_key
+
+
+@pytest.fixture
+def db_file(tmp_path, monkeypatch):
+    """A fresh feedback DB, with the agent's caches and sentiment model pointed at it (no model files)."""
+    path = str(tmp_path / 'feedback.db')
+    translations = TranslationCache(path)
+    monkeypatch.setattr(agent_logic, 'translation_cache', translations)
+    monkeypatch.setattr(agent_logic.translation_engine, 'cache', translations)
+    monkeypatch.setattr(perf_metrics, 'ENABLED', False)
+    scores = SentimentCache(path)
+    resources.clear('sentiment_scorer')
+    resources.register('sentiment_scorer', lambda: SentimentScorer(str(tmp_path / 'no-model'), cache=scores))
+    yield path
+    resources.clear('sentiment_scorer')
+    resources.register('sentiment_scorer', agent_logic._create_sentiment_scorer)
+    translations.close()
+    scores.close()
+
+
+def ingest(db_file, records):
+    with FeedbackIngestor(db_file) as ingestor:
+        ingestor.ingest(records)
+
+
+def run_agent(db_file):
+    conn = sqlite3.connect(db_file)
+    try:
+        return agent_logic._process_new_rows(conn)
+    finally:
+        conn.close()
+
+
+def fetch_rows(db_file, columns):
+    conn = sqlite3.connect(db_file)
+    try:
+        return conn.execute(f"SELECT {agent_logic.sql_column_list(columns)} FROM feedback_table ORDER BY id").fetchall()
+    finally:
+        conn.close()
+
+
+def test_write_back_keeps_the_ingested_scores(db_file):
+    ingest(db_file, [
+        {'Text': 'Payment failed twice', 'Sentiment': '  Negative ', 'Confidence_Score': 0.95, 'User_ID': 1},
+        {'Text': 'Love the new design', 'Sentiment': 'Positive', 'Confidence_Score': 0.9, 'User_ID': 2},
+    ])
+    assert run_agent(db_file) == 2
+
+    rows = fetch_rows(db_file, ['Sentiment', 'Confidence_Score', 'Scored_Sentiment', 'Scored_Confidence', 'Priority_Rank'])
+    # Raw columns exactly as ingested (whitespace included); the cleaned values live in Scored_*
+    assert [row[:2] for row in rows] == [('  Negative ', 0.95), ('Positive', 0.9)]
+    assert [row[2:4] for row in rows] == [('Negative', 0.95), ('Positive', 0.9)]
+    assert all(row[4] is not None for row in rows)
+
+
+def test_stored_results_read_back_with_the_scored_values(db_file):
+    ingest(db_file, [{'Text': 'Payment failed twice', 'Sentiment': ' Negative', 'Confidence_Score': 0.95, 'User_ID': 1}])
+    run_agent(db_file)
+    conn = sqlite3.connect(db_file)
+    try:
+        df = agent_logic._load_stored_results(conn)
+    finally:
+        conn.close()
+    assert df['Sentiment'].tolist() == ['Negative']
+    assert df['Confidence_Score'].tolist() == [0.95]
+    assert 'Scored_Sentiment' not in df.columns
+
+
+# --- No sentiment model ---
+
+def test_rows_without_a_score_stay_pending_until_a_model_can_score_them(db_file):
+    ingest(db_file, [
+        {'Text': 'The app keeps crashing on login', 'User_ID': 1},
+        {'Text': 'Love the new design', 'Sentiment': 'Positive', 'Confidence_Score': 0.9, 'User_ID': 2},
+    ])
+    assert run_agent(db_file) == 1
+
+    columns = ['Sentiment', 'Confidence_Score', 'Scored_Sentiment', 'Scored_Confidence', 'Priority', 'Priority_Rank']
+    unscored, scored = fetch_rows(db_file, columns)
+    assert unscored == (None, None, None, None, None, None)
+    assert scored[2:4] == ('Positive', 0.9) and scored[5] is not None
+    # Still pending, so the next run picks it up again
+    assert run_agent(db_file) == 0
+
+    # A score for the text becomes available (the same path a newly installed model's output takes)
+    scorer = resources.get('sentiment_scorer')
+    scorer.cache.put_many({text_key('The app keeps crashing on login'): ('Negative', 0.97)}, scorer.model_key)
+    assert run_agent(db_file) == 1
+    unscored, _ = fetch_rows(db_file, columns)
+    assert unscored[:4] == (None, None, 'Negative', 0.97)
+    assert unscored[5] is not None
+
+
+class _InlinePool:
+    """Runs pool tasks in this process; chunks are copied as pickling to a pool process would."""
+
+    def map(self, fn, chunks):
+        return [fn(chunk.copy()) for chunk in chunks]
+
+
+def test_worker_batches_move_past_rows_left_pending(db_file):
+    import feedback_worker
+
+    ingest(db_file, [{'Text': f'No score yet {i}', 'User_ID': i} for i in range(3)]
+           + [{'Text': 'Refund never arrived', 'Sentiment': 'Negative', 'Confidence_Score': 0.8, 'User_ID': 9}])
+    worker = feedback_worker.FeedbackWorker(db_file, max_workers=1, batch_size=2, chunk_size=2)
+    conn = feedback_worker.connect(db_file)
+    try:
+        stored = []
+        while True:
+            stored.append(worker.run_batch(conn, _InlinePool()))
+            if worker.after_id is None:
+                break
+    finally:
+        conn.close()
+    assert stored == [0, 1, 0]
+    assert [rank is None for (rank,) in fetch_rows(db_file, ['Priority_Rank'])] == [True, True, True, False]
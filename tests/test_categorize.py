@@ -0,0 +1,97 @@
+"""Vectorized categorize/priority (agent_logic, feedback_rules) against the row-wise helpers."""
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import agent_logic
+from feedback_collector import SAMPLE_TEXTS
+from feedback_rules import RuleSet, get_rules
+
+EDGE_TEXTS = [
+    # Missing / empty
+    None, float('nan'), '', '   ', 0, 42.5,
+    # Several keyword groups: file order decides
+    'Customer support said the app is broken',
+    'The website sells a damaged product',
+    'Login fails and technical support has a slow response',
+    'PRODUCT QUALITY and WEBSITE',
+    # Substring matches ('app' in 'happy', 'product' in 'production')
+    'I am happy', 'production outage', 'reapplied twice',
+    # Non-English and untranslated text
+    'पेमेंट फेल हो गया', 'la aplicación se bloquea', 'el producto llegó roto',
+    'லாகின் வேலை செய்யவில்லை', 'Ça marche très bien, merci',
+    # No keyword at all
+    'Everything was fine, average experience.',
+]
+
+BOUNDARY_ROWS = [
+    ('Negative', 0.75), ('Negative', 0.7499999), ('Negative', 0.75000001),
+    ('Positive', 0.85), ('Positive', 0.8499999), ('Positive', 1.0),
+    ('Negative', 0.0), ('Neutral', 0.99), ('negative', 0.9),
+    ('Negative', float('nan')), (None, 0.9), (None, float('nan')),
+]
+
+
+def _row_wise_categories(texts):
+    return [agent_logic.categorize_feedback(text) for text in texts]
+
+
+@pytest.mark.parametrize('texts', [SAMPLE_TEXTS, EDGE_TEXTS], ids=['samples', 'edge-cases'])
+def test_categorize_series_matches_row_wise(texts):
+    series = pd.Series(texts, dtype=object)
+    assert agent_logic.categorize_series(series).tolist() == _row_wise_categories(texts)
+
+
+def test_categorize_series_keeps_index_and_repeats():
+    texts = pd.Series(EDGE_TEXTS * 3, index=np.arange(len(EDGE_TEXTS) * 3) * 7, dtype=object)
+    result = agent_logic.categorize_series(texts)
+    assert result.index.equals(texts.index)
+    assert result.tolist() == _row_wise_categories(texts)
+
+
+def test_categorize_precedence_follows_file_order():
+    rules = get_rules()
+    assert agent_logic.categorize_series(pd.Series(['customer support for the app']))[0] == rules.category_names[0]
+    assert agent_logic.categorize_series(pd.Series([None]))[0] == rules.default_category
+
+
+def test_overlapping_keywords_across_categories():
+    # Shorter keywords that are prefixes of longer ones, in both precedence orders
+    rules = RuleSet({
+        'categories': [
+            {'name': 'Payments', 'keywords': ['pay']},
+            {'name': 'Payouts', 'keywords': ['payout', 'payment failed']},
+            {'name': 'Apps', 'keywords': ['app', 'application']},
+            {'name': 'Applied', 'keywords': ['applied', 'ap']},
+        ],
+        'priorities': [{'label': 'Any', 'rank': 1}],
+    })
+    for text in ['payout delayed', 'payment failed', 'application error', 'applied', 'ap', 'a', '',
+                 'the payout app', 'apap', 'APPLIED PAYOUT'.lower()]:
+        assert rules.categorize(text) == rules.categorize_linear(text), text
+
+
+@pytest.mark.parametrize('sentiment, confidence', BOUNDARY_ROWS)
+def test_priority_boundaries_match_row_wise(sentiment, confidence):
+    df = pd.DataFrame({'Sentiment': [sentiment], 'Confidence_Score': [confidence]})
+    expected = agent_logic.assign_priority(df.iloc[0])
+    assert agent_logic.assign_priority_series(df).tolist() == [expected]
+
+
+def test_priority_thresholds_are_inclusive():
+    rules = get_rules()
+    critical = rules.priorities[0]
+    assert critical['sentiment'] == 'Negative' and critical['min_confidence'] == 0.75
+    df = pd.DataFrame({'Sentiment': ['Negative', 'Negative'], 'Confidence_Score': [0.75, math.nextafter(0.75, 0)]})
+    labels = agent_logic.assign_priority_series(df).tolist()
+    assert labels[0] == critical['label']
+    assert labels[1] != critical['label']
+
+
+def test_priority_frame_matches_row_wise():
+    sentiments, confidences = zip(*BOUNDARY_ROWS)
+    df = pd.DataFrame({'Sentiment': list(sentiments) * 2, 'Confidence_Score': list(confidences) * 2})
+    expected = df.apply(agent_logic.assign_priority, axis=1).tolist()
+    assert agent_logic.assign_priority_series(df).tolist() == expected
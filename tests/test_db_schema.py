@@ -0,0 +1,140 @@
+"""Schema migrations from the baseline table, and the triggers that keep the rollup and search index in step."""
+import sqlite3
+
+import pytest
+
+from db_schema import (BUCKET_EPSILON, CONFIDENCE_BUCKETS, LEGACY_RESULTS_TABLE_NAME, ROLLUP_TABLE_NAME,
+                       SCHEMA_VERSION, SEARCH_TABLE_NAME, TABLE_NAME, ensure_schema, fts5_available,
+                       get_schema_version, table_exists)
+
+LEGACY_ROWS = [
+    ('2024-05-01 09:00:00', 'Payment failed twice', 'Negative', 0.95, 1),
+    ('2024-05-01 10:30:00', 'भुगतान विफल रहा', 'Negative', 0.8, 2),
+    ('2024-05-02 08:15:00', 'Love the new design', 'Positive', 0.9, 3),
+]
+
+
+@pytest.fixture
+def conn(tmp_path):
+    """The baseline shape: no primary key, derived columns in a separate feedback_results table."""
+    conn = sqlite3.connect(str(tmp_path / 'feedback.db'))
+    conn.execute(f"""
+        CREATE TABLE {TABLE_NAME} (
+            "Date/Time" TEXT, Text TEXT, Sentiment TEXT, Confidence_Score REAL, User_ID INTEGER
+        )
+    """)
+    conn.execute(f"""
+        CREATE TABLE {LEGACY_RESULTS_TABLE_NAME} (
+            source_rowid INTEGER PRIMARY KEY, Translated_Text TEXT, Category TEXT, Priority TEXT, Priority_Rank INTEGER
+        )
+    """)
+    conn.executemany(f"INSERT INTO {TABLE_NAME} VALUES (?, ?, ?, ?, ?)", LEGACY_ROWS)
+    conn.execute(
+        f"INSERT INTO {LEGACY_RESULTS_TABLE_NAME} VALUES (2, 'Payment failed', 'Billing/Payment', 'High', 1)"
+    )
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+def store(conn, row_id, category, priority, rank, confidence):
+    """What the agent's write-back changes on a row."""
+    with conn:
+        conn.execute(
+            f"""UPDATE {TABLE_NAME} SET Category = ?, Priority = ?, Priority_Rank = ?, Scored_Confidence = ?
+                WHERE id = ?""",
+            (category, priority, rank, confidence, row_id)
+        )
+
+
+def rollup_rows(conn):
+    return sorted(conn.execute(f"""
+        SELECT day, Category, Priority, confidence_bucket, row_count FROM {ROLLUP_TABLE_NAME} WHERE row_count > 0
+    """).fetchall())
+
+
+def grouped_rows(conn):
+    return sorted(conn.execute(f"""
+        SELECT COALESCE(date("Date/Time"), '') AS row_day, Category, Priority,
+               CAST(COALESCE(Scored_Confidence, 0) * {CONFIDENCE_BUCKETS} + {BUCKET_EPSILON} AS INTEGER) AS bucket,
+               COUNT(*)
+        FROM {TABLE_NAME} WHERE Priority_Rank IS NOT NULL
+        GROUP BY row_day, Category, Priority, bucket
+    """).fetchall())
+
+
+def search(conn, query):
+    return [row_id for (row_id,) in conn.execute(
+        f"SELECT rowid FROM {SEARCH_TABLE_NAME} WHERE {SEARCH_TABLE_NAME} MATCH ? ORDER BY rowid", (query,)
+    )]
+
+
+def test_baseline_table_migrates_to_the_latest_version(conn):
+    assert ensure_schema(conn) == SCHEMA_VERSION
+    assert get_schema_version(conn) == SCHEMA_VERSION
+    assert not table_exists(conn, LEGACY_RESULTS_TABLE_NAME)
+
+    rows = conn.execute(
+        f"""SELECT id, "Date/Time", Text, Sentiment, Confidence_Score, User_ID, Translated_Text, Priority_Rank
+            FROM {TABLE_NAME} ORDER BY id"""
+    ).fetchall()
+    # Rowids became ids; translations carried over, and every row is pending again for clustering
+    assert [row[:6] for row in rows] == [(row_id, *row) for row_id, row in enumerate(LEGACY_ROWS, 1)]
+    assert [row[6] for row in rows] == [None, 'Payment failed', None]
+    assert [row[7] for row in rows] == [None, None, None]
+    assert rollup_rows(conn) == []
+
+
+def test_rollup_follows_inserts_updates_and_deletes(conn):
+    ensure_schema(conn)
+    store(conn, 1, 'Billing/Payment', 'High', 1, 0.57)
+    store(conn, 2, 'Billing/Payment', 'High', 1, 0.571)
+    store(conn, 3, 'UI/UX', 'Low', 3, 0.9)
+    assert rollup_rows(conn) == grouped_rows(conn)
+    assert ('2024-05-01', 'Billing/Payment', 'High', 57, 2) in rollup_rows(conn)
+
+    store(conn, 2, 'Technical Bug', 'High', 1, 0.3)
+    with conn:
+        conn.execute(f"UPDATE {TABLE_NAME} SET \"Date/Time\" = '2024-05-03 12:00:00' WHERE id = 3")
+        conn.execute(
+            f"""INSERT INTO {TABLE_NAME} ("Date/Time", Text, Category, Priority, Priority_Rank, Scored_Confidence)
+                VALUES (NULL, 'Undated', 'General Feedback', 'Medium', 2, 0.5)"""
+        )
+    assert rollup_rows(conn) == grouped_rows(conn)
+
+    with conn:
+        conn.execute(f"DELETE FROM {TABLE_NAME} WHERE id IN (1, 3)")
+        # Marking a row pending again takes it out of the rollup
+        conn.execute(f"UPDATE {TABLE_NAME} SET Category = NULL, Priority = NULL, Priority_Rank = NULL WHERE id = 2")
+    assert rollup_rows(conn) == grouped_rows(conn) == [('', 'General Feedback', 'Medium', 50, 1)]
+
+
+def test_search_index_follows_translations_and_deletes(conn):
+    if not fts5_available(conn):
+        pytest.skip("SQLite built without FTS5")
+    ensure_schema(conn)
+    assert search(conn, 'twice') == [1]
+    assert search(conn, 'विफल') == [2]
+    # The migrated translation was indexed too
+    assert search(conn, 'failed') == [1, 2]
+
+    with conn:
+        conn.execute(f"UPDATE {TABLE_NAME} SET Translated_Text = 'Payment did not go through' WHERE id = 2")
+    assert search(conn, 'failed') == [1]
+    assert search(conn, 'through') == [2]
+
+    with conn:
+        conn.execute(f"DELETE FROM {TABLE_NAME} WHERE id = 1")
+    assert search(conn, 'payment') == [2]
+    assert search(conn, 'twice') == []
+
+
+def test_ensure_schema_again_changes_nothing(conn, capsys):
+    ensure_schema(conn)
+    capsys.readouterr()
+    schema = conn.execute("SELECT type, name, sql FROM sqlite_master ORDER BY type, name").fetchall()
+
+    assert ensure_schema(conn) == SCHEMA_VERSION
+    assert capsys.readouterr().out == ''
+    assert conn.execute("SELECT type, name, sql FROM sqlite_master ORDER BY type, name").fetchall() == schema
+    assert conn.execute(f"SELECT COUNT(*) FROM {TABLE_NAME}").fetchone()[0] == len(LEGACY_ROWS)
@@ -0,0 +1,109 @@
+"""Near-duplicate clustering against a temporary feedback DB."""
+import sqlite3
+
+import pandas as pd
+import pytest
+
+import feedback_clusters
+from db_schema import CLUSTERS_TABLE_NAME, CLUSTER_BANDS_TABLE_NAME, CLUSTER_TEXTS_TABLE_NAME, ensure_schema
+from feedback_clusters import assign_clusters
+
+CLUSTER_TABLES = [CLUSTERS_TABLE_NAME, CLUSTER_TEXTS_TABLE_NAME, CLUSTER_BANDS_TABLE_NAME]
+CRASH = 'The app crashes every time I open the settings page'
+# Estimated similarity to CRASH: 0.86 and 0.81, both above SIMILARITY_THRESHOLD
+CRASH_NEAR_DUPLICATES = [
+    'The app crashes every time I open the setting page',
+    'the app crashes everytime I open the settings page.',
+]
+# Same topic and wording but only ~0.39 similar: a cluster of its own
+SLOW = 'The app is slow when I open the settings page'
+REFUND = 'Refund has not arrived after two weeks'
+
+
+@pytest.fixture
+def db_file(tmp_path):
+    path = str(tmp_path / 'feedback.db')
+    conn = sqlite3.connect(path)
+    ensure_schema(conn)
+    conn.close()
+    return path
+
+
+@pytest.fixture
+def conn(db_file):
+    conn = sqlite3.connect(db_file)
+    yield conn
+    conn.close()
+
+
+def cluster_count(conn):
+    return conn.execute(f"SELECT COUNT(*) FROM {CLUSTERS_TABLE_NAME}").fetchone()[0]
+
+
+def table_rows(conn):
+    return {table: sorted(conn.execute(f"SELECT * FROM {table}").fetchall()) for table in CLUSTER_TABLES}
+
+
+def test_without_store_the_cluster_tables_are_left_alone(conn):
+    assign_clusters(conn, pd.Series(['The app crashes when I open settings']))
+    before = table_rows(conn)
+
+    texts = pd.Series([
+        'The app crashes when I open settings!',
+        'Refund has not arrived after two weeks',
+        'Refund has not arrived after two weeks.',
+    ])
+    cluster_ids, representatives = assign_clusters(conn, texts, store=False)
+
+    assert table_rows(conn) == before
+    assert not conn.in_transaction
+    # The stored cluster is reused; the new one has no id yet but still groups its texts
+    assert cluster_ids[0] == before[CLUSTERS_TABLE_NAME][0][0]
+    assert cluster_ids[1:].isna().all()
+    assert representatives.tolist() == [
+        'The app crashes when I open settings',
+        'Refund has not arrived after two weeks',
+        'Refund has not arrived after two weeks',
+    ]
+
+
+def test_near_duplicates_share_a_cluster(conn):
+    texts = pd.Series([CRASH] + CRASH_NEAR_DUPLICATES + [SLOW, REFUND, CRASH.upper()])
+    cluster_ids, representatives = assign_clusters(conn, texts)
+
+    crash_id = cluster_ids[0]
+    assert cluster_ids[:3].tolist() == [crash_id] * 3
+    assert cluster_ids[5] == crash_id
+    assert len({crash_id, cluster_ids[3], cluster_ids[4]}) == 3
+    assert representatives[:3].tolist() == [CRASH] * 3
+    assert cluster_count(conn) == 3
+
+    # A later run finds the stored cluster; a distinct text still gets its own
+    later_ids, _ = assign_clusters(conn, pd.Series(['The app crashes every time I open the settings pages', 'Dark mode please']))
+    assert later_ids[0] == crash_id
+    assert later_ids[1] not in cluster_ids.tolist()
+    assert cluster_count(conn) == 4
+
+
+@pytest.mark.parametrize('other_text', [CRASH, CRASH_NEAR_DUPLICATES[0]], ids=['same text', 'near duplicate'])
+def test_overlapping_runs_converge_on_one_cluster(db_file, conn, monkeypatch, other_text):
+    """A second process stores its cluster after this run's snapshot but before it takes the write lock."""
+    store_new_clusters = feedback_clusters._store_new_clusters
+    other_ids = []
+
+    def store_after_the_other_process(*args):
+        monkeypatch.setattr(feedback_clusters, '_store_new_clusters', store_new_clusters)
+        other = sqlite3.connect(db_file)
+        try:
+            other_ids.extend(assign_clusters(other, pd.Series([other_text]))[0])
+        finally:
+            other.close()
+        store_new_clusters(*args)
+
+    monkeypatch.setattr(feedback_clusters, '_store_new_clusters', store_after_the_other_process)
+    cluster_ids, representatives = assign_clusters(conn, pd.Series([CRASH]))
+
+    assert cluster_ids.tolist() == other_ids
+    assert representatives.tolist() == [other_text]
+    assert cluster_count(conn) == 1
+    assert conn.execute(f"SELECT COUNT(DISTINCT cluster_id) FROM {CLUSTER_TEXTS_TABLE_NAME}").fetchone()[0] == 1
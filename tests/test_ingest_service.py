@@ -0,0 +1,186 @@
+"""POST body validation, the append log's replay/commit cycle and the service's error paths."""
+import asyncio
+import json
+import sqlite3
+
+import pytest
+
+from feedback_ingest_service import AppendLog, IngestService, parse_body
+
+RECEIVED_AT = '2026-03-01 12:00:00'
+
+
+# --- parse_body ---
+
+def test_single_object_and_array_bodies():
+    [record] = parse_body(b'{"Text": "Checkout keeps failing", "User_ID": 1042}', RECEIVED_AT)
+    assert record == {'Date/Time': RECEIVED_AT, 'Text': 'Checkout keeps failing', 'Sentiment': None,
+                      'Confidence_Score': None, 'User_ID': 1042}
+
+    records = parse_body(json.dumps([
+        {'Text': 'a', 'Date/Time': '2026-02-03T04:05:06', 'Sentiment': 'Negative', 'Confidence_Score': 1},
+        {'Text': 'b', 'User_ID': 7.0},
+    ]).encode('utf-8'), RECEIVED_AT)
+    assert records[0]['Date/Time'] == '2026-02-03 04:05:06'
+    assert records[0]['Confidence_Score'] == 1
+    assert records[1]['User_ID'] == 7 and isinstance(records[1]['User_ID'], int)
+
+
+@pytest.mark.parametrize('body, message', [
+    (b'not json', 'body must be JSON'),
+    (b'\xff\xfe', 'body must be JSON'),
+    (b'[]', 'empty batch'),
+    (b'"just a string"', 'each item must be a JSON object'),
+    (b'{"User_ID": 1}', "'Text' must be a non-empty string"),
+    (b'{"Text": "   "}', "'Text' must be a non-empty string"),
+    (b'{"Text": "x", "Date/Time": "yesterday"}', "'Date/Time' must be an ISO timestamp"),
+    (b'{"Text": "x", "Sentiment": 1}', "'Sentiment' must be a string"),
+    (b'{"Text": "x", "Confidence_Score": "0.9"}', "'Confidence_Score' must be a number"),
+    (b'{"Text": "x", "Confidence_Score": true}', "'Confidence_Score' must be a number"),
+    (b'{"Text": "x", "User_ID": 1.5}', "'User_ID' must be an integer"),
+    (b'[{"Text": "ok"}, {"Text": ""}]', "item 1: 'Text' must be a non-empty string"),
+])
+def test_invalid_bodies(body, message):
+    with pytest.raises(ValueError) as error:
+        parse_body(body, RECEIVED_AT)
+    assert str(error.value) == message
+
+
+# --- AppendLog ---
+
+@pytest.fixture
+def log_path(tmp_path):
+    return str(tmp_path / 'ingest.log')
+
+
+def test_uncommitted_lines_are_replayed_after_a_restart(log_path):
+    log = AppendLog(log_path)
+    first = log.append([{'Text': 'one'}])
+    second = log.append([{'Text': 'two'}, {'Text': 'three'}])
+    log.commit(first)
+    log.close()
+
+    reopened = AppendLog(log_path)
+    try:
+        assert reopened.pending() == [([{'Text': 'two'}, {'Text': 'three'}], second)]
+    finally:
+        reopened.close()
+
+
+def test_log_starts_over_once_fully_committed(log_path, tmp_path):
+    log = AppendLog(log_path)
+    try:
+        log.append([{'Text': 'one'}])
+        offset = log.append([{'Text': 'two'}])
+        log.commit(offset)
+        assert (tmp_path / 'ingest.log').stat().st_size == 0
+        assert (tmp_path / 'ingest.log.committed').read_text() == '0'
+        assert log.pending() == []
+
+        # Offsets count from the start of the emptied file again
+        offset = log.append([{'Text': 'three'}])
+        assert log.pending() == [([{'Text': 'three'}], offset)]
+    finally:
+        log.close()
+
+
+def test_torn_last_line_is_dropped_and_appends_start_a_new_line(log_path):
+    log = AppendLog(log_path)
+    offset = log.append([{'Text': 'stored'}])
+    log.close()
+    with open(log_path, 'ab') as f:
+        f.write(b'[{"Text": "never acknow')  # the process died mid-write
+
+    recovered = AppendLog(log_path)
+    try:
+        assert recovered.pending() == [([{'Text': 'stored'}], offset)]
+        next_offset = recovered.append([{'Text': 'after restart'}])
+        assert recovered.pending() == [([{'Text': 'stored'}], offset), ([{'Text': 'after restart'}], next_offset)]
+    finally:
+        recovered.close()
+
+
+def test_log_without_any_complete_line(log_path):
+    with open(log_path, 'wb') as f:
+        f.write(b'[{"Text": "torn"')
+    log = AppendLog(log_path)
+    try:
+        assert log.pending() == []
+        offset = log.append([{'Text': 'first'}])
+        assert log.pending() == [([{'Text': 'first'}], offset)]
+    finally:
+        log.close()
+
+
+# --- Service ---
+
+async def _request(port, raw):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(raw)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    return response
+
+
+def _post(body, length=None):
+    length = len(body) if length is None else length
+    return (f"POST /feedback HTTP/1.1\r\nHost: x\r\nContent-Length: {length}\r\n"
+            f"Connection: close\r\n\r\n").encode('latin-1') + body
+
+
+def _run_service(db_file, scenario, **kwargs):
+    async def main():
+        service = IngestService(db_file, **kwargs)
+        port = await service.start('127.0.0.1', 0)
+        try:
+            return service, await scenario(service, port)
+        finally:
+            await service.stop()
+    return asyncio.run(main())
+
+
+def test_bad_content_length_gets_a_400(tmp_path):
+    async def scenario(service, port):
+        return [await _request(port, _post(b'{}', length=value)) for value in ('abc', '-5')]
+
+    _, responses = _run_service(str(tmp_path / 'feedback.db'), scenario)
+    for response in responses:
+        assert response.startswith(b'HTTP/1.1 400 ')
+        assert b'invalid Content-Length' in response
+
+
+def test_accepted_feedback_is_stored(tmp_path):
+    db_file = str(tmp_path / 'feedback.db')
+
+    async def scenario(service, port):
+        return await _request(port, _post(b'[{"Text": "one"}, {"Text": "two"}]'))
+
+    service, response = _run_service(db_file, scenario, log_path=str(tmp_path / 'ingest.log'))
+    assert response.startswith(b'HTTP/1.1 202 ')
+    conn = sqlite3.connect(db_file)
+    try:
+        assert [row[0] for row in conn.execute("SELECT Text FROM feedback_table ORDER BY id")] == ['one', 'two']
+    finally:
+        conn.close()
+    assert service.stats['written'] == 2
+    assert (tmp_path / 'ingest.log').stat().st_size == 0
+
+
+def test_writer_failure_stops_accepting(tmp_path, monkeypatch):
+    def broken_write(self, records):
+        raise RuntimeError('disk on fire')
+
+    monkeypatch.setattr(IngestService, '_write', broken_write)
+
+    async def scenario(service, port):
+        first = await _request(port, _post(b'{"Text": "one"}'))
+        await asyncio.wait_for(service.writer_task, 5)
+        second = await _request(port, _post(b'{"Text": "two"}'))
+        return first, second
+
+    service, (first, second) = _run_service(str(tmp_path / 'feedback.db'), scenario)
+    assert first.startswith(b'HTTP/1.1 202 ')
+    assert second.startswith(b'HTTP/1.1 503 ')
+    assert service.health()['writer_error'] == 'RuntimeError: disk on fire'
+    assert service.queued_rows == 1 and service.stats['write_errors'] == 1
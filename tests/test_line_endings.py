@@ -0,0 +1,15 @@
+"""The sources use CRLF throughout; a whole-file LF conversion hides real changes from diffs and blame."""
+import glob
+import os
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SOURCES = sorted(glob.glob(os.path.join(ROOT, '*.py')) + glob.glob(os.path.join(ROOT, 'tests', '*.py')))
+
+
+@pytest.mark.parametrize('path', SOURCES, ids=[os.path.relpath(path, ROOT) for path in SOURCES])
+def test_source_uses_crlf_only(path):
+    with open(path, 'rb') as f:
+        data = f.read()
+    assert data.count(b'\n') == data.count(b'\r\n'), "bare LF line endings; keep the file CRLF"
@@ -0,0 +1,131 @@
+"""Archive-then-delete retention against a temporary DB and archive directory."""
+import os
+from datetime import date, timedelta
+
+import pytest
+
+pytest.importorskip('pyarrow')
+
+import feedback_retention
+import perf_metrics
+from db_schema import ROLLUP_TABLE_NAME, TABLE_NAME
+from feedback_retention import apply_retention, archive_path, archive_week, read_archive
+
+TODAY = date(2024, 6, 5)  # a Wednesday; with 2 weeks kept, rows before Monday 2024-05-27 expire
+RETENTION_WEEKS = 2
+EXPIRED_WEEKS = [date(2024, 5, 6), date(2024, 5, 13), date(2024, 5, 20)]
+HOT_WEEKS = [date(2024, 5, 27), date(2024, 6, 3)]
+ROWS_PER_WEEK = 5
+
+
+@pytest.fixture
+def conn(tmp_path, monkeypatch):
+    monkeypatch.setattr(perf_metrics, 'ENABLED', False)
+    conn = feedback_retention.connect(str(tmp_path / 'feedback.db'))
+    rows = [
+        (f"{week + timedelta(days=day)} 1{day}:00:00", f"Feedback {week} #{day}", 'Negative', 0.9, day,
+         'Billing/Payment', 'High', 1, 0.5 + day / 10)
+        for week in sorted(EXPIRED_WEEKS + HOT_WEEKS) for day in range(ROWS_PER_WEEK)
+    ]
+    with conn:
+        conn.executemany(
+            f"""INSERT INTO {TABLE_NAME} ("Date/Time", Text, Sentiment, Confidence_Score, User_ID,
+                                          Category, Priority, Priority_Rank, Scored_Confidence)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            rows
+        )
+        # Undated rows belong to no week and are never expired
+        conn.execute(f"INSERT INTO {TABLE_NAME} (Text) VALUES ('No timestamp')")
+    yield conn
+    conn.close()
+
+
+def ids_in(conn, weeks):
+    ids = []
+    for week in weeks:
+        ids += [row_id for (row_id,) in conn.execute(
+            f'SELECT id FROM {TABLE_NAME} WHERE "Date/Time" >= ? AND "Date/Time" < ? ORDER BY id',
+            (week.isoformat(), (week + timedelta(days=7)).isoformat())
+        )]
+    return ids
+
+
+def all_rows(conn):
+    return conn.execute(f"SELECT * FROM {TABLE_NAME} ORDER BY id").fetchall()
+
+
+def run_retention(conn, archive_dir):
+    return apply_retention(conn, RETENTION_WEEKS, archive_dir=str(archive_dir), today=TODAY)
+
+
+def test_expired_weeks_are_archived_then_deleted(conn, tmp_path):
+    archive_dir = tmp_path / 'archive'
+    expired_ids = ids_in(conn, EXPIRED_WEEKS)
+    hot_rows = [row for row in all_rows(conn) if row[0] not in expired_ids]
+
+    results = run_retention(conn, archive_dir)
+
+    assert results == [(week, ROWS_PER_WEEK, ROWS_PER_WEEK) for week in EXPIRED_WEEKS]
+    assert read_archive(archive_dir=str(archive_dir))['id'].tolist() == expired_ids
+    assert all_rows(conn) == hot_rows
+    assert not [name for name in os.listdir(archive_dir) if name.endswith('.tmp')]
+    # The rollup lost the expired days without keeping zero-count rows
+    assert conn.execute(f"SELECT COUNT(*) FROM {ROLLUP_TABLE_NAME} WHERE row_count <= 0").fetchone()[0] == 0
+    assert conn.execute(f"SELECT SUM(row_count) FROM {ROLLUP_TABLE_NAME}").fetchone()[0] == ROWS_PER_WEEK * len(HOT_WEEKS)
+
+    # Nothing left to do on a second run
+    assert run_retention(conn, archive_dir) == []
+
+
+def test_interrupted_run_is_merged_into_the_existing_file(conn, tmp_path):
+    archive_dir = tmp_path / 'archive'
+    week = EXPIRED_WEEKS[1]
+    week_ids = ids_in(conn, [week])
+    archive_week(conn, week, str(archive_dir))
+    # The earlier run died after deleting part of the week
+    with conn:
+        conn.execute(f"DELETE FROM {TABLE_NAME} WHERE id IN (?, ?)", week_ids[:2])
+
+    results = dict((result[0], result[1:]) for result in run_retention(conn, archive_dir))
+
+    assert results[week] == (ROWS_PER_WEEK, ROWS_PER_WEEK - 2)
+    archived = read_archive(week, week + timedelta(days=6), archive_dir=str(archive_dir))
+    assert archived['id'].tolist() == week_ids
+    assert ids_in(conn, EXPIRED_WEEKS) == []
+
+
+def test_failed_write_leaves_the_existing_file_alone(conn, tmp_path, monkeypatch):
+    archive_dir = tmp_path / 'archive'
+    week = EXPIRED_WEEKS[0]
+    archive_week(conn, week, str(archive_dir))
+    path = archive_path(week, str(archive_dir))
+    with open(path, 'rb') as f:
+        before = f.read()
+
+    def fail(src, dst):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(feedback_retention.os, 'replace', fail)
+    with pytest.raises(OSError):
+        run_retention(conn, archive_dir)
+
+    with open(path, 'rb') as f:
+        assert f.read() == before
+    assert os.listdir(archive_dir) == [os.path.basename(path)]
+    # Nothing was deleted without its archive
+    assert len(ids_in(conn, EXPIRED_WEEKS)) == ROWS_PER_WEEK * len(EXPIRED_WEEKS)
+
+
+def test_deletes_run_in_batches_up_to_the_archived_id(conn):
+    week = EXPIRED_WEEKS[2]
+    week_ids = ids_in(conn, [week])
+    commits = []
+    conn.set_trace_callback(lambda statement: commits.append(statement) if statement == 'COMMIT' else None)
+
+    deleted = feedback_retention._delete_archived(conn, week, week_ids[3], batch_size=2)
+
+    conn.set_trace_callback(None)
+    assert deleted == 4
+    assert len(commits) == 3  # one transaction per batch: 2 + 2 + an empty one
+    # A row ingested after the archive was written waits for the next run
+    assert ids_in(conn, [week]) == week_ids[4:]
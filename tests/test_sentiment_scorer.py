@@ -0,0 +1,150 @@
+"""Token-budget batching, the sentiment cache and model fingerprinting (none of it needs torch)."""
+import os
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import sentiment_scorer
+from sentiment_scorer import SentimentCache, SentimentScorer, model_fingerprint, plan_batches
+from translation_cache import text_key
+
+
+# --- plan_batches ---
+
+def _check_plan(lengths, max_batch_tokens, max_batch_size):
+    batches = plan_batches(lengths, max_batch_tokens, max_batch_size)
+    positions = [position for batch in batches for position in batch]
+    assert sorted(positions) == list(range(len(lengths)))
+    for batch in batches:
+        assert len(batch) <= max_batch_size
+        padded = len(batch) * max(max(1, lengths[position]) for position in batch)
+        # Only a single text longer than the budget may exceed it, alone in its batch
+        assert padded <= max_batch_tokens or len(batch) == 1
+    return batches
+
+
+def test_plan_batches_covers_every_text_within_budget():
+    rng = random.Random(3)
+    lengths = [rng.randint(1, 256) for _ in range(2000)]
+    _check_plan(lengths, max_batch_tokens=4096, max_batch_size=64)
+
+
+def test_plan_batches_groups_similar_lengths():
+    lengths = [200, 3, 190, 4, 5, 210]
+    batches = _check_plan(lengths, max_batch_tokens=600, max_batch_size=8)
+    assert batches == [[1, 3, 4], [2, 0], [5]]
+
+
+def test_short_texts_fill_wide_batches_up_to_the_size_cap():
+    batches = _check_plan([8] * 100, max_batch_tokens=8192, max_batch_size=64)
+    assert [len(batch) for batch in batches] == [64, 36]
+
+
+def test_oversized_and_empty_texts():
+    assert _check_plan([5000, 10, 0], max_batch_tokens=1000, max_batch_size=64) == [[2, 1], [0]]
+    assert plan_batches([]) == []
+
+
+# --- SentimentCache ---
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return str(tmp_path / 'sentiment.db')
+
+
+def test_cache_round_trip_survives_reopen(cache_path):
+    entries = {text_key(f'text {i}'): ('Negative' if i % 2 else 'Positive', round(i / 1000, 4)) for i in range(1200)}
+    cache = SentimentCache(cache_path)
+    cache.put_many(entries, 'model-a')
+    cache.close()
+
+    reopened = SentimentCache(cache_path)
+    try:
+        # More hashes than one IN (...) chunk, plus some that were never stored
+        wanted = list(entries) + [text_key('missing 1'), text_key('missing 2')]
+        assert reopened.get_many(wanted, 'model-a') == entries
+    finally:
+        reopened.close()
+
+
+def test_cache_entries_are_per_model(cache_path):
+    cache = SentimentCache(cache_path)
+    try:
+        cache.put_many({text_key('hello'): ('Positive', 0.9)}, 'model-a')
+        assert cache.get_many([text_key('hello')], 'model-b') == {}
+        cache.put_many({text_key('hello'): ('Negative', 0.6)}, 'model-b')
+        assert cache.get_many([text_key('hello')], 'model-a') == {text_key('hello'): ('Positive', 0.9)}
+        assert cache.get_many([text_key('hello')], 'model-b') == {text_key('hello'): ('Negative', 0.6)}
+    finally:
+        cache.close()
+
+
+def test_memory_layer_is_bounded_and_backed_by_sqlite(cache_path):
+    cache = SentimentCache(cache_path, max_memory_items=10)
+    try:
+        entries = {text_key(f'text {i}'): ('Neutral', 0.5) for i in range(50)}
+        cache.put_many(entries, 'model-a')
+        assert len(cache._memory) == 10
+        assert cache.get_many(list(entries), 'model-a') == entries
+    finally:
+        cache.close()
+
+
+# --- Model fingerprint / scorer cache path ---
+
+def _write_model(model_dir, config='{"id2label": {"0": "NEGATIVE", "1": "POSITIVE"}}', weights=b'\0' * 64):
+    os.makedirs(model_dir, exist_ok=True)
+    with open(os.path.join(model_dir, 'config.json'), 'w', encoding='utf-8') as f:
+        f.write(config)
+    with open(os.path.join(model_dir, 'model.safetensors'), 'wb') as f:
+        f.write(weights)
+
+
+def test_fingerprint_changes_when_the_model_is_replaced(tmp_path, monkeypatch):
+    model_dir = str(tmp_path / 'sentiment')
+    assert model_fingerprint(model_dir) == 'missing'
+    _write_model(model_dir)
+    original = model_fingerprint(model_dir)
+    assert model_fingerprint(model_dir) == original
+
+    _write_model(model_dir, config='{"id2label": {"0": "neg", "1": "neu", "2": "pos"}}')
+    assert model_fingerprint(model_dir) != original
+
+    # Large weight files are identified by size/mtime instead of being hashed
+    monkeypatch.setattr(sentiment_scorer, 'FINGERPRINT_HASH_BYTES', 16)
+    _write_model(model_dir)
+    before = model_fingerprint(model_dir)
+    weights = os.path.join(model_dir, 'model.safetensors')
+    stat = os.stat(weights)
+    os.utime(weights, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert model_fingerprint(model_dir) != before
+
+
+def test_scorer_key_includes_backend_and_model_files(tmp_path):
+    model_dir = str(tmp_path / 'sentiment')
+    _write_model(model_dir)
+    torch_key = SentimentScorer(model_dir, backend='torch').model_key
+    assert torch_key.startswith('sentiment:torch:')
+    assert SentimentScorer(model_dir, backend='int8').model_key != torch_key
+
+    _write_model(model_dir, weights=b'\1' * 64)
+    assert SentimentScorer(model_dir, backend='torch').model_key != torch_key
+
+
+def test_score_series_serves_cached_scores_without_a_model(tmp_path, cache_path):
+    cache = SentimentCache(cache_path)
+    scorer = SentimentScorer(str(tmp_path / 'no-model'), cache=cache)
+    try:
+        cache.put_many({text_key('great app'): ('Positive', 0.97)}, scorer.model_key)
+        texts = pd.Series(['great app', 'unknown text', None, 'great app'], index=[10, 11, 12, 13])
+        sentiment, confidence = scorer.score_series(texts)
+
+        assert sentiment.index.equals(texts.index)
+        assert sentiment.tolist() == ['Positive', None, None, 'Positive']
+        assert confidence[10] == confidence[13] == 0.97
+        assert np.isnan(confidence[11]) and np.isnan(confidence[12])
+        assert scorer.stats['cache_hits'] == 1 and scorer.stats['scored'] == 0
+    finally:
+        cache.close()
@@ -0,0 +1,157 @@
+"""TranslationEngine against a local stub translator (no network)."""
+import threading
+import time
+from collections import namedtuple
+
+import pandas as pd
+import pytest
+
+from translation_cache import TranslationCache
+from translation_engine import TranslationEngine
+
+Detection = namedtuple('Detection', ['lang', 'confidence'])
+Translation = namedtuple('Translation', ['text'])
+
+
+class StubTranslator:
+    """
+    googletrans-style stub: texts starting with 'es:' are Spanish and translate to their
+    upper-cased remainder. Records every call and the peak number of concurrent calls;
+    texts in `fail` raise, texts in `hang` sleep past any test timeout.
+    """
+
+    def __init__(self, delay=0.0, fail=(), hang=()):
+        self.delay = delay
+        self.fail = set(fail)
+        self.hang = set(hang)
+        self.detect_calls = []
+        self.translate_calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def _enter(self, texts):
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if self.hang.intersection(texts):
+                time.sleep(1.0)
+            elif self.delay:
+                time.sleep(self.delay)
+            if self.fail.intersection(texts):
+                raise ConnectionError("stub failure")
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def detect(self, texts):
+        self.detect_calls.append(list(texts))
+        self._enter(texts)
+        return [Detection('es', 0.99) if text.startswith('es:') else Detection('en', 0.99) for text in texts]
+
+    def translate(self, texts, dest='en'):
+        self.translate_calls.append(list(texts))
+        self._enter(texts)
+        return [Translation(text[3:].upper()) for text in texts]
+
+
+def _engine(translator, **kwargs):
+    kwargs.setdefault('retries', 0)
+    kwargs.setdefault('backoff', 0)
+    return TranslationEngine(translator=translator, **kwargs)
+
+
+def test_batches_unique_texts():
+    stub = StubTranslator()
+    texts = [f'es:text {i}' for i in range(45)]
+    mapping = _engine(stub, batch_size=20).translate_unique(texts)
+
+    assert sorted(len(call) for call in stub.detect_calls) == [5, 20, 20]
+    assert mapping == {text: text[3:].upper() for text in texts}
+
+
+def test_deduplicates_before_sending():
+    stub = StubTranslator()
+    engine = _engine(stub, batch_size=10)
+    series = pd.Series(['es:hola', 'es:hola', 'hello', 'es:adios', 'hello', 'es:hola'], index=[5, 3, 9, 1, 0, 7])
+    result = engine.translate_series(series)
+
+    sent = [text for call in stub.detect_calls for text in call]
+    assert sorted(sent) == ['es:adios', 'es:hola', 'hello']
+    assert [sorted(call) for call in stub.translate_calls] == [['es:adios', 'es:hola']]
+    assert result.index.equals(series.index)
+    assert result.tolist() == ['HOLA', 'HOLA', 'hello', 'ADIOS', 'hello', 'HOLA']
+    assert engine.stats['rows'] == 6 and engine.stats['unique_texts'] == 3
+
+
+def test_empty_and_numeric_values_are_not_sent():
+    stub = StubTranslator()
+    mapping = _engine(stub).translate_unique(['', 0, 3.5, None])
+    assert stub.detect_calls == []
+    assert mapping == {'': '', 0: '0', 3.5: '3.5', None: 'None'}
+
+
+def test_concurrency_is_bounded_by_max_workers():
+    stub = StubTranslator(delay=0.05)
+    texts = [f'es:text {i}' for i in range(10)]
+    _engine(stub, batch_size=1, max_workers=3).translate_unique(texts)
+
+    assert len(stub.detect_calls) == 10
+    assert stub.max_in_flight == 3
+
+
+def test_failed_batch_falls_back_to_original_text_and_is_retried():
+    stub = StubTranslator(fail={'es:boom'})
+    engine = _engine(stub, batch_size=2, retries=2)
+    mapping = engine.translate_unique(['es:boom', 'es:other', 'es:fine', 'es:good'])
+
+    # The failing batch is passed through unchanged; the other batch is translated
+    assert mapping == {'es:boom': 'es:boom', 'es:other': 'es:other', 'es:fine': 'FINE', 'es:good': 'GOOD'}
+    assert engine.stats['failed_batches'] == 1
+    assert engine.stats['retries'] == 2
+    assert sum('es:boom' in call for call in stub.detect_calls) == 3
+
+
+def test_timed_out_batch_falls_back_to_original_text():
+    stub = StubTranslator(hang={'es:slow'})
+    engine = _engine(stub, batch_size=1, timeout=0.05)
+    start = time.perf_counter()
+    mapping = engine.translate_unique(['es:slow', 'es:quick'])
+
+    assert time.perf_counter() - start < 0.9  # the hung call is abandoned, not awaited
+    assert mapping == {'es:slow': 'es:slow', 'es:quick': 'QUICK'}
+    assert engine.stats['failed_batches'] == 1
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = TranslationCache(str(tmp_path / 'cache.db'))
+    yield cache
+    cache.close()
+
+
+def test_results_are_written_through_to_the_cache(cache, tmp_path):
+    _engine(StubTranslator(), cache=cache).translate_unique(['es:hola', 'hello'])
+
+    # A fresh cache over the same file sees them, so a new engine never calls out
+    reopened = TranslationCache(str(tmp_path / 'cache.db'))
+    try:
+        assert reopened.get('es:hola').translated_text == 'HOLA'
+        assert reopened.get('hello') == ('en', 0.99, 'hello')
+        offline = StubTranslator(fail={'es:hola', 'hello'})
+        engine = _engine(offline, cache=reopened)
+        assert engine.translate_unique(['es:hola', 'hello']) == {'es:hola': 'HOLA', 'hello': 'hello'}
+        assert offline.detect_calls == []
+        assert engine.stats['cache_hits'] == 2
+    finally:
+        reopened.close()
+
+
+def test_failed_batches_are_not_cached(cache):
+    _engine(StubTranslator(fail={'es:boom'}), cache=cache).translate_unique(['es:boom'])
+    assert cache.get('es:boom') is None
+
+    stub = StubTranslator()
+    assert _engine(stub, cache=cache).translate_unique(['es:boom']) == {'es:boom': 'BOOM'}
+    assert stub.detect_calls == [['es:boom']]
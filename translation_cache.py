@@ -0,0 +1,132 @@
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict, namedtuple
+
+# --- CONSTANTS ---
+DB_FILE_NAME = 'feedback_data.db'
+CACHE_TABLE_NAME = 'translation_cache'
+DEFAULT_MEMORY_ITEMS = 4096
+
+CachedTranslation = namedtuple('CachedTranslation', ['lang', 'confidence', 'translated_text'])
+
+
+def text_key(text):
+    """Returns the SHA-256 hex digest used as the cache key for a text."""
+    return hashlib.sha256(str(text).encode('utf-8')).hexdigest()
+
+
+class TranslationCache:
+    """
+    Durable translation cache: bounded in-memory LRU in front of a SQLite side table.
+    Entries are keyed by the SHA-256 of the source text, so repeat runs skip the translator.
+    """
+
+    def __init__(self, db_path=DB_FILE_NAME, max_memory_items=DEFAULT_MEMORY_ITEMS):
+        self.db_path = db_path
+        self.max_memory_items = max_memory_items
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    # --- SQLITE SIDE TABLE ---
+
+    def _connection(self):
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS {CACHE_TABLE_NAME} (
+                    text_hash TEXT PRIMARY KEY,
+                    lang TEXT,
+                    confidence REAL,
+                    translated_text TEXT
+                )
+            """)
+            self._conn.commit()
+        return self._conn
+
+    def _remember(self, key, entry):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+    # --- PUBLIC API ---
+
+    def get(self, text):
+        """Returns a CachedTranslation for the text, or None on a miss."""
+        key = text_key(text)
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return entry
+
+            try:
+                row = self._connection().execute(
+                    f"SELECT lang, confidence, translated_text FROM {CACHE_TABLE_NAME} WHERE text_hash = ?",
+                    (key,)
+                ).fetchone()
+            except sqlite3.Error as e:
+                print(f"Translation cache read failed: {e}")
+                row = None
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            entry = CachedTranslation(*row)
+            self._remember(key, entry)
+            self.disk_hits += 1
+            return entry
+
+    def put(self, text, lang, confidence, translated_text):
+        """Stores a detection/translation result for the text."""
+        key = text_key(text)
+        try:
+            confidence = float(confidence)
+        except (TypeError, ValueError):
+            confidence = None
+        entry = CachedTranslation(str(lang), confidence, translated_text)
+
+        with self._lock:
+            self._remember(key, entry)
+            try:
+                conn = self._connection()
+                conn.execute(
+                    f"INSERT OR REPLACE INTO {CACHE_TABLE_NAME} VALUES (?, ?, ?, ?)",
+                    (key, entry.lang, entry.confidence, entry.translated_text)
+                )
+                conn.commit()
+            except sqlite3.Error as e:
+                print(f"Translation cache write failed: {e}")
+        return entry
+
+    def stats(self):
+        """Returns hit/miss counters for reporting."""
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                'hits': hits,
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': hits / lookups if lookups else 0.0,
+                'memory_items': len(self._memory),
+            }
+
+    def clear_memory(self):
+        """Drops the in-memory LRU (the SQLite table is kept)."""
+        with self._lock:
+            self._memory.clear()
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
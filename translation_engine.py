@@ -0,0 +1,183 @@
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+# --- DEFAULTS ---
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_BATCH_SIZE = 20
+DEFAULT_TIMEOUT = 10.0
+DEFAULT_RETRIES = 2
+DEFAULT_BACKOFF = 0.5
+MIN_TRANSLATE_CONFIDENCE = 0.9
+
+
+def needs_translation(text):
+    """Same guard as agent_logic.translate_text: empty/numeric values are never sent out."""
+    return bool(text) and not isinstance(text, (int, float))
+
+
+def _as_list(result):
+    return result if isinstance(result, list) else [result]
+
+
+class TranslationEngine:
+    """
+    Column-level translation stage.
+    Deduplicates the input, serves what it can from the cache and sends the remaining
+    unique texts to the translator in batches over a bounded thread pool. Every request
+    gets a timeout and retry with exponential backoff; a batch that keeps failing is
+    passed through unchanged (and not cached, so it is retried on the next run).
+
+    `translator` only needs googletrans-style `detect(list)` and `translate(list, dest=)`
+    methods, so a local stub can be injected for offline runs. Pass `translator_factory`
+    instead to create the client only when a text actually needs it. An optional
+    `language_filter` (see language_filter.LanguageFilter) keeps obvious English
+    text away from the translator entirely.
+    """
+
+    def __init__(self, translator=None, cache=None, language_filter=None, max_workers=DEFAULT_MAX_WORKERS,
+                 batch_size=DEFAULT_BATCH_SIZE, timeout=DEFAULT_TIMEOUT,
+                 retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF, translator_factory=None):
+        self._translator = translator
+        self.translator_factory = translator_factory
+        self.cache = cache
+        self.language_filter = language_filter
+        self.max_workers = max_workers
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self._stats_lock = threading.Lock()
+        self.reset_stats()
+
+    @property
+    def translator(self):
+        if self._translator is None and self.translator_factory is not None:
+            self._translator = self.translator_factory()
+        return self._translator
+
+    @translator.setter
+    def translator(self, translator):
+        self._translator = translator
+
+    def _count(self, name, amount=1):
+        with self._stats_lock:
+            self.stats[name] += amount
+
+    def reset_stats(self):
+        self.stats = {
+            'rows': 0,
+            'unique_texts': 0,
+            'prefiltered': 0,
+            'cache_hits': 0,
+            'batches': 0,
+            'requests': 0,
+            'retries': 0,
+            'failed_batches': 0,
+            'translated': 0,
+        }
+
+    # --- SINGLE BATCH ---
+
+    def _call(self, request_pool, fn, *args, **kwargs):
+        """Runs one translator request with a timeout."""
+        self._count('requests')
+        future = request_pool.submit(fn, *args, **kwargs)
+        return future.result(timeout=self.timeout)
+
+    def _detect_and_translate(self, request_pool, batch):
+        detections = _as_list(self._call(request_pool, self.translator.detect, batch))
+        if len(detections) != len(batch):
+            raise ValueError(f"Translator returned {len(detections)} detections for {len(batch)} texts")
+
+        to_translate = [
+            text for text, detection in zip(batch, detections)
+            if detection.lang != 'en' and detection.confidence > MIN_TRANSLATE_CONFIDENCE
+        ]
+        translated = {}
+        if to_translate:
+            results = _as_list(self._call(request_pool, self.translator.translate, to_translate, dest='en'))
+            translated = {text: result.text for text, result in zip(to_translate, results)}
+
+        return [
+            (text, detection.lang, detection.confidence, translated.get(text, text))
+            for text, detection in zip(batch, detections)
+        ]
+
+    def _run_batch(self, request_pool, batch):
+        """Returns {text: translated_text} for one batch, falling back to pass-through."""
+        for attempt in range(self.retries + 1):
+            try:
+                results = self._detect_and_translate(request_pool, batch)
+            except Exception as e:
+                if attempt < self.retries:
+                    self._count('retries')
+                    time.sleep(self.backoff * (2 ** attempt))
+                    continue
+                print(f"Translation batch of {len(batch)} failed, passing text through: {e!r}")
+                self._count('failed_batches')
+                return {text: text for text in batch}
+
+            output = {}
+            for text, lang, confidence, translated_text in results:
+                if self.cache is not None:
+                    self.cache.put(text, lang, confidence, translated_text)
+                if translated_text != text:
+                    self._count('translated')
+                output[text] = translated_text
+            return output
+
+    # --- PUBLIC API ---
+
+    def translate_unique(self, texts):
+        """Translates an iterable of texts, returning a {text: translated_text} mapping."""
+        mapping = {}
+        pending = {}
+        rows_per_text = Counter(texts)
+        for text, rows in rows_per_text.items():
+            if not needs_translation(text):
+                mapping[text] = str(text)
+                continue
+            text_str = str(text)
+            if self.language_filter is not None and self.language_filter.is_english(text_str, rows):
+                self._count('prefiltered')
+                mapping[text] = text_str
+                continue
+            cached = self.cache.get(text_str) if self.cache is not None else None
+            if cached is not None:
+                self._count('cache_hits')
+                mapping[text] = cached.translated_text
+            else:
+                pending[text] = text_str
+        self._count('unique_texts', len(mapping) + len(pending))
+
+        if not pending:
+            return mapping
+
+        unique_pending = list(dict.fromkeys(pending.values()))
+        batches = [unique_pending[i:i + self.batch_size] for i in range(0, len(unique_pending), self.batch_size)]
+        self._count('batches', len(batches))
+        translated = {}
+
+        # Requests get their own pool so a hung call times out instead of holding its batch slot
+        request_pool = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as batch_pool:
+                for output in batch_pool.map(lambda batch: self._run_batch(request_pool, batch), batches):
+                    translated.update(output)
+        finally:
+            request_pool.shutdown(wait=False, cancel_futures=True)
+
+        for text, text_str in pending.items():
+            mapping[text] = translated[text_str]
+        return mapping
+
+    def translate_series(self, series):
+        """Translates a whole column; cost scales with unique texts, not rows."""
+        self._count('rows', len(series))
+        values = series.tolist()
+        mapping = self.translate_unique(values)
+        return pd.Series([mapping[value] for value in values], index=series.index, dtype=object)